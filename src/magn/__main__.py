@@ -0,0 +1,42 @@
+"""
+Command line interface of the magn package.
+
+magn serve MODEL [--host HOST] [--port PORT | --unix PATH] [--workers N] [--max-batch-size N] [--max-delay-ms MS]
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+from typing import List, Optional
+
+from magn.server import PredictionServer
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Parse the command line and run the command."""
+    parser = argparse.ArgumentParser(prog="magn")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="serve the predictions of a saved MAGN graph over HTTP")
+    serve.add_argument("model", type=Path, help="the file written by MAGNGraph.save")
+    serve.add_argument("--host", default="127.0.0.1", help="the host of the TCP server")
+    serve.add_argument("--port", type=int, default=8000, help="the port of the TCP server")
+    serve.add_argument("--unix", type=Path, default=None, help="listen on this Unix socket instead of the TCP port")
+    serve.add_argument("--workers", type=int, default=0,
+                       help="the number of worker processes predicting batches, 0 predicts in a thread")
+    serve.add_argument("--max-batch-size", type=int, default=64, help="the maximal number of rows of a batch")
+    serve.add_argument("--max-delay-ms", type=float, default=5.0,
+                       help="the maximal time a request waits for more requests to join its batch")
+
+    arguments = parser.parse_args(argv)
+    if arguments.command == "serve":
+        server = PredictionServer(arguments.model, arguments.workers, arguments.max_batch_size,
+                                  arguments.max_delay_ms / 1000.0)
+        try:
+            asyncio.run(server.serve(arguments.host, arguments.port, arguments.unix))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
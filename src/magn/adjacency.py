@@ -0,0 +1,154 @@
+"""Compiled (array based) adjacency between the ASA elements and the MAGN objects of a MAGN graph."""
+
+from dataclasses import dataclass
+from typing import final, Dict, List, Self, Sequence, Tuple
+
+import numpy as np
+
+from magn.asa.asa_element import ASAElement
+from magn.asa.asa_graph import ASAGraph
+from magn.magn_object_node import MAGNObjectNode
+from magn.priorities import PriorityVersion
+
+
+@final
+@dataclass(slots=True)
+class CompiledAdjacency:
+    """
+    The element -> object connections of a MAGN graph in the compressed sparse row format, with weights of a single
+    priority version. Lets activation be spread from many query elements to all objects with a few array operations.
+
+    version:            the priority version the weights were computed with.
+    element_rows:       (element index) => (row of the element)
+    objects:            the objects, indexed by their column.
+    object_columns:     (object index) => (column of the object)
+    object_tables:      the table code of every column.
+    table_codes:        (table name) => (table code)
+    indptr:             the objects of row r are columns[indptr[r]:indptr[r + 1]].
+    columns:            columns of the connected objects.
+    weights:            element priority * magn_weight() of every connection.
+    bl_rows:            rows of the bl_prev and bl_next neighbours of every row, -1 if there is no neighbour.
+    bl_weights:         bl_prev_weight and bl_next_weight of every row.
+    """
+    version: int
+    element_rows: Dict[int, int]
+    objects: List[MAGNObjectNode]
+    object_columns: Dict[int, int]
+    object_tables: np.ndarray
+    table_codes: Dict[str, int]
+    indptr: np.ndarray
+    columns: np.ndarray
+    weights: np.ndarray
+    bl_rows: np.ndarray
+    bl_weights: np.ndarray
+
+    @classmethod
+    def compile(cls, asa_graphs: Sequence[ASAGraph], objects: Dict[str, List[MAGNObjectNode]],
+                priorities: PriorityVersion) -> Self:
+        """
+        Compile the adjacency of the graph.
+
+        :param asa_graphs: the ASA graphs of the MAGN graph
+        :param objects: the objects of the MAGN graph, by table
+        :param priorities: the priority version the weights are computed with
+        :return: the compiled adjacency
+        """
+        table_codes = {table: code for code, table in enumerate(objects)}
+        all_objects = [object_node for table_objects in objects.values() for object_node in table_objects]
+        object_columns = {object_node.index: column for column, object_node in enumerate(all_objects)}
+        object_tables = np.array([table_codes[object_node.clazz] for object_node in all_objects], dtype=np.int64)
+
+        # The elements are streamed, so elements of ASA graphs on the disk are not all loaded at once. The bl neighbours
+        # are recorded by their indexes and mapped to rows once all rows are known.
+        element_rows: Dict[int, int] = {}
+        indptr: List[int] = [0]
+        columns: List[int] = []
+        weights: List[float] = []
+        bl_indexes: List[Tuple[int, int]] = []
+        bl_weights: List[Tuple[float, float]] = []
+
+        for asa_graph in asa_graphs:
+            for element in asa_graph.iter_elements():
+                element_rows[element.index] = len(element_rows)
+                weight = priorities[element.index] * element.magn_weight()
+                for object_node in element.magn_objects:
+                    columns.append(object_columns[object_node.index])
+                    weights.append(weight)
+                indptr.append(len(columns))
+
+                bl_prev, bl_next = element.bl_prev, element.bl_next
+                bl_indexes.append((-1 if bl_prev is None else bl_prev.index, -1 if bl_next is None else bl_next.index))
+                bl_weights.append((0.0 if bl_prev is None else element.bl_prev_weight,
+                                   0.0 if bl_next is None else element.bl_next_weight))
+
+        bl_rows = np.array([[element_rows.get(index, -1) for index in neighbours] for neighbours in bl_indexes],
+                           dtype=np.int64).reshape(-1, 2)
+
+        return cls(
+            version=priorities.version,
+            element_rows=element_rows,
+            objects=all_objects,
+            object_columns=object_columns,
+            object_tables=object_tables,
+            table_codes=table_codes,
+            indptr=np.array(indptr, dtype=np.int64),
+            columns=np.array(columns, dtype=np.int64),
+            weights=np.array(weights, dtype=np.float64),
+            bl_rows=bl_rows,
+            bl_weights=np.array(bl_weights, dtype=np.float64).reshape(-1, 2),
+        )
+
+    def spread(self, queries: Sequence[Sequence[ASAElement]], use_bl: bool = False
+               ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Spread activation from the elements of every query to the objects. Every query element is activated with 1.0
+        and passes (activation * priority * magn_weight()) to each of its objects. With use_bl, the bl neighbours of the
+        query elements are activated as well, with the weights of the bl connections.
+        The stimulation is accumulated sparsely: only the (query, object) pairs reached by a connection are summed, so
+        the memory is bounded by the number of connections of the query elements, not by queries * objects.
+
+        :param queries: the activated elements of every query
+        :param use_bl: if True, the activation is spread along the bidirectional linked list first
+        :return: (columns of the stimulated objects in ascending order, their stimulation) for every query
+        """
+        query_ids, rows = self._query_rows(queries)
+        activations = np.ones(len(rows), dtype=np.float64)
+
+        if use_bl:
+            neighbour_rows = self.bl_rows[rows]
+            has_neighbour = neighbour_rows >= 0
+            neighbour_query_ids = np.broadcast_to(query_ids[:, None], has_neighbour.shape)[has_neighbour]
+            query_ids = np.concatenate([query_ids, neighbour_query_ids])
+            activations = np.concatenate([activations, self.bl_weights[rows][has_neighbour]])
+            rows = np.concatenate([rows, neighbour_rows[has_neighbour]])
+
+        starts = self.indptr[rows]
+        counts = self.indptr[rows + 1] - starts
+        total = int(counts.sum())
+
+        # Positions of all connections of all activated rows in the columns / weights arrays
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        positions = offsets + np.arange(total, dtype=np.int64)
+
+        # Every (query, column) pair is a single key, so summing by key orders the pairs by query, then by column
+        pairs = np.repeat(query_ids, counts) * len(self.objects) + self.columns[positions]
+        keys, inverse = np.unique(pairs, return_inverse=True)
+        stimulation = np.bincount(inverse, weights=np.repeat(activations, counts) * self.weights[positions],
+                                  minlength=len(keys))
+
+        bounds = np.searchsorted(keys, np.arange(len(queries) + 1, dtype=np.int64) * len(self.objects))
+        return [(keys[start:end] - query_id * len(self.objects), stimulation[start:end])
+                for query_id, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))]
+
+    def _query_rows(self, queries: Sequence[Sequence[ASAElement]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the (query, row) pairs of all query elements that are part of the compiled graph."""
+        query_ids: List[int] = []
+        rows: List[int] = []
+        for query_id, elements in enumerate(queries):
+            for element in elements:
+                row = self.element_rows.get(element.index)
+                if row is not None:
+                    query_ids.append(query_id)
+                    rows.append(row)
+
+        return np.array(query_ids, dtype=np.int64), np.array(rows, dtype=np.int64)
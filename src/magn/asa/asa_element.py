@@ -8,25 +8,31 @@ class ASAElement(AbstractNode):
     """
     A class representation of an element in ASA graph. An Element is a part of a node in the ASA graph.
 
-    key:                    represents the unique identifier of the node in the ASA graph.
+    key:                    represents the unique identifier of the node in the ASA graph. In ASA graphs of
+                            dictionary encoded columns it is the code of the value.
+    value:                  the value of the feature the ASAElement represents. It is the key itself, unless the
+                            column is dictionary encoded.
     feature:                name of the feature which value the ASAElement represents.
     key_duplicates:         integer that counts the number of duplicate keys. It is initially set to 1.
     bl_prev:                points to the previous node in the bidirectional linked list. It is initially set to None.
     bl_next:                points to the next node in the bidirectional linked list. It is initially set to None.
+    index:                  index of the element in the priorities of the MAGN graph. It is -1 until the element is
+                            registered in a MAGN graph.
     magn_object:            list that stores the MAGN graph objects associated with the node.
     """
 
     def __eq__(self, __value) -> bool:
-        return isinstance(__value, ASAElement) and self.key == __value.key and self.feature == __value.feature
+        return isinstance(__value, ASAElement) and self.value == __value.value and self.feature == __value.feature
 
-    def __init__(self, key: int | float | str, feature: str) -> None:
+    def __init__(self, key: int | float | str, feature: str, value: int | float | str | None = None) -> None:
         if key is None:
             raise ValueError("Key cannot be None")
 
         self.key: int | float | str = key
+        self.value: int | float | str = key if value is None else value
         self.feature: str = feature
         self.key_duplicates: int = 1
-        self.priority: float = 1.0
+        self.index: int = -1
 
         # Bidirectional linked list
         self.bl_prev: ASAElement | None = None
@@ -37,6 +43,19 @@ class ASAElement(AbstractNode):
         # MAGN
         self.magn_objects: List[MAGNObjectNode] = []  # List of MAGN objects
 
+    def __getstate__(self) -> dict:
+        """The references to other nodes are pickled by the MAGN graph (see MAGNGraph.__getstate__)."""
+        state = self.__dict__.copy()
+        for name in ('bl_prev', 'bl_next', 'magn_objects'):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.bl_prev = None
+        self.bl_next = None
+        self.magn_objects = []
+
     def magn_weight(self) -> float:
         """
         Calculate the weight of the connection between this element and MAGN object.
@@ -45,5 +64,43 @@ class ASAElement(AbstractNode):
         """
         return 1.0 / self.key_duplicates
 
+    def add(self, value: int | float | str) -> None:
+        """
+        Called for every value inserted into the element, after it is counted in key_duplicates. Plain elements
+        represent a single value, so there is nothing to aggregate.
+
+        :param value: the inserted value
+        """
+
+    def merge(self, other: 'ASAElement') -> None:
+        """
+        Merge the values of another element with the same key into the element (see ASAGraph.bulk_insert).
+
+        :param other: the merged element, not connected to anything
+        """
+        self.key_duplicates += other.key_duplicates
+
+    def key_sum(self) -> float:
+        """
+        Sum of the values represented by the element, i.e. the key counted with its duplicates.
+        Non-numeric keys cannot be summed, so they contribute nothing.
+
+        :return: the sum of the values
+        """
+        if isinstance(self.key, str):
+            return 0.0
+        return self.key * self.key_duplicates
+
+    def reference(self) -> 'ASAElement':
+        """
+        Returns what MAGN objects keep to refer to the element (see MAGNObjectNode.add_value). It is the element
+        itself, elements of ASA graphs stored on the disk return a reference that loads them on access.
+        """
+        return self
+
+    def resolve(self) -> 'ASAElement':
+        """Returns the element a reference returned by reference refers to, i.e. the element itself."""
+        return self
+
     def neighbors(self) -> List[AbstractNode]:
         return self.magn_objects
@@ -1,7 +1,14 @@
-import networkx as nx
+from collections import Counter
+from itertools import pairwise
+from math import ceil
+from typing import ClassVar, Iterable, Iterator, List, Tuple
 
 from magn.asa.asa_element import ASAElement
 from magn.asa.asa_node import ASANode
+from magn.database.column_type import ColumnType
+
+DEFAULT_ORDER = 3
+"""The default maximal number of children of an ASA node, i.e. a 2-3 tree."""
 
 
 class ASAGraph:
@@ -9,13 +16,22 @@ class ASAGraph:
     An ASA graph
 
     Attributes:
-    root:   the root node of the ASA graph
-    sensor: the sensor that is associated with the ASA graph
+    root:           the root node of the ASA graph
+    sensor:         the sensor that is associated with the ASA graph
+    order:          the maximal number of children of a node. Nodes hold up to order - 1 elements, so a higher order
+                    gives a shallower tree. The default of 3 is the 2-3 tree of the original ASA graph.
+    column_type:    the type of column the graph is specialised for. None if the graph is not specialised.
     """
 
-    def __init__(self, name: str):
+    column_type: ClassVar[ColumnType | None] = None
+
+    def __init__(self, name: str, order: int = DEFAULT_ORDER):
+        if order < 3:
+            raise ValueError(f"The order of an ASA graph must be at least 3, got {order}")
+
         self.root: ASANode = ASANode()
         self.name = name
+        self.order: int = order
         # self.sensor = None
 
     def search(self, key: int | float | str) -> ASAElement | None:
@@ -28,56 +44,368 @@ class ASAGraph:
 
         node = self.root
         while True:
-            element = node.search(key)
-            if element:
+            position, element = node.find(key)
+            if element is not None:
                 return element
 
             if node.is_leaf():
                 return None
 
-            if key < node.left_element().key:
-                node = node.left_child()
-
-            elif key > node.right_element().key:
-                node = node.right_child()
-
-            else:
-                node = node.middle_child()
+            node = node.children[position]
 
-    def insert(self, key: int | float | str, feature_name: str):
+    def insert(self, key: int | float | str, feature_name: str) -> ASAElement:
         """
         Insert an element with the given key into the ASA graph
 
         :param feature_name:  the name of the feature that the element represents
         :param key: the key of the element to insert
+        :return: the inserted element, or the already existing element with the given key
+        """
+        return self._insert(key, feature_name, key)
+
+    def _insert(self, key: int | float | str, feature_name: str, value: int | float | str) -> ASAElement:
+        """
+        Insert the value into the element with the given key and update the aggregates of the tree
+
+        :param key: the key of the element to insert
+        :param feature_name: the name of the feature that the element represents
+        :param value: the inserted value. It differs from the key if the element aggregates several values
+        :return: the inserted element, or the already existing element with the given key
         """
 
         node = self.root
         while True:
-            element = node.search(key)
+            position, element = node.find(key)
             if element is not None:
                 element.key_duplicates += 1
-                return
+                element.add(value)
+                self.update_aggregates(node)
+                return element
 
             if node.is_leaf():
-                new_element = ASAElement(key, feature_name)
+                new_element = self.create_element(key, feature_name)
+                new_element.add(value)
                 self.insert_bl(new_element)
                 node.insert_element(new_element)
-                while node is not None and len(node.elements) > 2:
+                while node is not None and len(node.elements) >= self.order:
                     node = self.split_node(node)
+                self.update_aggregates(node)
                 break
 
-            elif key < node.left_element().key:
-                node = node.left_child()
+            node = node.children[position]
 
-            elif key > node.right_element().key:
-                node = node.right_child()
+        self.bl_fix_weights()
+        return new_element
 
-            else:
-                node = node.middle_child()
+    def bulk_insert(self, keys: Iterable[int | float | str], feature_name: str) -> None:
+        """
+        Insert all keys of a column at once. The distinct keys are counted and sorted as an array, merged with the
+        elements already in the graph, linked into the bidirectional linked list, the tree is built bottom-up and the
+        weights are fixed once. Inserting the keys one by one fixes the weights of the whole list after every new key,
+        so it takes quadratic time. Only the distinct keys become Python objects, so a column can be inserted in chunks
+        (e.g. of a CSV file) at the cost of one pass over the elements per chunk
+
+        :param keys: the keys to insert, e.g. a column as a numpy array or a pandas Series. Duplicates are counted
+        :param feature_name: the name of the feature that the elements represent
+        """
+        elements = self._bulk_elements(keys, feature_name)
+        if not elements:
+            return
+
+        if self.root.elements:
+            elements = self._merge_elements(list(self.iter_elements()), elements)
+
+        elements[0].bl_prev = None
+        elements[-1].bl_next = None
+        for previous_element, next_element in pairwise(elements):
+            previous_element.bl_next = next_element
+            next_element.bl_prev = previous_element
 
+        self.root = self._build_tree(elements)
         self.bl_fix_weights()
 
+    def _bulk_elements(self, keys: Iterable[int | float | str], feature_name: str) -> List[ASAElement]:
+        """
+        Create the elements of the distinct keys with their duplicates counted
+
+        :return: the elements in ascending order of their keys
+        """
+        elements = []
+        for key, duplicates in zip(*self._distinct_counts(keys)):
+            element = self.create_element(key, feature_name)
+            element.key_duplicates = duplicates
+            elements.append(element)
+
+        return elements
+
+    @staticmethod
+    def _merge_elements(elements: List[ASAElement], new_elements: List[ASAElement]) -> List[ASAElement]:
+        """
+        Merge new elements into the elements of the graph. A new element with the key of an existing one is merged
+        into it, so the existing elements (and the MAGN objects connected to them) are kept
+
+        :param elements: the elements of the graph in ascending order of their keys
+        :param new_elements: the new elements in ascending order of their keys
+        :return: all elements in ascending order of their keys
+        """
+        merged = []
+        i = 0
+        for new_element in new_elements:
+            while i < len(elements) and elements[i].key < new_element.key:
+                merged.append(elements[i])
+                i += 1
+
+            if i < len(elements) and elements[i].key == new_element.key:
+                elements[i].merge(new_element)
+            else:
+                merged.append(new_element)
+
+        merged += elements[i:]
+        return merged
+
+    @staticmethod
+    def _distinct_counts(keys: Iterable[int | float | str], ordered: bool = True) -> Tuple[list, List[int]]:
+        """
+        Count the distinct keys of a column. Arrays are counted by numpy, so only the distinct keys are converted to
+        Python values. Keys that cannot be compared with each other are counted in a dictionary
+
+        :param keys: the keys, e.g. a column as a numpy array or a pandas Series
+        :param ordered: if True, the keys are returned in ascending order, otherwise in the order of their first
+        occurrence
+        :return: the distinct keys and the number of occurrences of each of them
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        if hasattr(keys, 'to_numpy'):
+            keys = keys.to_numpy()
+        elif not isinstance(keys, np.ndarray):
+            # Lists of mixed types would be converted to strings
+            keys = np.fromiter(keys, dtype=object)
+
+        try:
+            distinct_keys, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        except TypeError:
+            counter = Counter(keys.tolist())
+            return list(counter), list(counter.values())
+
+        if not ordered:
+            order = np.argsort(first, kind='stable')
+            distinct_keys, counts = distinct_keys[order], counts[order]
+        return distinct_keys.tolist(), counts.tolist()
+
+    def _build_tree(self, elements: List[ASAElement]) -> ASANode:
+        """
+        Build the tree of the sorted elements bottom-up. Every level is split into the fewest nodes of at most
+        order - 1 elements, with one element between neighbouring nodes moved to the level above
+
+        :param elements: the elements in ascending order of their keys
+        :return: the root of the tree
+        """
+        children: List[ASANode] | None = None
+        while len(elements) >= self.order:
+            n_nodes = ceil((len(elements) + 1) / self.order)
+            n_kept = len(elements) - (n_nodes - 1)
+
+            nodes, separators = [], []
+            start = 0
+            for i in range(n_nodes):
+                size = n_kept // n_nodes + (1 if i < n_kept % n_nodes else 0)
+                node = ASANode()
+                node.elements = elements[start:start + size]
+                if children is not None:
+                    node.children = children[start:start + size + 1]
+                nodes.append(node)
+
+                start += size
+                if i < n_nodes - 1:
+                    separators.append(elements[start])
+                    start += 1
+
+            for node in nodes:
+                self._adopt_children(node)
+            elements, children = separators, nodes
+
+        root = ASANode()
+        root.elements = elements
+        root.children = children or []
+        self._adopt_children(root)
+        return root
+
+    @staticmethod
+    def _adopt_children(node: ASANode) -> None:
+        """Set the node as the parent of its children and compute its aggregates."""
+        for child in node.children:
+            child.parent = node
+        node.update_aggregates()
+
+    @staticmethod
+    def update_aggregates(node: ASANode | None) -> None:
+        """
+        Recompute the aggregates of the node and all its ancestors
+
+        :param node: the lowest node whose aggregates changed
+        """
+        while node is not None:
+            node.update_aggregates()
+            node = node.parent
+
+    def count(self) -> int:
+        """
+        Returns the number of stored values (duplicates included) in O(1)
+        """
+        return self.root.total
+
+    def rank(self, key: int | float, inclusive: bool = False) -> int:
+        """
+        Returns the number of stored values (duplicates included) smaller than the key in O(log n)
+
+        :param key: the key
+        :param inclusive: if True, values equal to the key are counted as well
+        :raise TypeError: if the values of the graph are not ordered
+        """
+        self._check_ordered()
+        return self._prefix(key, inclusive)[0]
+
+    def count_range(self, lo: int | float, hi: int | float) -> int:
+        """
+        Returns the number of stored values (duplicates included) in the closed range [lo, hi] in O(log n)
+
+        :raise TypeError: if the values of the graph are not ordered
+        """
+        self._check_ordered()
+        if hi < lo:
+            return 0
+        return self._prefix(hi, True)[0] - self._prefix(lo, False)[0]
+
+    def sum_range(self, lo: int | float, hi: int | float) -> float:
+        """
+        Returns the sum of the stored values (duplicates included) in the closed range [lo, hi] in O(log n)
+
+        :raise TypeError: if the values of the graph are not ordered
+        """
+        self._check_ordered()
+        if hi < lo:
+            return 0.0
+        return self._prefix(hi, True)[1] - self._prefix(lo, False)[1]
+
+    def quantile(self, q: float) -> ASAElement | None:
+        """
+        Returns the element holding the q-quantile of the stored values (duplicates included) in O(log n)
+
+        :param q: the quantile, between 0 and 1
+        :return: the element of the quantile, None if the graph is empty
+        :raise TypeError: if the values of the graph are not ordered
+        """
+        self._check_ordered()
+        if not 0.0 <= q <= 1.0:
+            raise ValueError(f"Quantile must be between 0 and 1, got {q}")
+
+        node = self.root
+        if node.total == 0:
+            return None
+
+        # 1-based position of the searched value among all stored values
+        position = max(1, ceil(q * node.total))
+        while True:
+            for i, element in enumerate(node.elements):
+                if node.children:
+                    child = node.children[i]
+                    if position <= child.total:
+                        node = child
+                        break
+                    position -= child.total
+
+                if position <= element.key_duplicates:
+                    return element
+                position -= element.key_duplicates
+            else:
+                node = node.children[-1]
+
+    def lower_bound(self, key: int | float | str) -> ASAElement | None:
+        """
+        Returns the element with the smallest key not smaller than the given key in O(log n)
+
+        :param key: the key
+        :return: the element, None if all keys are smaller than the given key
+        """
+        found = None
+        node = self.root
+        while node is not None:
+            position, element = node.find(key)
+            if element is not None:
+                return element
+
+            if position < len(node.elements):
+                found = node.elements[position]
+            node = node.children[position] if node.children else None
+
+        return found
+
+    def range_elements(self, lo: int | float | str, hi: int | float | str) -> List[ASAElement]:
+        """
+        Returns the elements with keys in the closed range [lo, hi]. The first element is found in the tree and the
+        rest are collected along the bidirectional linked list
+
+        :param lo: the lower bound of the range
+        :param hi: the upper bound of the range
+        :return: the elements in ascending order of their keys
+        """
+        elements = []
+        element = self.lower_bound(lo)
+        while element is not None and element.key <= hi:
+            elements.append(element)
+            element = element.bl_next
+
+        return elements
+
+    def _check_ordered(self) -> None:
+        """
+        Raise a TypeError if the graph is specialised for values without an order (identifiers and categorical values),
+        which have no ranks or quantiles.
+        """
+        if self.column_type in (ColumnType.CATEGORICAL, ColumnType.IDENTIFIER):
+            raise TypeError(f"Values of the {self.column_type.value} column {self.name} are not ordered.")
+
+    def _prefix(self, key: int | float, inclusive: bool) -> Tuple[int, float]:
+        """
+        Returns the number and the sum of the stored values smaller than (or equal to, if inclusive) the key.
+        Uses the subtree aggregates, so only one path from the root to a leaf is visited.
+        """
+        count, key_sum = 0, 0.0
+        node = self.root
+        while node is not None:
+            next_node = node.children[-1] if node.children else None
+            for i, element in enumerate(node.elements):
+                if element.key < key or (inclusive and element.key == key):
+                    if node.children:
+                        count += node.children[i].total
+                        key_sum += node.children[i].key_sum
+                    count += element.key_duplicates
+                    key_sum += element.key_sum()
+                    continue
+
+                if element.key == key and node.children:
+                    count += node.children[i].total
+                    key_sum += node.children[i].key_sum
+                    next_node = None
+                else:
+                    next_node = node.children[i] if node.children else None
+                break
+
+            node = next_node
+
+        return count, key_sum
+
+    def create_element(self, key: int | float | str, feature_name: str) -> ASAElement:
+        """
+        Create a new element of the ASA graph. Specialised graphs may override it to create specialised elements
+
+        :param key: the key of the element
+        :param feature_name: the name of the feature that the element represents
+        :return: the new element
+        """
+        return ASAElement(key, feature_name)
+
     def insert_bl(self, new_element: ASAElement):
         """
         Insert an element into the bidirectional linked list
@@ -152,7 +480,7 @@ class ASAGraph:
         current_element = self.leftmost_element()
 
         while current_element:
-            print(f"({current_element.key}|{current_element.key_duplicates})", end="")
+            print(f"({current_element.value}|{current_element.key_duplicates})", end="")
             if current_element.bl_next:
                 print(f" --{current_element.bl_next_weight}-- ", end="")
             current_element = current_element.bl_next
@@ -164,39 +492,39 @@ class ASAGraph:
         elements = []
         current_element = self.leftmost_element()
         while current_element:
-            elements.append(current_element.key)
+            elements.append(current_element.value)
             current_element = current_element.bl_next
         return elements
 
     def split_node(self, node: ASANode):
         """
-        Split the node if it has more 3 elements
-        Throws an error if the node does not have 3 elements
+        Split the node if it has order elements. The middle element is moved to the parent node
+        Throws an error if the node does not have order elements
+
+        :return: the parent node, which may have to be split in turn
         """
-        if len(node.elements) != 3:
-            raise ValueError("The node does not have 3 elements thus it cannot be split")
+        if len(node.elements) != self.order:
+            raise ValueError(f"The node does not have {self.order} elements thus it cannot be split")
 
         # remove middle element from node
-        middle_element = node.elements[1]
-        node.remove_element(middle_element)
+        middle = len(node.elements) // 2
+        middle_element = node.elements.pop(middle)
 
         if node.parent is None:
             new_parent = ASANode()
             self.root = new_parent
-            new_parent.insert_element(middle_element)
-
-            new_parent.insert_child(node)
+            new_parent.insert_child(node, 0)
             node.parent = new_parent
 
-        else:
-            node.parent.insert_element(middle_element)
-
-        return node.split_into_two()
+        node.parent.insert_element(middle_element)
+        return node.split_into_two(middle)
 
     def plot_graph(self):
         """
         Plot the ASA graph
         """
+        import networkx as nx  # pylint: disable=import-outside-toplevel
+
         graph = nx.DiGraph()
         self.root.plot_graph_node(graph, depth=0)
         nx.draw(graph, with_labels=True)
@@ -232,3 +560,15 @@ class ASAGraph:
             elements.append(current_element)
             current_element = current_element.bl_next
         return elements
+
+    def iter_elements(self) -> Iterator[ASAElement]:
+        """
+        Iterate over the elements of the ASA graph in ascending order of their keys without collecting them in a list
+        """
+        if not self.root.elements:
+            return
+
+        current_element = self.leftmost_element()
+        while current_element:
+            yield current_element
+            current_element = current_element.bl_next
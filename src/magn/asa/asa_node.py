@@ -1,19 +1,32 @@
-from typing import List, Self
-
-import networkx as nx
+from bisect import bisect_left
+from operator import attrgetter
+from typing import List, Self, Tuple, TYPE_CHECKING
 
 from magn.asa.asa_element import ASAElement
 
+if TYPE_CHECKING:
+    import networkx as nx
+
+_element_key = attrgetter('key')
+
 
 class ASANode:
     """
     A node in the ASA graph (Aggregate Sorting Associative graph).
-    It can consist of 1-3 elements
+    It consists of 1 to order - 1 elements (see ASAGraph.order), one more while it is being split
 
     Attributes:
-    elements:   list of elements in the node
+    elements:   list of elements in the node, in ascending order of their keys
     parent:     the parent node of the current node
-    children:   list of children nodes of the current node
+    children:   list of children nodes of the current node. The keys of the i-th child lie between the keys of the
+                (i-1)-th and the i-th element
+
+    Aggregates of the subtree rooted in the node:
+    size:       number of elements
+    total:      sum of duplicates of the elements, i.e. the number of stored values
+    key_sum:    sum of the stored values (keys counted with their duplicates)
+    key_min:    the smallest key, None if the subtree is empty
+    key_max:    the biggest key, None if the subtree is empty
     """
 
     def __init__(self, parent=None) -> None:
@@ -21,6 +34,12 @@ class ASANode:
         self.parent: Self | None = parent
         self.children: List[Self] = []
 
+        self.size: int = 0
+        self.total: int = 0
+        self.key_sum: float = 0.0
+        self.key_min: int | float | str | None = None
+        self.key_max: int | float | str | None = None
+
     def search(self, key):
         """
         Search for an element in the node with the given key. It does not search in the children nodes
@@ -28,11 +47,21 @@ class ASANode:
         :param key: the key of the element to search for
         :return: the element with the given key if it exists, None otherwise
         """
+        return self.find(key)[1]
 
-        for element in self.elements:
-            if element.key == key:
-                return element
-        return None
+    def find(self, key) -> Tuple[int, ASAElement | None]:
+        """
+        Binary search for the key among the elements of the node
+
+        :param key: the key to search for
+        :return: the position of the first element with a key not smaller than the given key (which is also the
+        position of the child to descend to if the key is not in the node), and the element with the given key if it
+        exists, None otherwise
+        """
+        position = bisect_left(self.elements, key, key=_element_key)
+        if position < len(self.elements) and self.elements[position].key == key:
+            return position, self.elements[position]
+        return position, None
 
     def is_leaf(self) -> bool:
         """
@@ -65,7 +94,7 @@ class ASANode:
         """
         Returns keys in the node in sorted order. It does not return keys of the children nodes
         """
-        return sorted([element.key for element in self.elements])
+        return [element.key for element in self.elements]
 
     def left_child(self):
         """
@@ -133,74 +162,89 @@ class ASANode:
 
         return None
 
-    def insert_element(self, new_element: ASAElement):
+    def insert_element(self, new_element: ASAElement) -> int:
         """
         Insert a new element to the node. The element is inserted in the correct (ascending) order
 
         :param new_element: the element to insert
+        :return: the position of the inserted element
         """
-        self.elements.append(new_element)
-        self.elements.sort(key=lambda element: element.key)
+        position = bisect_left(self.elements, new_element.key, key=_element_key)
+        self.elements.insert(position, new_element)
+        return position
 
-    def insert_child(self, node: Self):
+    def insert_child(self, node: Self, position: int | None = None):
         """
         Inserts child node to the node in the correct order
-        """
-        n_children = len(self.children)
-
-        if n_children == 0:
-            self.children.append(node)
-            return
 
-        for n_children in range(n_children):
-            if self.children[n_children].keys() > node.keys():
-                self.children.insert(n_children, node)
-                return
-
-        self.children.append(node)
+        :param node: the child node
+        :param position: the position of the child. If None, it is found by a binary search for its smallest key
+        """
+        if position is None:
+            position = bisect_left(self.children, node.elements[0].key, key=lambda child: child.elements[0].key)
+        self.children.insert(position, node)
 
     def remove_element(self, element_to_remove: ASAElement):
-        self.elements = [element for element in self.elements if element.key != element_to_remove.key]
+        del self.elements[self.find(element_to_remove.key)[0]]
 
     def remove_child(self, node: Self) -> None:
-        self.children = [child for child in self.children if child.keys() != node.keys()]
+        self.children = [child for child in self.children if child is not node]
 
-    def split_into_two(self):
+    def split_into_two(self, position: int):
         """
-        Splits the node into two. The node needs to have exactly 2 elements to be split
+        Splits the node into two around the element at the given position, which has to be moved to the parent node
+        first. The elements and children to the left of it go to the left node, the rest to the right node.
 
-        :return: created nodes
+        :param position: the position of the element moved to the parent
+        :return: the parent node
         """
-        if len(self.elements) != 2:
-            raise ValueError("Node needs to have 2 elements to be split")
+        parent = self.parent
+        child_position = parent.children.index(self)
 
-        left_node = ASANode(self.parent)
-        left_node.insert_element(self.elements[0])
+        left_node = ASANode(parent)
+        left_node.elements = self.elements[:position]
+        left_node.children = self.children[:position + 1]
 
-        right_node = ASANode(self.parent)
-        right_node.insert_element(self.elements[1])
+        right_node = ASANode(parent)
+        right_node.elements = self.elements[position:]
+        right_node.children = self.children[position + 1:]
 
-        self.parent.remove_child(self)
+        for node in (left_node, right_node):
+            for child in node.children:
+                child.parent = node
+            node.update_aggregates()
 
-        children_split_point = int((len(self.children) + 1) / 2)
-        left_children = self.children[0: children_split_point]
-        right_children = self.children[children_split_point:]
+        self.parent = None
+        self.elements = []
+        self.children = []
+        parent.children[child_position:child_position + 1] = [left_node, right_node]
 
-        for child in left_children:
-            left_node.insert_child(child)
-            child.parent = left_node
+        return parent
 
-        for child in right_children:
-            right_node.insert_child(child)
-            child.parent = right_node
+    def update_aggregates(self) -> None:
+        """
+        Recompute the aggregates of the subtree from the elements of the node and the aggregates of its children.
+        The aggregates of the children have to be up-to-date.
+        """
+        self.size = len(self.elements)
+        self.total = 0
+        self.key_sum = 0.0
+        for element in self.elements:
+            self.total += element.key_duplicates
+            self.key_sum += element.key_sum()
 
-        self.parent = None
-        self.children = []
+        for child in self.children:
+            self.size += child.size
+            self.total += child.total
+            self.key_sum += child.key_sum
 
-        left_node.parent.insert_child(left_node)
-        right_node.parent.insert_child(right_node)
+        if not self.elements:
+            self.key_min = None
+            self.key_max = None
+            return
 
-        return left_node.parent
+        self.key_min = self.children[0].key_min if self.children else self.elements[0].key
+        self.key_max = self.children[-1].key_max if self.children else self.elements[-1].key
 
     def id_keys(self):
         return ", ".join(map(str, self.keys()))
@@ -210,7 +254,7 @@ class ASANode:
             return f"Root [{node.id_keys()}]"
         return f"C{depth} [{node.id_keys()}]"
 
-    def plot_graph_node(self, graph: nx.Graph, depth):
+    def plot_graph_node(self, graph: 'nx.Graph', depth):
         """Plot the ASA graph node. Does not plot the children nodes."""
 
         if self.parent:
@@ -0,0 +1,55 @@
+from magn.asa.asa_element import ASAElement
+
+
+class BucketASAElement(ASAElement):
+    """
+    An element of a quantised ASA graph. It aggregates all values of a bucket (a key interval).
+    The key is the lower edge of the bucket, key_duplicates counts the values in the bucket and the value is their mean.
+
+    sum:                    sum of the values in the bucket.
+    min:                    the smallest value in the bucket.
+    max:                    the biggest value in the bucket.
+    """
+
+    def __init__(self, key: int | float, feature: str) -> None:
+        super().__init__(key, feature)
+        self.sum: float = 0.0
+        self.min: float = float('inf')
+        self.max: float = float('-inf')
+
+    @property
+    def count(self) -> int:
+        """The number of values in the bucket."""
+        return self.key_duplicates
+
+    def add(self, value: int | float) -> None:
+        """
+        Add a value to the aggregates of the bucket. The value must already be counted in key_duplicates, which is done
+        by the ASA graph.
+
+        :param value: the value
+        """
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.value = self.sum / self.key_duplicates
+
+    def merge(self, other: 'BucketASAElement') -> None:
+        """
+        Merge the values of another bucket with the same key into the bucket.
+
+        :param other: the merged bucket
+        """
+        self.key_duplicates += other.key_duplicates
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.value = self.sum / self.key_duplicates
+
+    def key_sum(self) -> float:
+        """
+        Sum of the values in the bucket.
+
+        :return: the sum of the values
+        """
+        return self.sum
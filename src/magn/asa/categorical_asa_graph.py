@@ -0,0 +1,164 @@
+from typing import ClassVar, Iterable, Iterator, List
+
+from magn.asa.asa_element import ASAElement
+from magn.asa.asa_graph import ASAGraph
+from magn.asa.code_table import CodeTable
+from magn.database.column_type import ColumnType
+
+
+class CategoricalASAGraph(ASAGraph):
+    """
+    An ASA graph of a categorical column. Categorical values have no order and no distance, so the graph keeps neither
+    a tree nor weights of the bidirectional linked list. Values are dictionary encoded and elements are stored by their
+    code, so a search is a single hash probe.
+
+    Attributes:
+    code_table: the dictionary encoding of the values of the column
+    elements:   the elements, indexed by the code of their value. Codes without an element are None.
+    """
+
+    column_type: ClassVar[ColumnType] = ColumnType.CATEGORICAL
+
+    def __init__(self, name: str, code_table: CodeTable | None = None):
+        super().__init__(name)
+        self.code_table: CodeTable = CodeTable() if code_table is None else code_table
+        self.elements: List[ASAElement | None] = []
+
+    def search(self, key: int | float | str) -> ASAElement | None:
+        """
+        Search for the element of the given value
+
+        :param key: the (not encoded) value of the element to search for
+        :return: the element with the given value if it exists, None otherwise
+        """
+        code = self.code_table.lookup(key)
+        if code is None or code >= len(self.elements):
+            return None
+
+        return self.elements[code]
+
+    def insert(self, key: int | float | str, feature_name: str):
+        """
+        Insert an element with the given value into the ASA graph
+
+        :param feature_name: the name of the feature that the element represents
+        :param key: the (not encoded) value of the element to insert
+        """
+        code = self.code_table.encode(key)
+        if code >= len(self.elements):
+            self.elements.extend([None] * (code + 1 - len(self.elements)))
+
+        element = self.elements[code]
+        if element is not None:
+            element.key_duplicates += 1
+            return
+
+        self.elements[code] = ASAElement(code, feature_name, self.code_table.decode(code))
+
+    def bulk_insert(self, keys: Iterable[int | float | str], feature_name: str) -> None:
+        """
+        Insert all values of a column. The distinct values are counted as an array and only they are encoded, in
+        sorted order, so the codes of a new code table follow the order of the values (see CodeTable.from_values)
+
+        :param keys: the values to insert, e.g. a column as a numpy array or a pandas Series. Duplicates are counted
+        :param feature_name: the name of the feature that the elements represent
+        """
+        for value, duplicates in zip(*self._distinct_counts(keys)):
+            code = self.code_table.encode(value)
+            if code >= len(self.elements):
+                self.elements.extend([None] * (code + 1 - len(self.elements)))
+
+            element = self.elements[code]
+            if element is None:
+                element = self.elements[code] = ASAElement(code, feature_name, self.code_table.decode(code))
+                element.key_duplicates = duplicates
+            else:
+                element.key_duplicates += duplicates
+
+    def sort_codes(self) -> None:
+        """
+        Re-encode the values so the order of the codes follows the order of the values again, e.g. after the values of
+        a column were inserted in chunks. The elements keep their values and get new codes, so it has to be done before
+        anything refers to the codes.
+        """
+        elements = {element.value: element for element in self.iter_elements()}
+        self.code_table = CodeTable.from_values(elements)
+        self.elements = [None] * len(self.code_table)
+        for value, element in elements.items():
+            element.key = self.code_table.lookup(value)
+            self.elements[element.key] = element
+
+    def count(self) -> int:
+        """
+        Returns the number of stored values (duplicates included). There is no tree with subtree aggregates, so the
+        duplicates of all elements are summed in O(n)
+        """
+        return sum(element.key_duplicates for element in self.iter_elements())
+
+    def leftmost_element(self) -> ASAElement:
+        """
+        Get the element with the smallest code
+
+        :return: the element with the smallest code
+        """
+        return next((element for element in self.elements if element is not None), None)
+
+    def rightmost_element(self) -> ASAElement:
+        """
+        Get the element with the biggest code
+
+        :return: the element with the biggest code
+        """
+        return next((element for element in reversed(self.elements) if element is not None), None)
+
+    def range_elements(self, lo: int | float | str, hi: int | float | str) -> List[ASAElement]:
+        """
+        Returns the elements with values in the closed range [lo, hi]. There is no ordered structure, so all elements
+        are checked
+
+        :param lo: the lower bound of the range
+        :param hi: the upper bound of the range
+        :return: the elements in the range
+        """
+        return [element for element in self.get_elements() if lo <= element.value <= hi]
+
+    def print_bl(self):
+        """
+        Print the elements in the order of their codes
+        """
+        print("(value|duplicates) (value|duplicates) ...")
+        print(" ".join(f"({element.value}|{element.key_duplicates})" for element in self.get_elements()))
+
+    def bl(self):
+        """
+        Returns the values of the elements in the order of their codes
+        """
+        return [element.value for element in self.get_elements()]
+
+    def plot_graph(self):
+        """
+        Plot the ASA graph. There is no tree, so every element is plotted as a separate node
+        """
+        import networkx as nx  # pylint: disable=import-outside-toplevel
+
+        graph = nx.DiGraph()
+        for element in self.get_elements():
+            graph.add_node(f"{element.value}")
+        nx.draw(graph, with_labels=True)
+
+    def bl_fix_weights(self):
+        """
+        Categorical values have no distance, so there are no weights to fix.
+        """
+
+    def get_elements(self):
+        """
+        Get all elements in the ASA graph in the order of their codes
+        """
+        return [element for element in self.elements if element is not None]
+
+    def iter_elements(self) -> Iterator[ASAElement]:
+        """
+        Iterate over the elements of the ASA graph in the order of their codes
+        """
+        return (element for element in self.elements if element is not None)
@@ -0,0 +1,81 @@
+from dataclasses import dataclass, field
+from sys import intern
+from typing import final, Dict, Hashable, Iterable, List, Self
+
+
+@final
+@dataclass(slots=True)
+class CodeTable:
+    """
+    Dictionary encoding of a categorical column. Every distinct value gets an integer code, so ASA graphs of
+    categorical columns compare integers instead of (possibly long) strings. Strings are interned, hence every
+    distinct value is stored only once, no matter how many rows and elements refer to it.
+
+    codes:      (value) => (code)
+    values:     the values, indexed by their code.
+    """
+    codes: Dict[Hashable, int] = field(default_factory=dict)
+    values: List[Hashable] = field(default_factory=list)
+
+    @classmethod
+    def from_values(cls, values: Iterable[Hashable]) -> Self:
+        """
+        Create a code table of the distinct values. The codes are assigned in the sorted order of the values, so the
+        order of the codes follows the order of the values. Values that cannot be compared with each other keep the
+        order in which they are first seen.
+
+        :param values: the values of the column, may contain duplicates
+        :return: the code table
+        """
+        distinct_values = list(dict.fromkeys(values))
+        try:
+            distinct_values = sorted(distinct_values)
+        except TypeError:
+            pass
+
+        code_table = cls()
+        for value in distinct_values:
+            code_table.encode(value)
+
+        return code_table
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: Hashable) -> int:
+        """
+        Get the code of the value. Values without a code get the next free code, so codes of values added after
+        from_values do not follow the order of the values.
+
+        :param value: the value to encode
+        :return: the code of the value
+        """
+        code = self.codes.get(value)
+        if code is not None:
+            return code
+
+        if isinstance(value, str):
+            value = intern(value)
+
+        code = len(self.values)
+        self.codes[value] = code
+        self.values.append(value)
+        return code
+
+    def lookup(self, value: Hashable) -> int | None:
+        """
+        Get the code of the value without assigning a new one.
+
+        :param value: the value to look up
+        :return: the code of the value or None if the value has no code
+        """
+        return self.codes.get(value)
+
+    def decode(self, code: int) -> Hashable:
+        """
+        Get the value of the code.
+
+        :param code: the code
+        :return: the value with the given code
+        """
+        return self.values[code]
@@ -0,0 +1,509 @@
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from math import ceil
+from pathlib import Path
+from sqlite3 import Connection, connect
+from threading import RLock
+from typing import final, Final, Iterable, Iterator, List, Mapping, Tuple
+from weakref import WeakValueDictionary, finalize
+
+from magn.asa.asa_element import ASAElement
+from magn.asa.asa_graph import ASAGraph
+from magn.database.column_type import ColumnType
+from magn.magn_object_node import MAGNObjectNode
+
+DEFAULT_CACHE_SIZE: Final[int] = 4096
+
+
+@final
+@dataclass(slots=True)
+class _ElementRecord:
+    """
+    The persisted state of an element. It is kept apart from the element, so it can still be written back to the
+    disk when the element itself is garbage collected.
+    """
+    key: int | float | str
+    duplicates: int = 1
+    index: int = -1
+    objects: List[MAGNObjectNode] = field(default_factory=list)
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class DiskElementReference:
+    """
+    A reference of a MAGN object to an element of a DiskASAGraph. It holds only the key, so the element is loaded
+    (or taken from the cache) whenever the object's values are accessed and can be dropped from memory in between.
+
+    graph:  the graph of the element.
+    key:    the key of the element.
+    """
+    graph: 'DiskASAGraph'
+    key: int | float | str
+
+    def resolve(self) -> 'DiskASAElement':
+        """Returns the element, loading it if needed."""
+        return self.graph.search(self.key)
+
+
+class DiskASAElement(ASAElement):
+    """
+    An element of a DiskASAGraph. Its duplicates, index and MAGN objects live in a record that is written back to the
+    disk when the element is no longer used. The bidirectional linked list is not stored at all, the neighbours and
+    the weights of the connections are looked up in the graph on access.
+
+    graph:  the graph the element belongs to.
+    """
+
+    def __init__(self, graph: 'DiskASAGraph', record: _ElementRecord, feature: str) -> None:
+        self.graph = graph
+        self._record = record
+        duplicates, index, objects = record.duplicates, record.index, record.objects
+        super().__init__(record.key, feature)
+        self.key_duplicates, self.index, self.magn_objects = duplicates, index, objects
+
+    def reference(self) -> DiskElementReference:
+        return DiskElementReference(self.graph, self.key)
+
+    @property
+    def key_duplicates(self) -> int:
+        return self._record.duplicates
+
+    @key_duplicates.setter
+    def key_duplicates(self, duplicates: int) -> None:
+        self._record.duplicates = duplicates
+
+    @property
+    def index(self) -> int:
+        return self._record.index
+
+    @index.setter
+    def index(self, index: int) -> None:
+        self._record.index = index
+
+    @property
+    def magn_objects(self) -> List[MAGNObjectNode]:
+        return self._record.objects
+
+    @magn_objects.setter
+    def magn_objects(self, objects: List[MAGNObjectNode]) -> None:
+        self._record.objects = objects
+
+    @property
+    def bl_prev(self) -> 'DiskASAElement | None':
+        return self.graph.neighbour(self.key, following=False)
+
+    @bl_prev.setter
+    def bl_prev(self, _: ASAElement | None) -> None:
+        """The order of the keys determines the neighbours, so they cannot be set."""
+
+    @property
+    def bl_next(self) -> 'DiskASAElement | None':
+        return self.graph.neighbour(self.key, following=True)
+
+    @bl_next.setter
+    def bl_next(self, _: ASAElement | None) -> None:
+        """The order of the keys determines the neighbours, so they cannot be set."""
+
+    @property
+    def bl_prev_weight(self) -> float:
+        return self.graph.neighbour_weight(self.key, following=False)
+
+    @bl_prev_weight.setter
+    def bl_prev_weight(self, _: float) -> None:
+        """The weights are computed from the keys, so they cannot be set."""
+
+    @property
+    def bl_next_weight(self) -> float:
+        return self.graph.neighbour_weight(self.key, following=True)
+
+    @bl_next_weight.setter
+    def bl_next_weight(self, _: float) -> None:
+        """The weights are computed from the keys, so they cannot be set."""
+
+
+class DiskASAGraph(ASAGraph):
+    """
+    An ASA graph stored in an SQLite file, for columns too large to be kept in memory. The elements are rows of a table
+    clustered by the key, so SQLite's B-tree takes the place of the in-memory tree. Elements are loaded on access and
+    the most recently used ones are kept in an LRU cache. An element that is dropped from the cache and no longer
+    referenced anywhere else is written back to the file.
+
+    The bidirectional linked list is given by the order of the keys, so only the keys are stored. The MAGN objects of
+    the elements are stored as their indexes and resolved with the objects mapping when an element is loaded. The
+    objects refer to the elements by their keys (see DiskElementReference), so an element stays in memory only while
+    it is cached or in use.
+    Priorities are not stored, elements only keep their index into the priorities of the MAGN graph.
+
+    A graph can be used from several threads, e.g. by predictions running while the graph is trained. The connection
+    and the caches are shared, so every access to them holds the lock of the graph.
+    Like their in-memory counterparts, graphs of identifier and categorical columns have no bidirectional linked list.
+
+    Attributes:
+    file:           the SQLite file of the graph.
+    objects:        (object index) => (MAGN object), used to resolve the stored MAGN objects of the elements.
+    cache_size:     the maximal number of elements kept in the LRU cache.
+    column_type:    the type of the column stored in the graph.
+    """
+
+    def __init__(self, name: str, file: Path, objects: Mapping[int, MAGNObjectNode],
+                 cache_size: int = DEFAULT_CACHE_SIZE, column_type: ColumnType | None = None):
+        super().__init__(name)
+        if cache_size < 1:
+            raise ValueError(f"Cache size must be positive, got {cache_size}.")
+
+        self.column_type = column_type
+        self.file = file
+        self.objects = objects
+        self.cache_size = cache_size
+
+        self._lock = RLock()
+        self._connection: Connection | None = connect(file, check_same_thread=False)
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS
+                elements (key PRIMARY KEY, duplicates INTEGER, node_index INTEGER, objects BLOB)
+            WITHOUT ROWID;
+        """)
+
+        # (key) => (element). Every element in use has a single instance.
+        self._live: WeakValueDictionary = WeakValueDictionary()
+        self._cache: OrderedDict = OrderedDict()
+
+        self._min_key, self._max_key = self._fetchone("SELECT MIN(key), MAX(key) FROM elements;")
+
+    def __getstate__(self) -> dict:
+        """The elements are in the file, so only the attributes of the graph are pickled. The file is flushed first."""
+        self.flush()
+        state = self.__dict__.copy()
+        for name in ('_lock', '_connection', '_live', '_cache'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = RLock()
+        self._connection = connect(self.file, check_same_thread=False)
+        self._live = WeakValueDictionary()
+        self._cache = OrderedDict()
+
+    def search(self, key: int | float | str) -> ASAElement | None:
+        """
+        Search for the element with the given key, loading it from the disk if needed
+
+        :param key: the key of the element to search for
+        :return: the element with the given key if it exists, None otherwise
+        """
+        key = self._normalize(key)
+        with self._lock:
+            element = self._live.get(key)
+            if element is None:
+                row = self._fetchone("SELECT key, duplicates, node_index, objects FROM elements WHERE key = ?;", key)
+                if row is None:
+                    return None
+                element = self._load(row)
+
+            self._touch(element)
+            return element
+
+    def insert(self, key: int | float | str, feature_name: str) -> ASAElement:
+        """
+        Insert an element with the given key into the ASA graph
+
+        :param feature_name:  the name of the feature that the element represents
+        :param key: the key of the element to insert
+        :return: the inserted element, or the already existing element with the given key
+        """
+        with self._lock:
+            element = self.search(key)
+            if element is not None:
+                element.key_duplicates += 1
+                return element
+
+            key = self._normalize(key)
+            self._execute("INSERT INTO elements VALUES (?, 1, -1, ?);", key, b"")
+            if self._min_key is None or key < self._min_key:
+                self._min_key = key
+            if self._max_key is None or key > self._max_key:
+                self._max_key = key
+
+            element = self._load((key, 1, -1, b""))
+            self._touch(element)
+            return element
+
+    def bulk_insert(self, keys: Iterable[int | float | str], feature_name: str) -> None:
+        """
+        Insert all keys of a column. The distinct keys are counted as an array and written in a single statement,
+        without loading any element. Keys already in the file have their duplicates increased, in the file or, if the
+        element is loaded, in its record
+
+        :param keys: the keys to insert, e.g. a column as a numpy array or a pandas Series. Duplicates are counted
+        :param feature_name: the name of the feature that the elements represent
+        """
+        distinct_keys, counts = self._distinct_counts(keys)
+        if not distinct_keys:
+            return
+
+        with self._lock:
+            rows = []
+            for key, duplicates in zip(distinct_keys, counts):
+                element = self._live.get(key)
+                if element is None:
+                    rows.append((key, duplicates, b""))
+                else:
+                    element.key_duplicates += duplicates
+
+            self._connection.executemany("""
+                INSERT INTO elements VALUES (?, ?, -1, ?)
+                ON CONFLICT (key) DO UPDATE SET duplicates = duplicates + excluded.duplicates;
+            """, rows)
+            self._min_key, self._max_key = self._fetchone("SELECT MIN(key), MAX(key) FROM elements;")
+
+    def reference(self, key: int | float | str) -> DiskElementReference:
+        """
+        Returns a reference to the element with the given key, without loading it
+
+        :param key: the key of the element
+        :return: the reference
+        """
+        return DiskElementReference(self, self._normalize(key))
+
+    def loaded_count(self) -> int:
+        """
+        Returns the number of elements currently held in memory: the cached ones and those still referenced elsewhere
+        """
+        with self._lock:
+            return len(self._live)
+
+    def neighbour(self, key: int | float | str, following: bool) -> ASAElement | None:
+        """
+        Returns the neighbour of the element with the given key in the bidirectional linked list
+
+        :param key: the key of the element
+        :param following: if True, the next element is returned, otherwise the previous one
+        :return: the neighbour, None if there is none or the graph has no bidirectional linked list
+        """
+        if not self._linked():
+            return None
+
+        if following:
+            row = self._fetchone("SELECT key FROM elements WHERE key > ? ORDER BY key LIMIT 1;", key)
+        else:
+            row = self._fetchone("SELECT key FROM elements WHERE key < ? ORDER BY key DESC LIMIT 1;", key)
+
+        return None if row is None else self.search(row[0])
+
+    def neighbour_weight(self, key: int | float | str, following: bool) -> float:
+        """
+        Returns the weight of the connection with the neighbour of the element with the given key in the bidirectional
+        linked list. It is computed like in bl_fix_weights, without storing it
+
+        :param key: the key of the element
+        :param following: if True, the weight of the connection with the next element is returned
+        :return: the weight, 0.0 if there is no neighbour or the keys are not numeric
+        """
+        if isinstance(key, str) or not self._linked():
+            return 0.0
+
+        neighbour = self.neighbour(key, following)
+        if neighbour is None:
+            return 0.0
+
+        return 1.0 - abs(neighbour.key - key) / (self._max_key - self._min_key)
+
+    def count(self) -> int:
+        """
+        Returns the number of stored values (duplicates included)
+        """
+        with self._lock:
+            self.flush()
+            return self._fetchone("SELECT COALESCE(SUM(duplicates), 0) FROM elements;")[0]
+
+    def quantile(self, q: float) -> ASAElement | None:
+        """
+        Returns the element holding the q-quantile of the stored values (duplicates included)
+
+        :param q: the quantile, between 0 and 1
+        :return: the element of the quantile, None if the graph is empty
+        :raise TypeError: if the values of the graph are not ordered
+        """
+        self._check_ordered()
+        if not 0.0 <= q <= 1.0:
+            raise ValueError(f"Quantile must be between 0 and 1, got {q}")
+
+        total = self.count()
+        if total == 0:
+            return None
+
+        row = self._fetchone("""
+            SELECT key FROM (SELECT key, SUM(duplicates) OVER (ORDER BY key) AS position FROM elements)
+            WHERE position >= ? ORDER BY key LIMIT 1;
+        """, max(1, ceil(q * total)))
+        return self.search(row[0])
+
+    def lower_bound(self, key: int | float | str) -> ASAElement | None:
+        """
+        Returns the element with the smallest key not smaller than the given key
+
+        :param key: the key
+        :return: the element, None if all keys are smaller than the given key
+        """
+        row = self._fetchone("SELECT key FROM elements WHERE key >= ? ORDER BY key LIMIT 1;", key)
+        return None if row is None else self.search(row[0])
+
+    def range_elements(self, lo: int | float | str, hi: int | float | str) -> List[ASAElement]:
+        """
+        Returns the elements with keys in the closed range [lo, hi]
+
+        :param lo: the lower bound of the range
+        :param hi: the upper bound of the range
+        :return: the elements in ascending order of their keys
+        """
+        rows = self._fetchall("SELECT key FROM elements WHERE key BETWEEN ? AND ? ORDER BY key;", lo, hi)
+        return [self.search(row[0]) for row in rows]
+
+    def _prefix(self, key: int | float, inclusive: bool) -> Tuple[int, float]:
+        """
+        Returns the number and the sum of the stored values smaller than (or equal to, if inclusive) the key.
+        """
+        with self._lock:
+            self.flush()
+            return self._fetchone(f"""
+                SELECT COALESCE(SUM(duplicates), 0), COALESCE(SUM(key * duplicates), 0.0)
+                FROM elements WHERE key {'<=' if inclusive else '<'} ?;
+            """, key)
+
+    def leftmost_element(self) -> ASAElement | None:
+        """
+        Get the element with the smallest key
+
+        :return: the element with the smallest key, None if the graph is empty
+        """
+        return None if self._min_key is None else self.search(self._min_key)
+
+    def rightmost_element(self) -> ASAElement | None:
+        """
+        Get the element with the biggest key
+
+        :return: the element with the biggest key, None if the graph is empty
+        """
+        return None if self._max_key is None else self.search(self._max_key)
+
+    def bl(self):
+        """
+        Returns the keys in ascending order
+        """
+        return [row[0] for row in self._fetchall("SELECT key FROM elements ORDER BY key;")]
+
+    def plot_graph(self):
+        """
+        Plot the ASA graph. The tree is kept by SQLite, so every element is plotted as a separate node
+        """
+        import networkx as nx  # pylint: disable=import-outside-toplevel
+
+        graph = nx.DiGraph()
+        for key in self.bl():
+            graph.add_node(f"{key}")
+        nx.draw(graph, with_labels=True)
+
+    def bl_fix_weights(self):
+        """
+        The weights are computed from the keys on access, so there are no weights to fix.
+        """
+
+    def get_elements(self):
+        """
+        Get all elements in the ASA graph in ascending order of their keys. All of them are loaded into memory
+        """
+        return [self.search(key) for key in self.bl()]
+
+    def iter_elements(self, page_size: int = 1024) -> Iterator[ASAElement]:
+        """
+        Iterate over the elements of the ASA graph in ascending order of their keys. The keys are read in pages, so only
+        the cached elements and one page of keys are held in memory
+
+        :param page_size: the number of keys read at once
+        """
+        rows = self._fetchall("SELECT key FROM elements ORDER BY key LIMIT ?;", page_size)
+        while rows:
+            for (key,) in rows:
+                yield self.search(key)
+            rows = self._fetchall("SELECT key FROM elements WHERE key > ? ORDER BY key LIMIT ?;",
+                                  rows[-1][0], page_size)
+
+    def flush(self) -> None:
+        """
+        Write all elements in use back to the file and commit.
+        """
+        with self._lock:
+            if self._connection is None:
+                return
+
+            for element in list(self._live.values()):
+                self._write_back(element._record)  # pylint: disable=protected-access
+            self._connection.commit()
+
+    def close(self) -> None:
+        """
+        Write all elements back to the file and close it. The graph cannot be used afterwards.
+        """
+        with self._lock:
+            self.flush()
+            self._cache.clear()
+            self._connection.close()
+            self._connection = None
+
+    def _load(self, row: tuple) -> DiskASAElement:
+        """Create the element of a row. It is written back to the file when it is garbage collected."""
+        key, duplicates, index, objects = row
+        record = _ElementRecord(key, duplicates, index, [self.objects[i] for i in array('q', objects)])
+        element = DiskASAElement(self, record, self.name)
+        self._live[key] = element
+
+        write_back = finalize(element, self._write_back, record)
+        write_back.atexit = False
+        return element
+
+    def _touch(self, element: DiskASAElement) -> None:
+        """Mark the element as most recently used, evicting the least recently used element if the cache is full."""
+        self._cache[element.key] = element
+        self._cache.move_to_end(element.key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _write_back(self, record: _ElementRecord) -> None:
+        objects = array('q', (object_node.index for object_node in record.objects)).tobytes()
+        with self._lock:
+            if self._connection is None:
+                return
+
+            self._execute("UPDATE elements SET duplicates = ?, node_index = ?, objects = ? WHERE key = ?;",
+                          record.duplicates, record.index, objects, record.key)
+
+    def _linked(self) -> bool:
+        """True if the elements form a bidirectional linked list, i.e. the column is not an identifier or categorical
+        one."""
+        return self.column_type is None or self.column_type is ColumnType.NUMERIC
+
+    def _execute(self, query: str, *parameters) -> None:
+        with self._lock:
+            if self._connection is None:
+                raise ValueError(f"ASA graph {self.name} is closed.")
+            self._connection.execute(query, parameters)
+
+    def _fetchone(self, query: str, *parameters) -> tuple | None:
+        with self._lock:
+            if self._connection is None:
+                raise ValueError(f"ASA graph {self.name} is closed.")
+            return self._connection.execute(query, parameters).fetchone()
+
+    def _fetchall(self, query: str, *parameters) -> List[tuple]:
+        with self._lock:
+            if self._connection is None:
+                raise ValueError(f"ASA graph {self.name} is closed.")
+            return self._connection.execute(query, parameters).fetchall()
+
+    @staticmethod
+    def _normalize(key: int | float | str) -> int | float | str:
+        """Convert numpy scalars to Python values, which SQLite can store."""
+        return key.item() if hasattr(key, 'item') else key
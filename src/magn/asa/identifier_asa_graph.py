@@ -0,0 +1,135 @@
+from typing import ClassVar, Dict, Iterable, Iterator, List
+
+from magn.asa.asa_element import ASAElement
+from magn.asa.asa_graph import ASAGraph
+from magn.database.column_type import ColumnType
+
+
+class IdentifierASAGraph(ASAGraph):
+    """
+    An ASA graph of an identifier column (e.g. a primary key). Identifiers are only looked up to connect MAGN objects,
+    so the graph keeps neither a tree nor a bidirectional linked list, only a hash map of the elements.
+
+    Attributes:
+    elements:   (identifier) => (element)
+    """
+
+    column_type: ClassVar[ColumnType] = ColumnType.IDENTIFIER
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.elements: Dict[int | float | str, ASAElement] = {}
+
+    def search(self, key: int | float | str) -> ASAElement | None:
+        """
+        Search for the element with the given identifier
+
+        :param key: the identifier to search for
+        :return: the element with the given identifier if it exists, None otherwise
+        """
+        return self.elements.get(key)
+
+    def insert(self, key: int | float | str, feature_name: str):
+        """
+        Insert an element with the given identifier into the ASA graph
+
+        :param feature_name: the name of the feature that the element represents
+        :param key: the identifier of the element to insert
+        """
+        element = self.elements.get(key)
+        if element is not None:
+            element.key_duplicates += 1
+            return
+
+        self.elements[key] = ASAElement(key, feature_name)
+
+    def bulk_insert(self, keys: Iterable[int | float | str], feature_name: str) -> None:
+        """
+        Insert all values of a column. The distinct identifiers are counted as an array, so only they become Python
+        objects. They are inserted in the order of their first occurrence, like by insert
+
+        :param keys: the values to insert, e.g. a column as a numpy array or a pandas Series. Duplicates are counted
+        :param feature_name: the name of the feature that the elements represent
+        """
+        for key, duplicates in zip(*self._distinct_counts(keys, ordered=False)):
+            element = self.elements.get(key)
+            if element is None:
+                element = self.elements[key] = ASAElement(key, feature_name)
+                element.key_duplicates = duplicates
+            else:
+                element.key_duplicates += duplicates
+
+    def count(self) -> int:
+        """
+        Returns the number of stored values (duplicates included). There is no tree with subtree aggregates, so the
+        duplicates of all elements are summed in O(n)
+        """
+        return sum(element.key_duplicates for element in self.iter_elements())
+
+    def leftmost_element(self) -> ASAElement:
+        """
+        Get the element with the smallest identifier
+
+        :return: the element with the smallest identifier
+        """
+        return self.elements[min(self.elements)] if self.elements else None
+
+    def rightmost_element(self) -> ASAElement:
+        """
+        Get the element with the biggest identifier
+
+        :return: the element with the biggest identifier
+        """
+        return self.elements[max(self.elements)] if self.elements else None
+
+    def range_elements(self, lo: int | float | str, hi: int | float | str) -> List[ASAElement]:
+        """
+        Returns the elements with identifiers in the closed range [lo, hi]. There is no ordered structure, so all
+        elements are checked
+
+        :param lo: the lower bound of the range
+        :param hi: the upper bound of the range
+        :return: the elements in the range
+        """
+        return [element for element in self.get_elements() if lo <= element.value <= hi]
+
+    def print_bl(self):
+        """
+        Print the elements in the order they were inserted
+        """
+        print("(value|duplicates) (value|duplicates) ...")
+        print(" ".join(f"({element.value}|{element.key_duplicates})" for element in self.get_elements()))
+
+    def bl(self):
+        """
+        Returns the identifiers in the order they were inserted
+        """
+        return list(self.elements)
+
+    def plot_graph(self):
+        """
+        Plot the ASA graph. There is no tree, so every element is plotted as a separate node
+        """
+        import networkx as nx  # pylint: disable=import-outside-toplevel
+
+        graph = nx.DiGraph()
+        for element in self.get_elements():
+            graph.add_node(f"{element.value}")
+        nx.draw(graph, with_labels=True)
+
+    def bl_fix_weights(self):
+        """
+        Identifiers have no distance, so there are no weights to fix.
+        """
+
+    def get_elements(self):
+        """
+        Get all elements in the ASA graph in the order they were inserted
+        """
+        return list(self.elements.values())
+
+    def iter_elements(self) -> Iterator[ASAElement]:
+        """
+        Iterate over the elements of the ASA graph in the order they were inserted
+        """
+        return iter(self.elements.values())
@@ -0,0 +1,25 @@
+from typing import ClassVar
+
+from magn.asa.asa_graph import ASAGraph
+from magn.database.column_type import ColumnType
+
+
+class NumericASAGraph(ASAGraph):
+    """
+    An ASA graph of a numeric column. Elements are ordered and the bidirectional linked list is weighted by the
+    distance between neighbouring keys.
+    """
+
+    column_type: ClassVar[ColumnType] = ColumnType.NUMERIC
+
+    def bl_fix_weights(self):
+        """
+        Fix the weights of the bidirectional linked list. The keys are numeric, so there is no need to check their type.
+        """
+        value_range = self.rightmost_element().key - self.leftmost_element().key
+
+        current_element = self.leftmost_element()
+        while current_element.bl_next:
+            current_element.bl_next_weight = 1.0 - (current_element.bl_next.key - current_element.key) / value_range
+            current_element = current_element.bl_next
+            current_element.bl_prev_weight = current_element.bl_prev.bl_next_weight
@@ -0,0 +1,111 @@
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from enum import Enum
+from math import floor
+from numbers import Integral
+from typing import final, Iterable, List, Self
+
+
+class QuantizationMode(Enum):
+    """How the values of a numeric column are merged into buckets."""
+
+    # Buckets of the same width, starting at the smallest value.
+    FIXED_WIDTH = 'fixed_width'
+
+    # Buckets holding (roughly) the same number of values.
+    QUANTILE = 'quantile'
+
+    # Neighbouring values are merged while they are within the tolerance of the first value of the bucket.
+    TOLERANCE = 'tolerance'
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class Quantization:
+    """
+    Configuration of the quantisation of a numeric column. Use the fixed_width, quantile and tolerance constructors.
+
+    mode:       how the values are merged into buckets.
+    parameter:  the width of a bucket, the number of buckets or the tolerance, depending on the mode.
+    """
+    mode: QuantizationMode
+    parameter: float
+
+    def __post_init__(self) -> None:
+        if self.mode is QuantizationMode.QUANTILE:
+            if not isinstance(self.parameter, Integral) or isinstance(self.parameter, bool) or self.parameter < 1:
+                raise ValueError(f"Number of quantile buckets must be an integer of at least 1, "
+                                 f"got {self.parameter!r}.")
+        elif self.parameter <= 0:
+            raise ValueError(f"Quantization parameter must be positive, got {self.parameter}.")
+
+    @classmethod
+    def fixed_width(cls, width: float) -> Self:
+        """Buckets of the given width."""
+        return cls(QuantizationMode.FIXED_WIDTH, width)
+
+    @classmethod
+    def quantile(cls, bins: int) -> Self:
+        """At most the given number of buckets, each holding roughly the same number of values."""
+        return cls(QuantizationMode.QUANTILE, bins)
+
+    @classmethod
+    def tolerance(cls, tolerance: float) -> Self:
+        """Buckets of values that are within the tolerance of the smallest value in the bucket."""
+        return cls(QuantizationMode.TOLERANCE, tolerance)
+
+    def quantizer(self, values: Iterable[float]) -> 'Quantizer':
+        """
+        Create a quantizer of the values of a column.
+
+        :param values: the values of the column, may contain duplicates
+        :return: the quantizer
+        """
+        sorted_values = sorted(values)
+        if not sorted_values:
+            return Quantizer(self, [])
+
+        if self.mode is QuantizationMode.FIXED_WIDTH:
+            return Quantizer(self, [sorted_values[0]])
+
+        if self.mode is QuantizationMode.QUANTILE:
+            bins = int(self.parameter)
+            edges = [sorted_values[(i * len(sorted_values)) // bins] for i in range(bins)]
+            return Quantizer(self, sorted(set(edges)))
+
+        edges = [sorted_values[0]]
+        for value in sorted_values:
+            if value - edges[-1] > self.parameter:
+                edges.append(value)
+        return Quantizer(self, edges)
+
+
+@final
+@dataclass(slots=True)
+class Quantizer:
+    """
+    Maps values of a column to the keys of their buckets. The key of a bucket is its lower edge.
+
+    quantization:   the configuration of the quantisation.
+    edges:          the sorted lower edges of the buckets. For fixed width buckets it only holds the origin.
+    """
+    quantization: Quantization
+    edges: List[float] = field(default_factory=list)
+
+    def bucket_key(self, value: float) -> float:
+        """
+        Get the key of the bucket of the value. Values below the first bucket belong to the first bucket, except for
+        fixed width buckets, which extend in both directions.
+
+        :param value: the value
+        :return: the key of the bucket
+        """
+        if not self.edges:
+            return value
+
+        if self.quantization.mode is QuantizationMode.FIXED_WIDTH:
+            origin = self.edges[0]
+            width = self.quantization.parameter
+            return origin + floor((value - origin) / width) * width
+
+        return self.edges[max(bisect_right(self.edges, value) - 1, 0)]
@@ -0,0 +1,80 @@
+from typing import Dict, Iterable, List
+
+from magn.asa.asa_element import ASAElement
+from magn.asa.asa_graph import DEFAULT_ORDER
+from magn.asa.bucket_asa_element import BucketASAElement
+from magn.asa.numeric_asa_graph import NumericASAGraph
+from magn.asa.quantization import Quantizer
+
+
+class QuantizedASAGraph(NumericASAGraph):
+    """
+    An ASA graph of a numeric column whose values are merged into buckets. Each element aggregates a key interval,
+    so the number of elements is bounded by the number of buckets instead of the number of distinct values.
+
+    Attributes:
+    quantizer:  maps values to the keys of their buckets
+    """
+
+    def __init__(self, name: str, quantizer: Quantizer, order: int = DEFAULT_ORDER):
+        super().__init__(name, order)
+        self.quantizer: Quantizer = quantizer
+
+    def search(self, key: int | float) -> ASAElement | None:
+        """
+        Search for the bucket of the value
+
+        :param key: the value to search for
+        :return: the element of the bucket of the value if it exists, None otherwise
+        """
+        return super().search(self.quantizer.bucket_key(key))
+
+    def insert(self, key: int | float, feature_name: str) -> ASAElement:
+        """
+        Insert the value into its bucket. The bucket is created if it does not exist yet
+
+        :param feature_name: the name of the feature that the element represents
+        :param key: the value to insert
+        :return: the element of the bucket of the value
+        """
+        return self._insert(self.quantizer.bucket_key(key), feature_name, key)
+
+    def _bulk_elements(self, keys: Iterable[int | float], feature_name: str) -> List[ASAElement]:
+        """
+        Create the elements of the buckets of the values, with the values added to their aggregates
+
+        :return: the elements in ascending order of their keys
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        buckets: Dict[int | float, ASAElement] = {}
+        for value in np.asarray(keys).tolist():
+            bucket_key = self.quantizer.bucket_key(value)
+            element = buckets.get(bucket_key)
+            if element is None:
+                element = buckets[bucket_key] = self.create_element(bucket_key, feature_name)
+            else:
+                element.key_duplicates += 1
+            element.add(value)
+
+        return [buckets[bucket_key] for bucket_key in sorted(buckets)]
+
+    def range_elements(self, lo: int | float, hi: int | float) -> List[ASAElement]:
+        """
+        Returns the buckets overlapping the closed range [lo, hi]
+
+        :param lo: the lower bound of the range
+        :param hi: the upper bound of the range
+        :return: the bucket elements in ascending order of their lower edges
+        """
+        return super().range_elements(self.quantizer.bucket_key(lo), hi)
+
+    def create_element(self, key: int | float, feature_name: str) -> ASAElement:
+        """
+        Create a bucket with the given lower edge. The values of the bucket are added by insert
+
+        :param key: the lower edge of the bucket
+        :param feature_name: the name of the feature that the element represents
+        :return: the new bucket element
+        """
+        return BucketASAElement(key, feature_name)
@@ -0,0 +1,128 @@
+"""Cross-validation and hyper-parameter sweeps over a single built MAGN graph."""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from itertools import product
+from multiprocessing import get_all_start_methods, get_context
+from os import devnull
+from typing import final, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from magn.database.database import Database
+from magn.magn import MAGNGraph
+
+# State of a worker process. It is set once by the pool initializer, so the graph and the data are transferred to
+# every worker only once (and not at all when the processes are forked).
+_worker_graph: Optional[MAGNGraph] = None
+_worker_data: Optional[pd.DataFrame] = None
+_worker_folds: Sequence[Tuple[int, int]] = ()
+
+
+@final
+@dataclass(slots=True)
+class CrossValidationResult:
+    """Accuracy of a single (fold, configuration) run."""
+    fold: int
+    num_epochs: int
+    learning_rate: float
+    train_accuracy: float
+    validation_accuracy: float
+
+
+@final
+@dataclass(slots=True)
+class CrossValidationRunner:
+    """
+    Evaluates every fold x (num_epochs, learning_rate) configuration on one MAGN graph. The graph is built once from
+    the database and only its priorities are reset between runs. Runs are distributed over worker processes.
+
+    database:           the database the MAGN graph is built from.
+    target_table:       the table the mock target is created for (see Database.create_mock_target).
+    folds:              the number of folds of the k-fold split.
+    num_epochs:         the values of num_epochs to evaluate.
+    learning_rates:     the values of learning_rate to evaluate.
+    workers:            the number of worker processes. None uses the number of CPUs, 1 runs everything in-process.
+    seed_id:            seed used for the mock target and for shuffling the rows before splitting them into folds.
+    choices_iterable:   the columns the mock target is drawn from. None means all columns of the target table.
+    """
+    database: Database
+    target_table: str
+    folds: int = 5
+    num_epochs: Sequence[int] = (10,)
+    learning_rates: Sequence[float] = (0.1,)
+    workers: Optional[int] = None
+    seed_id: int = 0
+    choices_iterable: Optional[Sequence] = None
+
+    def run(self) -> List[CrossValidationResult]:
+        """Build the MAGN graph and evaluate all folds x configurations."""
+        if self.folds < 2:
+            raise ValueError(f"At least 2 folds are required, got {self.folds}.")
+
+        data = self.database.create_mock_target(self.target_table, self.choices_iterable, self.seed_id)
+        data = data.sample(frac=1.0, random_state=self.seed_id)
+        if len(data) < self.folds:
+            raise ValueError(f"Cannot split {len(data)} rows into {self.folds} folds.")
+
+        fold_bounds = self._fold_bounds(len(data))
+        magn = MAGNGraph.from_database(self.database)
+
+        tasks = list(product(range(self.folds), self.num_epochs, self.learning_rates))
+
+        if self.workers == 1:
+            _init_worker(magn, data, fold_bounds)
+            return [_run_task(*task) for task in tasks]
+
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=self._mp_context(),
+                                 initializer=_init_worker,
+                                 initargs=(magn, data, fold_bounds)) as executor:
+            return list(executor.map(_run_task, *zip(*tasks)))
+
+    def _fold_bounds(self, n_rows: int) -> List[Tuple[int, int]]:
+        """Returns [start, stop) row positions of every fold. Fold sizes differ by at most one row."""
+        fold_size, remainder = divmod(n_rows, self.folds)
+        bounds = []
+        start = 0
+        for fold in range(self.folds):
+            stop = start + fold_size + (1 if fold < remainder else 0)
+            bounds.append((start, stop))
+            start = stop
+
+        return bounds
+
+    @staticmethod
+    def _mp_context():
+        """Prefer forking, so the workers share the already built graph instead of unpickling a copy of it."""
+        if 'fork' in get_all_start_methods():
+            return get_context('fork')
+        return get_context()
+
+
+def _init_worker(magn: MAGNGraph, data: pd.DataFrame, fold_bounds: Sequence[Tuple[int, int]]) -> None:
+    """Pool initializer. Stores the shared graph and data in the worker process."""
+    global _worker_graph, _worker_data, _worker_folds  # pylint: disable=global-statement
+    _worker_graph = magn
+    _worker_data = data
+    _worker_folds = fold_bounds
+
+
+def _run_task(fold: int, num_epochs: int, learning_rate: float) -> CrossValidationResult:
+    """Train the worker's graph from scratch on all folds but one and validate it on the remaining fold."""
+    start, stop = _worker_folds[fold]
+    validation_data = _worker_data.iloc[start:stop]
+    train_data = pd.concat([_worker_data.iloc[:start], _worker_data.iloc[stop:]])
+
+    _worker_graph.reset_priorities()
+    with open(devnull, 'w', encoding='utf-8') as sink, redirect_stdout(sink):
+        history = _worker_graph.fit(train_data, num_epochs, learning_rate, validation_data)
+
+    return CrossValidationResult(
+        fold=fold,
+        num_epochs=num_epochs,
+        learning_rate=learning_rate,
+        train_accuracy=history['train'][-1],
+        validation_accuracy=history['validate'][-1],
+    )
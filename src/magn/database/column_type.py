@@ -0,0 +1,44 @@
+"""Contains the ColumnType enum, which describes how the values of a column are treated by the MAGN."""
+
+from enum import Enum
+from numbers import Real
+from typing import Iterable, Optional
+
+
+class ColumnType(Enum):
+    """Type of column. It decides which kind of ASA graph is built for the column."""
+
+    # Ordered values with a distance between them, e.g. scores or years.
+    NUMERIC = 'numeric'
+
+    # Unordered labels, e.g. genres or authors.
+    CATEGORICAL = 'categorical'
+
+    # Values identifying rows, e.g. primary keys. They are neither ordered nor used as features.
+    IDENTIFIER = 'identifier'
+
+    @classmethod
+    def from_declared_type(cls, declared_type: str) -> Optional['ColumnType']:
+        """Map a declared SQLite column type to a column type, following the SQLite type affinity rules.
+        Returns None if the declared type does not tell anything about the values (no type or BLOB)."""
+        declared_type = declared_type.upper()
+
+        if 'INT' in declared_type:
+            return cls.NUMERIC
+
+        if any(text_type in declared_type for text_type in ('CHAR', 'CLOB', 'TEXT')):
+            return cls.CATEGORICAL
+
+        if not declared_type or 'BLOB' in declared_type:
+            return None
+
+        # REAL and NUMERIC affinity
+        return cls.NUMERIC
+
+    @classmethod
+    def infer(cls, values: Iterable) -> 'ColumnType':
+        """Infer the column type from the values. Used for columns without a declared type."""
+        if all(isinstance(value, Real) and not isinstance(value, bool) for value in values):
+            return cls.NUMERIC
+
+        return cls.CATEGORICAL
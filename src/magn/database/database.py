@@ -1,12 +1,15 @@
 """Holds the Database class, which is a container for the data and keys of the database tables."""
-from collections import defaultdict
+from collections import defaultdict, deque
+from copy import deepcopy
 from dataclasses import dataclass, astuple, field, InitVar
+from functools import partial
 from pathlib import Path
-from typing import final, Sequence, Self, Dict, List, Generator, Iterator, ClassVar, Optional
+from typing import final, Sequence, Self, Dict, List, Generator, Iterator, ClassVar, Optional, Callable, Set
 from random import seed, choice
 
 import pandas as pd
 
+from magn.database.files import FileDataReader
 from magn.database.sqlite3 import SQLite3DataReader, SQLite3KeysReader, get_table_names
 from magn.database.keys import Keys
 from magn.database.topological_sort import TopologicalSorter
@@ -15,13 +18,42 @@ from magn.database.topological_sort import TopologicalSorter
 @final
 @dataclass(slots=True)
 class Table:
-    """Represents a table in the database."""
-    data: pd.DataFrame
+    """Represents a table in the database. The data of a lazy table (one without data, but with a loader) is loaded
+    on first access and kept afterwards. A lazy table may also be streamed in chunks (see iter_chunks)."""
+    _data: pd.DataFrame | None
     keys: Keys
+    loader: Callable[[], pd.DataFrame] | None = field(default=None, repr=False, compare=False)
+    chunks: Callable[[], Iterator[pd.DataFrame]] | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """The data of the table, loaded on first access."""
+        if self._data is None:
+            if self.loader is None:
+                raise ValueError("Table has neither data nor a loader.")
+            self._data = self.loader()
+        return self._data
+
+    @property
+    def loaded(self) -> bool:
+        """True if the data of the table is in memory."""
+        return self._data is not None
+
+    @property
+    def streamed(self) -> bool:
+        """True if the data of the table is read in chunks by iter_chunks, without loading the whole table."""
+        return self._data is None and self.chunks is not None
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """Returns an iterator over the data of the table in chunks of rows. Every call reads the data again. A table
+        that is not streamed is a single chunk."""
+        if self.streamed:
+            return self.chunks()
+        return iter((self.data,))
 
     def __iter__(self) -> Iterator:
-        """Returns an iterator over the dataclass fields. Basically lets you unpack all the fields of the dataclass."""
-        return iter(astuple(self))
+        """Returns an iterator over a copy of the data and keys. Basically lets you unpack the table."""
+        return iter((deepcopy(self.data), astuple(self.keys)))
 
 
 @final
@@ -34,46 +66,142 @@ class Database:
 
     # InitVar is used to prevent the fields from being initialized in the __init__ method.
     # They are not part of the object.
-    tables: InitVar[Dict[str, pd.DataFrame]]
+    # A table given as a callable is lazy, the callable loads its data on first access.
+    tables: InitVar[Dict[str, pd.DataFrame | Callable[[], pd.DataFrame]]]
     keys: InitVar[Dict[str, Keys]]
 
     mock_column_name: ClassVar[str] = "target"
 
-    def __post_init__(self, tables: Dict[str, pd.DataFrame], keys: Dict[str, Keys]) -> None:
+    def __post_init__(self, tables: Dict[str, pd.DataFrame | Callable[[], pd.DataFrame]], keys: Dict[str, Keys]
+                      ) -> None:
         if len(tables) != len(keys):
             raise ValueError(f"Number of tables and keys do not match ({len(tables)} vs {len(keys)}).")
 
         if tables.keys() | keys.keys() != tables.keys() & keys.keys():
             raise ValueError("Keys in tables object do not match keys in keys object!")
 
-        self.all_data = {table_name: Table(tables[table_name], keys[table_name]) for table_name in tables | keys}
+        self.all_data = {}
+        for table_name in tables | keys:
+            data = tables[table_name]
+            if isinstance(data, pd.DataFrame):
+                self.all_data[table_name] = Table(data, keys[table_name])
+            else:
+                self.all_data[table_name] = Table(None, keys[table_name], data)
 
     def __getitem__(self, item: str) -> Table:
         """Lets you subscript the Database object to get a Table object."""
         return self.all_data[item]
 
     @classmethod
-    def from_sqlite3(cls, file: Path) -> Self:
+    def from_sqlite3(cls, file: Path, tables: Sequence[str] | None = None,
+                     columns: Dict[str, Sequence[str]] | None = None, target_table: str | None = None) -> Self:
         """Substitute for the lack in the ability to create many constructors in python.
-        Creates a Database object from an SQLite3 database file."""
-
+        Creates a lazy Database object from an SQLite3 database file. Only the keys are read here, the data of every
+        table is read on first access.
+
+        :param file: the SQLite3 database file
+        :param tables: the tables to load. None means all tables.
+        :param columns: (table name) => (columns to read). Only the given columns and the keys are selected, other
+        columns (e.g. large free-text ones) are never read. Tables without an entry are read whole.
+        :param target_table: if given, only tables connected with it through foreign keys (in either direction) are
+        loaded, walking only through the given tables
+        :return: the database. Foreign keys referring to tables that are not loaded are dropped.
+        """
         all_tables = get_table_names(file)
 
         keys_reader = SQLite3KeysReader(file, all_tables)
         keys = keys_reader.read()
 
-        data_reader = SQLite3DataReader(file, all_tables, keys)
-        data = data_reader.read()
+        selected_tables = cls._select_tables(keys, tables, target_table)
+        keys = {
+            table: Keys(
+                keys[table].primary_keys,
+                {foreign_table: f_key for foreign_table, f_key in keys[table].foreign_keys.items()
+                 if foreign_table in selected_tables},
+                keys[table].column_types,
+            )
+            for table in selected_tables
+        }
+
+        data_reader = SQLite3DataReader(file, selected_tables, keys)
+        loaders = {
+            table: partial(data_reader.read_table, table, None if columns is None else columns.get(table))
+            for table in selected_tables
+        }
+
+        return cls(loaders, keys)
+
+    @classmethod
+    def from_files(cls, files: Dict[str, Path], keys: Dict[str, Keys], columns: Dict[str, Sequence[str]] | None = None,
+                   chunk_size: int = 100_000) -> Self:
+        """Creates a lazy Database object from flat files, one file per table. The format of a file is given by its
+        suffix: .csv, .parquet (or .pq) and .arrow (or .feather, .ipc). Parquet and Arrow files need pyarrow.
+        Files have no schema of keys, so the keys are declared. The data of every table is read on first access, or
+        streamed in chunks when a MAGN graph is built from the database (see Table.iter_chunks).
+
+        :param files: (table name) => (file of the table)
+        :param keys: (table name) => (keys of the table)
+        :param columns: (table name) => (columns to read). Only the given columns and the keys are read. Tables without
+        an entry are read whole.
+        :param chunk_size: the number of rows of a streamed chunk
+        :return: the database
+        """
+        data_reader = FileDataReader(files, keys, chunk_size)
+        loaders = {
+            table: partial(data_reader.read_table, table, None if columns is None else columns.get(table))
+            for table in files
+        }
+
+        database = cls(loaders, keys)
+        for table in files:
+            database[table].chunks = partial(data_reader.iter_table, table,
+                                             None if columns is None else columns.get(table))
+        return database
 
-        return cls(data, keys)
+    @classmethod
+    def _select_tables(cls, keys: Dict[str, Keys], tables: Sequence[str] | None, target_table: str | None
+                       ) -> List[str]:
+        """Returns the tables to load, in the order of the keys."""
+        allowed = set(keys) if tables is None else set(tables)
+        unknown = allowed - keys.keys()
+        if unknown:
+            raise ValueError(f"Tables {sorted(unknown)} not found in the database.")
+
+        if target_table is None:
+            return [table for table in keys if table in allowed]
+
+        if target_table not in keys:
+            raise ValueError(f"Target table {target_table} not found in the database.")
+
+        # The dependency graph is directed (referred table) => (referring tables), walk it in both directions
+        neighbours: Dict[str, Set[str]] = defaultdict(set)
+        for table, referring_tables in cls._dependency_graph(keys).items():
+            for referring_table in referring_tables:
+                neighbours[table].add(referring_table)
+                neighbours[referring_table].add(table)
+
+        reached = {target_table}
+        queue = deque([target_table])
+        while queue:
+            for neighbour in neighbours[queue.popleft()]:
+                if neighbour in allowed and neighbour not in reached:
+                    reached.add(neighbour)
+                    queue.append(neighbour)
+
+        return [table for table in keys if table in reached]
 
     def _get_dependency_graph(self) -> Dict[str, Sequence[str]]:
         """Returns the dependency graph of the database."""
+        return self._dependency_graph({table_name: table.keys for table_name, table in self.all_data.items()})
+
+    @classmethod
+    def _dependency_graph(cls, keys: Dict[str, Keys]) -> Dict[str, Sequence[str]]:
+        """Returns the dependency graph of tables with the given keys."""
 
         dependencies: Dict[str, List[str]] = defaultdict(list)
 
-        for table_name, table in self.all_data.items():
-            for foreign_table in table.keys.foreign_keys.keys():
+        for table_name, table_keys in keys.items():
+            for foreign_table in table_keys.foreign_keys.keys():
                 dependencies[foreign_table].append(table_name)
                 dependencies[table_name]  # Ensure that the table is in the dictionary
 
@@ -0,0 +1,96 @@
+"""Reader of database tables stored in flat files: CSV, Parquet and Arrow IPC (Feather)."""
+
+from dataclasses import dataclass
+from importlib.util import find_spec
+from pathlib import Path
+from typing import ClassVar, Dict, final, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from magn.database.keys import Keys
+
+
+@final
+@dataclass(slots=True)
+class FileDataReader:
+    """Reads the data of tables stored in flat files, one file per table. The format is given by the suffix of the
+    file. Parquet and Arrow files need the optional pyarrow package. Tables can be read whole or streamed in chunks of
+    chunk_size rows, so a MAGN graph can be built without holding a whole table in memory."""
+    files: Dict[str, Path]
+    keys: Dict[str, Keys]
+    chunk_size: int = 100_000
+
+    csv_suffixes: ClassVar[Sequence[str]] = (".csv",)
+    parquet_suffixes: ClassVar[Sequence[str]] = (".parquet", ".pq")
+    arrow_suffixes: ClassVar[Sequence[str]] = (".arrow", ".feather", ".ipc")
+
+    def read(self) -> Dict[str, pd.DataFrame]:
+        """Read the data of all tables."""
+        return {table: self.read_table(table) for table in self.files}
+
+    def read_table(self, table: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Read the data of the given table.
+        If columns are given, only they and the key columns are read. The CSV parser skips the other columns, Parquet
+        and Arrow files read only the selected columns from the disk. The name of the table is kept in
+        data.attrs['name'], as a column may be called name as well."""
+        file, index_columns, selection = self._selection(table, columns)
+        suffix = file.suffix.lower()
+        if suffix in self.csv_suffixes:
+            data = pd.read_csv(file, usecols=selection)
+        elif suffix in self.parquet_suffixes:
+            self._require_pyarrow(file)
+            data = pd.read_parquet(file, columns=selection)
+        else:
+            self._require_pyarrow(file)
+            data = pd.read_feather(file, columns=selection)
+
+        return self._prepare(data, table, index_columns).sort_index()
+
+    def iter_table(self, table: str, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """Read the data of the given table in chunks of chunk_size rows, in the order of the rows in the file. CSV
+        files are parsed chunk by chunk and Parquet files are read by record batches. Arrow files are memory-mapped by
+        pyarrow, so they are read as a single chunk. Columns are selected like by read_table."""
+        file, index_columns, selection = self._selection(table, columns)
+        suffix = file.suffix.lower()
+        if suffix in self.csv_suffixes:
+            with pd.read_csv(file, usecols=selection, chunksize=self.chunk_size) as reader:
+                for chunk in reader:
+                    yield self._prepare(chunk, table, index_columns)
+        elif suffix in self.parquet_suffixes:
+            self._require_pyarrow(file)
+            import pyarrow.parquet as pq  # pylint: disable=import-outside-toplevel
+
+            for batch in pq.ParquetFile(file).iter_batches(batch_size=self.chunk_size, columns=selection):
+                yield self._prepare(batch.to_pandas(), table, index_columns)
+        else:
+            self._require_pyarrow(file)
+            yield self._prepare(pd.read_feather(file, columns=selection), table, index_columns)
+
+    def _selection(self, table: str, columns: Optional[Sequence[str]]) -> Tuple[Path, List[str], List[str] | None]:
+        """Returns the file of the table, its key columns and the columns to read (None for all of them)."""
+        keys = self.keys[table]
+        index_columns = list({*keys.primary_keys, *list(map(lambda x: x[0], keys.foreign_keys.values()))})
+
+        selection: List[str] | None = None
+        if columns is not None:
+            selection = list(dict.fromkeys([*index_columns, *columns]))
+
+        file = Path(self.files[table])
+        suffix = file.suffix.lower()
+        if suffix not in (*self.csv_suffixes, *self.parquet_suffixes, *self.arrow_suffixes):
+            raise ValueError(f"Unsupported file format of table {table}: {file}. Expected one of "
+                             f"{[*self.csv_suffixes, *self.parquet_suffixes, *self.arrow_suffixes]}.")
+
+        return file, index_columns, selection
+
+    @staticmethod
+    def _prepare(data: pd.DataFrame, table: str, index_columns: List[str]) -> pd.DataFrame:
+        if index_columns:
+            data.set_index(index_columns, inplace=True)
+        data.attrs['name'] = table
+        return data
+
+    @staticmethod
+    def _require_pyarrow(file: Path) -> None:
+        if find_spec("pyarrow") is None:
+            raise ImportError(f"Reading {file} requires the optional pyarrow package (pip install pyarrow).")
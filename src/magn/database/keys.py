@@ -1,8 +1,10 @@
 """Contains the Keys class, which represents a set of keys for a table."""
 
-from dataclasses import dataclass, astuple
+from dataclasses import dataclass, astuple, field
 from typing import final, List, Dict, Tuple, Iterator
 
+from magn.database.column_type import ColumnType
+
 
 @final
 @dataclass(slots=True)
@@ -15,6 +17,10 @@ class Keys:
     # Dictionary of foreign keys - (what other table) => (from column, to column)
     foreign_keys: Dict[str, Tuple[str, str]]
 
+    # Dictionary of column types - (column name) => (column type). Columns without a type are typed when the MAGN is
+    # built: keys are identifiers and the type of other columns is inferred from their values.
+    column_types: Dict[str, ColumnType] = field(default_factory=dict)
+
     def __iter__(self) -> Iterator:
         """Returns an iterator over the dataclass fields. Basically lets you unpack all the fields of the dataclass."""
         return iter(astuple(self))
@@ -3,10 +3,11 @@
 from sqlite3 import connect
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Tuple, final, List, Dict, Optional
+from typing import Tuple, final, List, Dict, Optional, Sequence
 
 import pandas as pd
 
+from magn.database.column_type import ColumnType
 from magn.database.keys import Keys
 
 
@@ -44,8 +45,12 @@ class SQLite3KeysReader:
         for table in self.columns:
             primary_keys = self._get_primary_keys(table)
             foreign_keys = self._get_foreign_keys(table)
+            column_types = self._get_column_types(table)
 
-            found_keys[table] = Keys(primary_keys, foreign_keys)
+            for key_column in [*primary_keys, *(f_key[0] for f_key in foreign_keys.values())]:
+                column_types[key_column] = ColumnType.IDENTIFIER
+
+            found_keys[table] = Keys(primary_keys, foreign_keys, column_types)
 
         return found_keys
 
@@ -66,6 +71,25 @@ class SQLite3KeysReader:
 
             return primary_keys
 
+    def _get_column_types(self, table: str) -> Dict[str, ColumnType]:
+        """Retrieve the column types of the given table from the declared types of its columns.
+        Columns whose declared type does not determine the column type are omitted."""
+        with connect(self.file) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                PRAGMA
+                    table_info({table});
+            """)
+
+            column_types: Dict[str, ColumnType] = {}
+
+            for column in cursor.fetchall():
+                column_type = ColumnType.from_declared_type(column[2])
+                if column_type is not None:
+                    column_types[column[1]] = column_type
+
+            return column_types
+
     def _get_foreign_keys(self, table: str) -> Dict[str, Tuple[str, str]]:
         """Retrieve the foreign keys of the given table."""
         with connect(self.file) as conn:
@@ -93,26 +117,30 @@ class SQLite3DataReader:
 
     def read(self) -> Dict[str, pd.DataFrame]:
         """Read the data of the given tables in the SQLite3 database."""
-        dataframes: Dict[str, pd.DataFrame] = {}
+        return {table: self.read_table(table) for table in self.columns}
+
+    def read_table(self, table: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """Read the data of the given table in the SQLite3 database.
+        If columns are given, only they and the key columns are selected."""
+        keys = self.keys[table]
+        index_columns = list({*keys.primary_keys, *list(map(lambda x: x[0], keys.foreign_keys.values()))})
+
+        selection = "*"
+        if columns is not None:
+            selection = ", ".join(f'"{column}"' for column in dict.fromkeys([*index_columns, *columns]))
+
+        query: str = f"""
+            SELECT
+                {selection}
+            FROM
+                {table};
+        """
 
         with connect(self.file) as conn:
-            for table in get_table_names(self.file):
-                query: str = f"""
-                    SELECT
-                        *
-                    FROM
-                        {table};
-                """
-
-                keys = self.keys[table]
-
-                data = pd.read_sql_query(query, conn)
-                data.set_index(
-                    list({*keys.primary_keys, *list(map(lambda x: x[0], keys.foreign_keys.values()))}),
-                    inplace=True,
-                )
-                data.name = table
-
-                dataframes[table] = data.sort_index()
-
-        return dataframes
+            data = pd.read_sql_query(query, conn)
+
+        if index_columns:
+            data.set_index(index_columns, inplace=True)
+        data.attrs['name'] = table
+
+        return data.sort_index()
@@ -0,0 +1,287 @@
+"""
+Streaming export of MAGN graphs to the DOT (Graphviz) and GraphML formats. Nodes and edges are written as they are
+visited, so exporting a graph needs memory only for the path from an ASA root to a leaf, not for a copy of the graph.
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import count
+from pathlib import Path
+from typing import Collection, Iterator, TextIO, TYPE_CHECKING
+from xml.sax.saxutils import escape, quoteattr
+
+from magn.asa.asa_element import ASAElement
+from magn.asa.asa_graph import ASAGraph
+from magn.asa.asa_node import ASANode
+from magn.magn_object_node import MAGNObjectNode
+
+if TYPE_CHECKING:
+    from magn.magn import MAGNGraph
+
+
+class _Writer(ABC):
+    """Receives the nodes and edges of a MAGN graph in the order they are visited and writes them to the stream."""
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    @abstractmethod
+    def begin(self) -> None:
+        """Write the header of the document, before any node."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def end(self) -> None:
+        """Write the footer of the document, after all nodes and edges."""
+        raise NotImplementedError()
+
+    def begin_feature(self, asa_graph: ASAGraph) -> None:
+        """The following tree nodes, elements and links belong to the ASA graph."""
+
+    def end_feature(self) -> None:
+        """The nodes of the ASA graph begun last have all been written."""
+
+    @abstractmethod
+    def tree_node(self, node_id: str, node: ASANode) -> None:
+        """Write a node of an ASA tree."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def element(self, element_id: str, element: ASAElement) -> None:
+        """Write an element of an ASA graph."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def object_node(self, object_id: str, object_node: MAGNObjectNode) -> None:
+        """Write a MAGN object."""
+        raise NotImplementedError()
+
+    @abstractmethod
+    def edge(self, source: str, target: str, kind: str, weight: float | None = None) -> None:
+        """
+        Write an edge. Kinds are "tree" (ASA node -> child), "bl" (element -> next element), "value" (object ->
+        element) and "object" (object -> object it refers to)
+        """
+        raise NotImplementedError()
+
+
+class _DotWriter(_Writer):
+    """Writes DOT in the style of docs/examples/data/*.dot: a cluster per ASA graph and record nodes for elements."""
+
+    def __init__(self, stream: TextIO):
+        super().__init__(stream)
+        self.clusters = count()
+
+    def begin(self) -> None:
+        self.stream.write("digraph MAGN {\n    graph [compound=true]\n")
+
+    def end(self) -> None:
+        self.stream.write("}\n")
+
+    def begin_feature(self, asa_graph: ASAGraph) -> None:
+        self.stream.write(f"    subgraph cluster{next(self.clusters)} {{\n"
+                          f"    label = {self._quote(asa_graph.name)}\n"
+                          "    node[shape=record style=\"filled\" color=black fillcolor=white]\n")
+
+    def end_feature(self) -> None:
+        self.stream.write("    }\n")
+
+    def tree_node(self, node_id: str, node: ASANode) -> None:
+        keys = " | ".join(self._escape_record(element.value) for element in node.elements)
+        self.stream.write(f"    {node_id} [label=\"{keys}\" fillcolor=lightgrey]\n")
+
+    def element(self, element_id: str, element: ASAElement) -> None:
+        value = self._escape_record(element.value)
+        self.stream.write(f"    {element_id} [label=\"{{<counter> {element.key_duplicates} | <key> {value} | "
+                          f"{{ <left> . | <right> . }}}}\"]\n")
+
+    def object_node(self, object_id: str, object_node: MAGNObjectNode) -> None:
+        label = self._quote(f"{object_node.clazz} ({object_node.duplicates})")
+        self.stream.write(f"    {object_id} [shape=ellipse label={label}]\n")
+
+    def edge(self, source: str, target: str, kind: str, weight: float | None = None) -> None:
+        if kind == "bl":
+            self.stream.write(f"    {source}:right -> {target}:left "
+                              f"[dir=none constraint=false label=\"{weight:.3g}\"]\n")
+        elif kind == "value":
+            self.stream.write(f"    {source} -> {target} [dir=none]\n")
+        else:
+            self.stream.write(f"    {source} -> {target}\n")
+
+    @staticmethod
+    def _quote(text: str) -> str:
+        return '"' + str(text).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+
+    @staticmethod
+    def _escape_record(value: int | float | str) -> str:
+        """Escape the characters with a meaning in record labels."""
+        text = str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        for character in '"{}|<>':
+            text = text.replace(character, "\\" + character)
+        return text
+
+
+class _GraphMLWriter(_Writer):
+    """Writes GraphML. ASA graphs are not nested, the feature of a node is stored as its attribute instead."""
+
+    KEYS = (
+        ("kind", "node", "kind", "string"),
+        ("feature", "node", "feature", "string"),
+        ("table", "node", "table", "string"),
+        ("value", "node", "value", "string"),
+        ("duplicates", "node", "duplicates", "int"),
+        ("edge_kind", "edge", "kind", "string"),
+        ("weight", "edge", "weight", "double"),
+    )
+
+    def __init__(self, stream: TextIO):
+        super().__init__(stream)
+        self.feature = ""
+        self.edges = count()
+
+    def begin(self) -> None:
+        self.stream.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                          '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+        for key, domain, name, attr_type in self.KEYS:
+            self.stream.write(f'  <key id="{key}" for="{domain}" attr.name="{name}" attr.type="{attr_type}"/>\n')
+        self.stream.write('  <graph id="MAGN" edgedefault="directed">\n')
+
+    def end(self) -> None:
+        self.stream.write("  </graph>\n</graphml>\n")
+
+    def begin_feature(self, asa_graph: ASAGraph) -> None:
+        self.feature = asa_graph.name
+
+    def tree_node(self, node_id: str, node: ASANode) -> None:
+        keys = ", ".join(str(element.value) for element in node.elements)
+        self._node(node_id, kind="tree", feature=self.feature, value=keys)
+
+    def element(self, element_id: str, element: ASAElement) -> None:
+        self._node(element_id, kind="element", feature=self.feature, value=element.value,
+                   duplicates=element.key_duplicates)
+
+    def object_node(self, object_id: str, object_node: MAGNObjectNode) -> None:
+        self._node(object_id, kind="object", table=object_node.clazz, duplicates=object_node.duplicates)
+
+    def edge(self, source: str, target: str, kind: str, weight: float | None = None) -> None:
+        data = self._data(edge_kind=kind, weight=weight)
+        self.stream.write(f'    <edge id="x{next(self.edges)}" source="{source}" target="{target}">{data}</edge>\n')
+
+    def _node(self, node_id: str, **attributes) -> None:
+        self.stream.write(f'    <node id="{node_id}">{self._data(**attributes)}</node>\n')
+
+    @staticmethod
+    def _data(**attributes) -> str:
+        return "".join(f"<data key={quoteattr(key)}>{escape(str(value))}</data>"
+                       for key, value in attributes.items() if value is not None)
+
+
+def export_dot(magn: 'MAGNGraph', file: Path | TextIO, tables: Collection[str] | None = None,
+               features: Collection[str] | None = None, max_depth: int | None = None, tree: bool = True,
+               bl: bool = True, objects: bool = True) -> None:
+    """
+    Export the MAGN graph to the DOT format of Graphviz. Every ASA graph is a cluster with the nodes of its tree and
+    its elements, which are linked by the bidirectional linked list. Objects are linked to their values and to the
+    objects they refer to.
+
+    :param magn: the exported graph
+    :param file: the path of the written file, or an open text stream
+    :param tables: the tables whose objects are exported. All tables if None
+    :param features: the names of the ASA graphs (columns) that are exported. All of them if None
+    :param max_depth: the depth up to which the ASA trees are exported (0 is the root only). All of the elements are
+    exported regardless of the depth. The whole trees if None
+    :param tree: if False, the ASA trees are not exported, only their elements
+    :param bl: if False, the bidirectional linked lists are not exported
+    :param objects: if False, the objects and their edges are not exported
+    """
+    with _open(file) as stream:
+        _export(magn, _DotWriter(stream), tables, features, max_depth, tree, bl, objects)
+
+
+def export_graphml(magn: 'MAGNGraph', file: Path | TextIO, tables: Collection[str] | None = None,
+                   features: Collection[str] | None = None, max_depth: int | None = None, tree: bool = True,
+                   bl: bool = True, objects: bool = True) -> None:
+    """
+    Export the MAGN graph to GraphML. Nodes have the "kind" attribute ("tree", "element" or "object") and edges have
+    the "kind" attribute ("tree", "bl", "value" or "object"). See export_dot for the parameters.
+    """
+    with _open(file) as stream:
+        _export(magn, _GraphMLWriter(stream), tables, features, max_depth, tree, bl, objects)
+
+
+@contextmanager
+def _open(file: Path | TextIO) -> Iterator[TextIO]:
+    """Open the file for writing, or use the stream as is."""
+    if hasattr(file, 'write'):
+        yield file
+        return
+
+    with open(file, 'w', encoding='utf-8') as stream:
+        yield stream
+
+
+def _export(magn: 'MAGNGraph', writer: _Writer, tables: Collection[str] | None, features: Collection[str] | None,
+            max_depth: int | None, tree: bool, bl: bool, objects: bool) -> None:
+    """Visit the filtered ASA graphs and objects of the MAGN graph and pass them to the writer."""
+    asa_graphs = [asa_graph for asa_graph in magn.asa_graphs if features is None or asa_graph.name in features]
+    exported_features = {asa_graph.name for asa_graph in asa_graphs}
+    exported_tables = [table for table in magn.objects if tables is None or table in tables]
+    tree_nodes = count()
+
+    writer.begin()
+    for asa_graph in asa_graphs:
+        writer.begin_feature(asa_graph)
+        if tree and asa_graph.root.elements:
+            _export_tree(asa_graph.root, writer, max_depth, tree_nodes)
+
+        for element in asa_graph.iter_elements():
+            element_id = _element_id(element)
+            writer.element(element_id, element)
+            if bl and element.bl_next is not None:
+                writer.edge(element_id, _element_id(element.bl_next), "bl", element.bl_next_weight)
+        writer.end_feature()
+
+    if objects:
+        for table in exported_tables:
+            for object_node in magn.objects[table]:
+                writer.object_node(_object_id(object_node), object_node)
+
+        for table in exported_tables:
+            for object_node in magn.objects[table]:
+                object_id = _object_id(object_node)
+                for element in object_node.values:
+                    if element.feature in exported_features:
+                        writer.edge(object_id, _element_id(element), "value")
+                for child in object_node.objects:
+                    if tables is None or child.clazz in tables:
+                        writer.edge(object_id, _object_id(child), "object")
+
+    writer.end()
+
+
+def _export_tree(root: ASANode, writer: _Writer, max_depth: int | None, tree_nodes: Iterator[int]) -> None:
+    """
+    Export the nodes of an ASA tree in depth first order. Only the nodes of the current path and their siblings are
+    kept on the stack.
+    """
+    root_id = f"t{next(tree_nodes)}"
+    writer.tree_node(root_id, root)
+    stack = [(root, root_id, 0)]
+    while stack:
+        node, node_id, depth = stack.pop()
+        if max_depth is not None and depth >= max_depth:
+            continue
+
+        for child in reversed(node.children):
+            child_id = f"t{next(tree_nodes)}"
+            writer.tree_node(child_id, child)
+            writer.edge(node_id, child_id, "tree")
+            stack.append((child, child_id, depth + 1))
+
+
+def _element_id(element: ASAElement) -> str:
+    return f"e{element.index}" if element.index >= 0 else f"e_{id(element)}"
+
+
+def _object_id(object_node: MAGNObjectNode) -> str:
+    return f"o{object_node.index}" if object_node.index >= 0 else f"o_{id(object_node)}"
@@ -1,18 +1,52 @@
 """MAGN graph module."""
 
+from __future__ import annotations
+
+import pickle
+from array import array
 from collections import deque
-from dataclasses import dataclass, field
+from contextlib import nullcontext
+from dataclasses import astuple, dataclass, field, fields
 from itertools import pairwise
+from os import close
 from pathlib import Path
-from typing import Self, List, Dict, Tuple, Final
-
-import pandas as pd
+from random import Random
+from tempfile import mkstemp
+from typing import (Self, List, Dict, Tuple, Final, FrozenSet, Iterable, Iterator, Set, Mapping, Sequence, Callable,
+                    TYPE_CHECKING)
 
 from magn.abstract_node import AbstractNode
 from magn.asa.asa_element import ASAElement
-from magn.asa.asa_graph import ASAGraph
-from magn.database.database import Database
+from magn.asa.asa_graph import ASAGraph, DEFAULT_ORDER
+from magn.asa.categorical_asa_graph import CategoricalASAGraph
+from magn.asa.disk_asa_graph import DEFAULT_CACHE_SIZE, DiskASAGraph, DiskElementReference
+from magn.asa.identifier_asa_graph import IdentifierASAGraph
+from magn.asa.numeric_asa_graph import NumericASAGraph
+from magn.asa.quantization import Quantization, Quantizer
+from magn.asa.quantized_asa_graph import QuantizedASAGraph
+from magn.database.column_type import ColumnType
 from magn.magn_object_node import MAGNObjectNode
+from magn.prediction_cache import PredictionCache
+from magn.priorities import PriorityStore, PriorityUpdate, PriorityVersion
+from magn.query import Condition, Equals
+from magn.sampling import PathRank, SampledPrediction, WalkStatistics
+from magn.stimulation_index import StimulationIndex, StimulationVector
+from magn.traversal import PathTrie, TraversalBudget
+
+# pandas, numpy and the modules depending on them are imported only where they are used, so that a saved graph can be
+# loaded and used for predictions without importing them (see magn.runtime).
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from magn.adjacency import CompiledAdjacency
+    from magn.database.database import Database
+    from magn.parallel_training import ParallelTrainer
+
+# Sampled predictions: a walk longer than SAMPLED_MAX_WALK_LENGTH is abandoned, and the walks may stop early only after
+# SAMPLED_MIN_WALKS walks, checking every SAMPLED_CHECK_EVERY walks whether the leading value is already separated.
+SAMPLED_MAX_WALK_LENGTH: Final[int] = 64
+SAMPLED_MIN_WALKS: Final[int] = 100
+SAMPLED_CHECK_EVERY: Final[int] = 50
 
 
 @dataclass(slots=True)
@@ -26,31 +60,107 @@ class MAGNGraph:
     asa_graphs: List[ASAGraph] = field(default_factory=list)
     objects: Dict[str, List[MAGNObjectNode]] = field(default_factory=dict)
     accuracy_history: Dict[str, List[float]] = field(default_factory=dict)
+    priorities: PriorityStore = field(default_factory=PriorityStore)
+    column_types: Dict[str, ColumnType] = field(default_factory=dict)
+    _adjacency: CompiledAdjacency | None = field(default=None, repr=False)
+    storage: Path | None = None
+    storage_cache_size: int = DEFAULT_CACHE_SIZE
+    asa_order: int = DEFAULT_ORDER
+    _objects_by_index: Dict[int, MAGNObjectNode] = field(default_factory=dict, repr=False)
+    # (object index) => (indexes of the objects it refers to by a foreign key). The referred objects hold the
+    # referring ones in their objects, this is the way back.
+    _parents: Dict[int, List[int]] = field(default_factory=dict, repr=False)
+    prediction_cache: PredictionCache | None = None
+    stimulation_index: StimulationIndex | None = None
 
     @classmethod
-    def from_sqlite3(cls, file: Path) -> Self:
-        """Substitute for the lack in the ability to create many constructors in python."""
-        database = Database.from_sqlite3(file)
-        return cls.from_database(database)
+    def from_sqlite3(cls, file: Path, quantization: Dict[str, Quantization] | None = None,
+                     deduplicate: bool = False, tables: Sequence[str] | None = None,
+                     columns: Dict[str, Sequence[str]] | None = None, target_table: str | None = None,
+                     storage: Path | None = None, asa_order: int = DEFAULT_ORDER,
+                     storage_cache_size: int = DEFAULT_CACHE_SIZE) -> Self:
+        """
+        Substitute for the lack in the ability to create many constructors in python.
+        Only the selected tables and columns are read from the file (see Database.from_sqlite3).
+        """
+        from magn.database.database import Database  # pylint: disable=import-outside-toplevel
 
-    @classmethod
-    def from_database(cls, database: Database) -> Self:
+        database = Database.from_sqlite3(file, tables, columns, target_table)
+        return cls.from_database(database, quantization, deduplicate, storage, asa_order, storage_cache_size)
 
-        magn = MAGNGraph()
+    @classmethod
+    def from_database(cls, database: Database, quantization: Dict[str, Quantization] | None = None,
+                      deduplicate: bool = False, storage: Path | None = None, asa_order: int = DEFAULT_ORDER,
+                      storage_cache_size: int = DEFAULT_CACHE_SIZE) -> Self:
+        """
+        Build the MAGN graph from the database. The kind of ASA graph built for every column is decided by its column
+        type (see Keys.column_types).
+
+        :param database: the database
+        :param quantization: (column name) => (quantization) of numeric columns whose values are merged into buckets
+        :param deduplicate: if True, rows of a table with identical values (foreign keys aside) are represented by a
+        single MAGN object that counts them in its duplicates and is connected to the objects of all of them
+        :param storage: if given, the ASA graphs of columns that are not quantized are kept on the disk, in SQLite files
+        created in this directory (see DiskASAGraph). Only the recently used elements are kept in memory.
+        :param asa_order: the maximal number of children of the nodes of the numeric ASA graphs (see ASAGraph.order)
+        :param storage_cache_size: the number of recently used elements every ASA graph stored on the disk keeps in
+        memory (see DiskASAGraph.cache_size)
+        :return: the MAGN graph
+        """
+        magn = MAGNGraph(storage=storage, storage_cache_size=storage_cache_size, asa_order=asa_order)
 
         print("Processing tables...")
         for table_name in database.sort():
-            table, keys = database[table_name]
-            p_keys, f_keys = keys
+            table = database[table_name]
+            p_keys, f_keys, column_types = astuple(table.keys)
 
-            asa_graphs, objects = magn._process_table(table, p_keys, f_keys, table_name)
+            asa_graphs, objects = magn._process_table_chunks(table.iter_chunks, p_keys, f_keys, table_name,
+                                                             column_types, quantization, deduplicate)
             magn.asa_graphs += asa_graphs
             magn.objects[table_name] = objects
             print(f"Table {table_name} processed.")
         print("Tables processed.")
+        for asa_graph in magn.asa_graphs:
+            if isinstance(asa_graph, DiskASAGraph):
+                asa_graph.flush()
+        magn.priorities.publish()
         return magn
 
-    def fit(self, data: pd.DataFrame, num_epochs: int, learning_rate: float, validation_data: pd.DataFrame | None = None):
+    def fit(self, data: pd.DataFrame, num_epochs: int, learning_rate: float, validation_data: pd.DataFrame | None = None,
+            batch_size: int | None = None, eval_every: int = 1, eval_sample: int | None = None,
+            patience: int | None = None, seed: int = 0, workers: int | None = None, deterministic: bool = True,
+            budget: TraversalBudget | None = None):
+        """
+        Train the priorities of the MAGN graph.
+
+        Training modifies the working priorities only. They are published as a new version after every batch_size
+        rows (if given) and after every epoch, so predict can be called concurrently from other threads.
+
+        The model is evaluated after every eval_every epochs and after the last one. The indexes of the evaluated
+        epochs are recorded in accuracy_history['epoch'], next to the accuracies in 'train' and 'validate'.
+
+        :param data: the training data with a target column
+        :param num_epochs: the number of epochs
+        :param learning_rate: the learning rate
+        :param validation_data: optional validation data with a target column
+        :param batch_size: the number of rows after which the priorities are published. None publishes once per epoch.
+        :param eval_every: the number of epochs between evaluations
+        :param eval_sample: the approximate number of rows the accuracies are measured on. The rows are sampled once,
+        stratified by the target column and value. None evaluates on all rows.
+        :param patience: stop training when the validation accuracy (the training accuracy without validation data)
+        has not improved for this many evaluations. None never stops early.
+        :param seed: the seed of the evaluation sample
+        :param workers: the number of worker processes. With more than one worker, the rows of every batch (of
+        batch_size rows, or of the whole epoch) are split among the workers and all of them are evaluated with the
+        priorities from the start of the batch. The updates of the rows are merged and applied at the end of the batch.
+        None or 1 trains in-process, updating the priorities after every row.
+        :param deterministic: with several workers, merge the updates in a fixed order, so the training is reproducible
+        :param budget: the limits of the paths searched from every element, in training and evaluation. None searches
+        all paths.
+        :return: the accuracy history
+        """
+        from magn.database.database import Database  # pylint: disable=import-outside-toplevel
+
         mock_name: Final[str] = Database.mock_column_name
 
         if mock_name not in data.keys():
@@ -59,42 +169,774 @@ class MAGNGraph:
         if validation_data is not None and mock_name not in validation_data.keys():
             raise NameError("Data must have a target column.")
 
+        if eval_every < 1:
+            raise ValueError(f"Evaluation interval must be positive, got {eval_every}.")
+
         self.accuracy_history['train'] = []
         self.accuracy_history['validate'] = []
+        self.accuracy_history['epoch'] = []
+
+        eval_data = self._stratified_sample(data, eval_sample, seed)
+        eval_validation_data = None
+        if validation_data is not None:
+            eval_validation_data = self._stratified_sample(validation_data, eval_sample, seed)
+
+        best_accuracy = -1.0
+        evaluations_without_improvement = 0
 
         data_no_target = data.drop([mock_name], axis=1)
         data_target = data[mock_name]
-        asa_graphs = [self.get_asa_by_name(name) for name in data_no_target.columns]
+        asa_graphs = {name: self.get_asa_by_name(name) for name in data_no_target.columns}
+        trainer = None
+        if workers is not None and workers > 1:
+            from magn.parallel_training import ParallelTrainer  # pylint: disable=import-outside-toplevel
+
+            trainer = ParallelTrainer(self, data_no_target, data_target, asa_graphs, learning_rate, workers,
+                                      deterministic, budget)
+
         print("Teaching MAGN...")
-        for epoch in range(num_epochs):
-            print(f"epoch {epoch}...")
-            for idx, row in data_no_target.iterrows():
-                target_col = data_target[idx]
-                target_value = row[target_col]
-                asa_target = [asa for asa in asa_graphs if asa.name == target_col][0]
-                target_element = asa_target.search(target_value)
-                if target_element is None:
-                    raise ValueError(f"Element {target_value} not found in the \"{target_col}\" ASA graph.")
-                row_no_target = row.drop([target_col])
-                asa_no_target = [asa for asa in asa_graphs if asa.name != target_col]
-                activated_neurons = [_asa.search(row_no_target[_asa.name]) for _asa in asa_no_target]
-                activated_col_names = data_no_target.columns
-
-                self._update_priorities(activated_neurons, activated_col_names, target_element, learning_rate)
-            self._evaluate_model(data, validation_data)
+        with self.priorities.training() as priorities, trainer or nullcontext():
+            for epoch in range(num_epochs):
+                print(f"epoch {epoch}...")
+                if trainer is None:
+                    self._fit_epoch(data_no_target, data_target, asa_graphs, learning_rate, batch_size, priorities,
+                                    budget)
+                else:
+                    self._fit_epoch_parallel(trainer, len(data_no_target), batch_size, priorities)
+
+                self.priorities.publish()
+                if (epoch + 1) % eval_every != 0 and epoch != num_epochs - 1:
+                    continue
+
+                self._evaluate_model(eval_data, eval_validation_data, budget)
+                self.accuracy_history['epoch'].append(epoch)
+
+                history = self.accuracy_history['train' if validation_data is None else 'validate']
+                if history[-1] > best_accuracy:
+                    best_accuracy = history[-1]
+                    evaluations_without_improvement = 0
+                else:
+                    evaluations_without_improvement += 1
+
+                if patience is not None and evaluations_without_improvement >= patience:
+                    print(f"No improvement in {patience} evaluations, stopping after epoch {epoch}.")
+                    break
+
+        self._refresh_materialized(self.priorities.pin())
+        return self.accuracy_history
+
+    def _fit_epoch(self, data_no_target: pd.DataFrame, data_target: pd.Series, asa_graphs: Dict[str, ASAGraph],
+                   learning_rate: float, batch_size: int | None, priorities: array,
+                   budget: TraversalBudget | None = None) -> None:
+        """
+        Train one epoch in-process, updating the priorities after every row.
+
+        :param data_no_target: the training rows without the target column
+        :param data_target: the target column of the training rows
+        :param asa_graphs: (column name) => (ASA graph of the column)
+        :param learning_rate: the learning rate
+        :param batch_size: the number of rows after which the priorities are published, None for once per epoch
+        :param priorities: the working priorities
+        :param budget: the limits of the paths searched from every element
+        """
+        for row_number, (idx, row) in enumerate(data_no_target.iterrows(), start=1):
+            target_col = data_target[idx]
+            activated_neurons, target_element = self._training_elements(row, target_col, asa_graphs)
+            activated_col_names = data_no_target.columns
+
+            self._update_priorities(activated_neurons, activated_col_names, target_element, learning_rate, priorities,
+                                    budget)
+            if batch_size is not None and row_number % batch_size == 0:
+                self.priorities.publish()
+
+    def _fit_epoch_parallel(self, trainer: ParallelTrainer, n_rows: int, batch_size: int | None,
+                            priorities: array) -> None:
+        """
+        Train one epoch with the worker processes of the trainer, one batch at a time.
+
+        :param trainer: the parallel trainer
+        :param n_rows: the number of training rows
+        :param batch_size: the number of rows of a batch, None for a single batch
+        :param priorities: the working priorities
+        """
+        batch_size = n_rows if batch_size is None else batch_size
+        for start in range(0, n_rows, batch_size):
+            batch_priorities = PriorityVersion(self.priorities.current.version, array('d', priorities))
+            trainer.batch_update(start, min(start + batch_size, n_rows), batch_priorities).apply(priorities)
+            if start + batch_size < n_rows:
+                self.priorities.publish()
+
+    @classmethod
+    def _stratified_sample(cls, data: pd.DataFrame, size: int | None, seed: int) -> pd.DataFrame:
+        """
+        Sample size rows of the data, keeping the proportions of the (target column, target value) strata. The rows
+        are allocated to the strata proportionally to their sizes and the rows left over by rounding go to the strata
+        with the largest remainders, so exactly size rows are sampled. Strata too small for a row may be left out.
+
+        :param data: the data with a target column
+        :param size: the number of sampled rows, None for all rows
+        :param seed: the seed of the sample
+        :return: the sampled rows in their original order
+        """
+        if size is None or size >= len(data):
+            return data
+        if size < 1:
+            raise ValueError(f"Evaluation sample size must be positive, got {size}.")
+
+        import numpy as np  # pylint: disable=import-outside-toplevel
+        from magn.database.database import Database  # pylint: disable=import-outside-toplevel
+
+        mock_name: Final[str] = Database.mock_column_name
+        strata: Dict[Tuple, List[int]] = {}
+        for position, (_, row) in enumerate(data.iterrows()):
+            target = row[mock_name]
+            strata.setdefault((target, row[target]), []).append(position)
+
+        rng = np.random.default_rng(seed)
+        quotas = [len(stratum) * size / len(data) for stratum in strata.values()]
+        counts = [int(quota) for quota in quotas]
+
+        # Largest remainders first, equal remainders in a random order
+        tie_breaks = rng.permutation(len(quotas)).tolist()
+        by_remainder = sorted(range(len(quotas)), key=lambda i: (counts[i] - quotas[i], tie_breaks[i]))
+        for i in by_remainder[:size - sum(counts)]:
+            counts[i] += 1
+
+        positions = []
+        for stratum, count in zip(strata.values(), counts):
+            if count > 0:
+                positions.extend(rng.choice(stratum, size=count, replace=False).tolist())
+
+        return data.iloc[sorted(positions)]
+
+    def fit_stream(self, rows: Iterable[Mapping | Sequence | pd.DataFrame], learning_rate: float,
+                   eval_window: int = 1000, batch_size: int | None = None, columns: Sequence[str] | None = None,
+                   budget: TraversalBudget | None = None):
+        """
+        Train the priorities of the MAGN graph on rows read from any iterator, in a single pass. Every row is first
+        predicted with the current priorities and then trained on (prequential evaluation), so the accuracy is tracked
+        over the last eval_window rows without scoring the whole dataset again. Only the window is kept in memory.
+
+        :param rows: the training rows. A row is a mapping (e.g. a dict or a pandas Series) or, if columns are given,
+        a sequence of values (e.g. a row of a SQLite cursor). DataFrame chunks are split into their rows. Every row has
+        a target column naming the predicted column.
+        :param learning_rate: the learning rate
+        :param eval_window: the number of recent rows the accuracy is measured on. The windowed accuracy is recorded
+        in accuracy_history['stream'] after every eval_window rows and at the end of the stream.
+        :param batch_size: the number of rows after which the priorities are published. None means eval_window.
+        :param columns: the column names of rows given as sequences of values
+        :param budget: the limits of the paths searched from every element. None searches all paths.
+        :return: the accuracy history
+        """
+        if eval_window < 1:
+            raise ValueError(f"Evaluation window must be positive, got {eval_window}.")
+
+        from magn.database.database import Database  # pylint: disable=import-outside-toplevel
+
+        mock_name: Final[str] = Database.mock_column_name
+        batch_size = eval_window if batch_size is None else batch_size
+        self.accuracy_history['stream'] = []
+
+        # The first ASA graph of every name, like get_asa_by_name
+        asa_graphs: Dict[str, ASAGraph] = {}
+        for asa_graph in self.asa_graphs:
+            asa_graphs.setdefault(asa_graph.name, asa_graph)
 
+        window: deque[bool] = deque(maxlen=eval_window)
+        row_number = 0
+        with self.priorities.training() as priorities:
+            for row in self._stream_rows(rows, columns):
+                if mock_name not in row:
+                    raise NameError("Data must have a target column.")
+
+                row_number += 1
+                target_col = row[mock_name]
+                activated_neurons, target_element = self._training_elements(row, target_col, asa_graphs)
+
+                prediction = self._calculate_prediction(activated_neurons, target_col, priorities, budget)
+                window.append(prediction == target_element.value)
+
+                self._update_priorities(activated_neurons, [], target_element, learning_rate, priorities, budget)
+                if row_number % batch_size == 0:
+                    self.priorities.publish()
+                if row_number % eval_window == 0:
+                    self.accuracy_history['stream'].append(sum(window) / len(window))
+
+            self.priorities.publish()
+            if row_number % eval_window != 0:
+                self.accuracy_history['stream'].append(sum(window) / len(window))
+
+        self._refresh_materialized(self.priorities.pin())
         return self.accuracy_history
 
+    @classmethod
+    def _stream_rows(cls, rows: Iterable[Mapping | Sequence | pd.DataFrame],
+                     columns: Sequence[str] | None) -> Iterable[Mapping]:
+        """Returns the rows of the stream as mappings, splitting DataFrame chunks into rows."""
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+
+        for row in rows:
+            if isinstance(row, pd.DataFrame):
+                for _, chunk_row in row.iterrows():
+                    yield chunk_row
+            elif isinstance(row, (Mapping, pd.Series)):
+                yield row
+            elif columns is not None:
+                yield dict(zip(columns, row))
+            else:
+                raise ValueError("Rows given as sequences of values require the column names.")
+
+    def _training_elements(self, row: Mapping | pd.Series, target_col: str, asa_graphs: Dict[str, ASAGraph]
+                           ) -> Tuple[List[ASAElement], ASAElement]:
+        """
+        Returns the activated elements and the target element of a training row.
+
+        :param row: the training row (without the target column)
+        :param target_col: the name of the predicted column
+        :param asa_graphs: (column name) => (ASA graph of the column)
+        :return: the elements of the values of all other columns of the row and the element of the target value
+        """
+        asa_target = asa_graphs.get(target_col)
+        if asa_target is None:
+            raise ValueError(f"ASA graph with name {target_col} not found.")
+
+        target_value = row[target_col]
+        target_element = asa_target.search(target_value)
+        if target_element is None:
+            raise ValueError(f"Element {target_value} not found in the \"{target_col}\" ASA graph.")
+
+        activated_neurons = [asa.search(row[name]) for name, asa in asa_graphs.items()
+                             if name != target_col and name in row]
+        return [neuron for neuron in activated_neurons if neuron is not None], target_element
+
+    def predict(self, data: Mapping | pd.Series, target: str, mode: str = "exact", walks: int = 1000,
+                seed: int | None = None, confidence: float = 0.95, budget: TraversalBudget | None = None
+                ) -> int | float | str:
+        """
+        Predict the value of the target feature. The prediction uses the priority version that is current when the
+        call starts, so it is not affected by a concurrently running fit.
+
+        :param data: the known values of the features, e.g. a dict or a pandas Series
+        :param target: the name of the predicted feature
+        :param mode: "exact" enumerates all paths to the target feature, "sampled" approximates the prediction with
+        random walks (see predict_sampled)
+        :param walks: the maximal number of random walks in the sampled mode
+        :param seed: the seed of the random walks in the sampled mode
+        :param confidence: the confidence level used to stop the random walks early in the sampled mode
+        :param budget: the limits of the paths searched from every known value in the exact mode. Within the limits
+        the shortest paths are found. None searches all paths.
+        :return: the predicted value
+        """
+        if mode == "sampled":
+            return self.predict_sampled(data, target, walks, seed, confidence).value
+        if mode != "exact":
+            raise ValueError(f"Unknown prediction mode {mode}, expected \"exact\" or \"sampled\".")
+
+        return self._predict_exact(self._activated_neurons(data, target), target, self.priorities.pin(), budget)
+
+    def predict_batch(self, rows: Sequence[Mapping | pd.Series], targets: str | Sequence[str],
+                      budget: TraversalBudget | None = None) -> List[int | float | str]:
+        """
+        Predict the values of the target features of many rows. All rows use the priority version that is current
+        when the call starts, and rows activating the same elements for the same target are predicted only once.
+
+        :param rows: the known values of the features of every row
+        :param targets: the name of the predicted feature of all rows, or of every row
+        :param budget: the limits of the paths searched from every known value. None searches all paths.
+        :return: the predicted values, in the order of the rows
+        """
+        if isinstance(targets, str):
+            targets = [targets] * len(rows)
+        if len(targets) != len(rows):
+            raise ValueError(f"Number of rows and targets do not match ({len(rows)} vs {len(targets)}).")
+
+        priorities = self.priorities.pin()
+        predictions: Dict[Tuple[FrozenSet[int], str], int | float | str] = {}
+        results = []
+        for row, target in zip(rows, targets):
+            activated_neurons = self._activated_neurons(row, target)
+            key = (frozenset(neuron.index for neuron in activated_neurons), target)
+            if key not in predictions:
+                predictions[key] = self._predict_exact(activated_neurons, target, priorities, budget)
+            results.append(predictions[key])
+
+        return results
+
+    def _predict_exact(self, activated_neurons: List[ASAElement], target: str, priorities: PriorityVersion,
+                       budget: TraversalBudget | None = None) -> int | float | str:
+        """
+        Predict the value of the target feature from the activated elements, using the prediction cache and the
+        materialised stimulations if any.
+        """
+        if self.prediction_cache is None:
+            return self._predict_uncached(activated_neurons, target, priorities, budget)
+
+        cache_key = (frozenset(neuron.index for neuron in activated_neurons), target, priorities.version, budget)
+        prediction = self.prediction_cache.get(cache_key)
+        if prediction is None:
+            prediction = self._predict_uncached(activated_neurons, target, priorities, budget)
+            self.prediction_cache.put(cache_key, prediction)
+
+        return prediction
+
+    def _predict_uncached(self, activated_neurons: List[ASAElement], target: str, priorities: PriorityVersion,
+                          budget: TraversalBudget | None) -> int | float | str:
+        if self.stimulation_index is not None and self.stimulation_index.covers(target, budget):
+            return self._predict_materialized(activated_neurons, target, priorities)
+        return self._calculate_prediction(activated_neurons, target, priorities, budget)
+
+    def _predict_materialized(self, activated_neurons: List[ASAElement], target: str, priorities: PriorityVersion
+                              ) -> int | float | str:
+        """
+        Predict the value of the target feature by looking up the stimulation vector of every activated element.
+        Vectors computed with an older priority version are all recomputed first (see _refresh_materialized), vectors
+        missing from the index are computed and stored when their element is activated. The prediction is the same as
+        the one of _calculate_prediction.
+        """
+        index = self.stimulation_index
+        self._refresh_materialized(priorities)
+        max_stimulation, max_value = None, None
+        for neuron in activated_neurons:
+            key = (neuron.index, target)
+            vector = index.get(key, priorities.version)
+            if vector is None:
+                vector = self._stimulation_vector(neuron, target, priorities, index.budget)
+                index.put(key, priorities.version, vector)
+
+            # The first entry is the strongest value of the source, the first source wins among equal stimulations
+            if vector and (max_stimulation is None or vector.stimulations[0] > max_stimulation):
+                max_stimulation, max_value = vector.stimulations[0], vector.values[0]
+
+        if max_stimulation is None:
+            raise ValueError(f"No element of the target feature {target} is reachable from the given values.")
+        return max_value
+
+    def predict_sampled(self, data: Mapping | pd.Series, target: str, walks: int = 1000, seed: int | None = None,
+                        confidence: float = 0.95) -> SampledPrediction:
+        """
+        Approximate the prediction with random walks, for graphs where enumerating all paths is too expensive.
+        Every walk starts in a random activated element and moves to a neighbour that the exact search could visit
+        next, with probability proportional to the stimulation of the connection (priority * weight), so the strong
+        paths the exact prediction looks for are walked most often. Like the exact prediction, the predicted value is
+        the one at the end of the strongest path found, with equally strong paths ordered as in the exact search.
+        Once the strongest path has been walked, the prediction equals the exact one.
+
+        The result reports a confidence interval of the probability that a walk ends in each reached value. The walks
+        stop early once the lower bound of the leading value lies above the upper bound of every other value (see
+        WalkStatistics.separated), so the latency is bounded by the number of walks.
+
+        :param data: the known values of the features
+        :param target: the name of the predicted feature
+        :param walks: the maximal number of random walks
+        :param seed: the seed of the random walks, None for a random seed
+        :param confidence: the confidence level of the intervals
+        :return: the predicted value with the strongest stimulation found for every reached value
+        """
+        if walks < 1:
+            raise ValueError(f"Number of walks must be positive, got {walks}.")
+
+        priorities = self.priorities.pin()
+        activated_neurons = self._activated_neurons(data, target)
+        if not activated_neurons:
+            raise ValueError("None of the known values is present in the MAGN graph.")
+
+        rng = Random(seed)
+        statistics = WalkStatistics(confidence)
+        for walk in range(1, walks + 1):
+            start = rng.randrange(len(activated_neurons))
+            target_element, rank = self._random_walk(activated_neurons[start], start, target, priorities, rng)
+            statistics.record(None if target_element is None else target_element.value, rank)
+
+            if (walk >= SAMPLED_MIN_WALKS and walk % SAMPLED_CHECK_EVERY == 0 and walk < walks
+                    and statistics.separated()):
+                return statistics.result(stopped_early=True)
+
+        if statistics.leader() is None:
+            raise ValueError(f"No random walk reached the target feature {target}.")
+        return statistics.result(stopped_early=False)
+
+    def _activated_neurons(self, data: Mapping | pd.Series, target: str) -> List[ASAElement]:
+        """Returns the elements of the known values of the features, except the target feature."""
+        asa_graphs = [asa for asa in self.asa_graphs if asa.name != target and asa.name in data.keys()]
+        activated_neurons = list(map(lambda _asa: _asa.search(data[_asa.name]), asa_graphs))
+        return [an for an in activated_neurons if an is not None]  # TODO: highly irresponsible
+
+    def save(self, file: Path) -> None:
+        """
+        Save the graph, including its priorities, to a file. ASA graphs stored on the disk are flushed and saved as
+        references to their files, which have to stay in place.
+
+        :param file: the file
+        """
+        with open(file, 'wb') as stream:
+            pickle.dump(self, stream, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file: Path) -> Self:
+        """
+        Load a graph saved with save. Only files from trusted sources may be loaded, as loading runs pickle.
+
+        :param file: the file
+        :return: the graph
+        """
+        with open(file, 'rb') as stream:
+            magn = pickle.load(stream)
+
+        if not isinstance(magn, cls):
+            raise ValueError(f"File {file} does not contain a MAGN graph.")
+        return magn
+
+    def __getstate__(self) -> dict:
+        """
+        The nodes refer to each other along the bidirectional linked lists and the element <-> object connections, so
+        pickling them directly would recurse as deep as the longest chain of references. The nodes pickle only their
+        own attributes instead and the references are stored here as positions in flat lists of the nodes.
+        """
+        elements = [element for asa_graph in self.asa_graphs if not isinstance(asa_graph, DiskASAGraph)
+                    for element in asa_graph.get_elements()]
+        all_objects = [object_node for table_objects in self.objects.values() for object_node in table_objects]
+
+        element_positions = {id(element): position for position, element in enumerate(elements)}
+        object_positions = {id(object_node): position for position, object_node in enumerate(all_objects)}
+        graph_positions = {id(asa_graph): position for position, asa_graph in enumerate(self.asa_graphs)}
+
+        def element_reference(value: ASAElement | DiskElementReference) -> int | Tuple[int, int | float | str]:
+            """Elements of disk graphs are referenced by (graph position, key), as they are loaded on demand."""
+            if isinstance(value, DiskElementReference):
+                return graph_positions[id(value.graph)], value.key
+            return element_positions[id(value)]
+
+        def element_position(element: ASAElement | None) -> int:
+            return -1 if element is None else element_positions[id(element)]
+
+        return {
+            'fields': {f.name: getattr(self, f.name) for f in fields(self) if f.name not in ('_adjacency', '_parents')},
+            'elements': elements,
+            'objects': all_objects,
+            'bl': [(element_position(element.bl_prev), element_position(element.bl_next)) for element in elements],
+            'element_objects': [[object_positions[id(object_node)] for object_node in element.magn_objects]
+                                for element in elements],
+            'object_values': [[element_reference(value) for value in object_node.stored_values()]
+                              for object_node in all_objects],
+            'object_objects': [[object_positions[id(child)] for child in object_node.objects]
+                               for object_node in all_objects],
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        for name, value in state['fields'].items():
+            setattr(self, name, value)
+        self._adjacency = None
+
+        elements: List[ASAElement] = state['elements']
+        all_objects: List[MAGNObjectNode] = state['objects']
+
+        for element, (prev_position, next_position) in zip(elements, state['bl']):
+            element.bl_prev = None if prev_position < 0 else elements[prev_position]
+            element.bl_next = None if next_position < 0 else elements[next_position]
+
+        for element, positions in zip(elements, state['element_objects']):
+            element.magn_objects = [all_objects[position] for position in positions]
+
+        for object_node, references in zip(all_objects, state['object_values']):
+            for reference in references:
+                if isinstance(reference, int):
+                    object_node.add_value(elements[reference])
+                else:
+                    object_node.add_reference(self.asa_graphs[reference[0]].reference(reference[1]))
+
+        self._parents = {}
+        for object_node, positions in zip(all_objects, state['object_objects']):
+            object_node.objects = [all_objects[position] for position in positions]
+            self._objects_by_index[object_node.index] = object_node
+            for child in object_node.objects:
+                self._parents.setdefault(child.index, []).append(object_node.index)
+
+    def enable_prediction_cache(self, maxsize: int = 1024) -> None:
+        """
+        Cache predictions of the same set of activated elements and target feature. Cached predictions are dropped
+        whenever a new priority version is published.
+
+        :param maxsize: the maximal number of cached predictions
+        """
+        self.prediction_cache = PredictionCache(maxsize)
+
+    def disable_prediction_cache(self) -> None:
+        """Stop caching predictions."""
+        self.prediction_cache = None
+
+    def materialize(self, targets: Iterable[str], features: Iterable[str] | None = None,
+                    budget: TraversalBudget | None = None) -> StimulationIndex:
+        """
+        Precompute the stimulation vector of every element for every target feature, so the exact prediction of
+        these targets only looks up the vectors of the known values and picks the strongest value. The vectors are
+        computed with the current priority version. After a new version is published, all of them are recomputed: at
+        the end of fit and fit_stream, or otherwise by the first materialised prediction with the new version.
+        Refreshing costs as much as materialising, so the versions fit publishes every batch_size rows are only
+        refreshed if predictions run during the training, and then once per version.
+
+        The prediction combines the vectors by taking the strongest stimulation over all known values, like the
+        path search does, so the materialised predictions are identical to the computed ones.
+
+        :param targets: the target features
+        :param features: the features whose elements are precomputed as sources, None for all features. Elements of
+        other features are computed on their first prediction.
+        :param budget: the traversal budget of the vectors. Only predictions with the same budget use them.
+        :return: the index of the vectors, also stored in stimulation_index
+        """
+        targets = frozenset(targets)
+        for target in targets:
+            self.get_asa_by_name(target)
+
+        index = StimulationIndex(targets, budget)
+        self.stimulation_index = index
+
+        priorities = self.priorities.pin()
+        features = None if features is None else set(features)
+        for asa_graph in self.asa_graphs:
+            if features is not None and asa_graph.name not in features:
+                continue
+
+            for element in asa_graph.iter_elements():
+                for target in targets:
+                    if asa_graph.name != target:
+                        index.put((element.index, target), priorities.version,
+                                  self._stimulation_vector(element, target, priorities, budget))
 
-    def predict(self, data: pd.Series, target: str) -> int | float | str:
-        data_no_target = data
-        if target in data_no_target.keys():
-            data_no_target = data_no_target.drop(target)
-        asa_graphs = [asa for asa in self.asa_graphs if asa.name in data_no_target.keys()]
-        activated_neurons = list(map(lambda _asa: _asa.search(data_no_target[_asa.name]), asa_graphs))
-        activated_neurons = [an for an in activated_neurons if an is not None]  # TODO: highly irresponsible
+        return index
 
-        return self._calculate_prediction(activated_neurons, target)
+    def dematerialize(self) -> None:
+        """Drop the stimulation vectors, predictions search the paths again."""
+        self.stimulation_index = None
+
+    def _refresh_materialized(self, priorities: PriorityVersion) -> None:
+        """Recompute the materialised vectors computed with priority versions older than the given one."""
+        index = self.stimulation_index
+        if index is None:
+            return
+
+        stale = set(index.take_stale(priorities.version))
+        if not stale:
+            return
+
+        for asa_graph in self.asa_graphs:
+            for element in asa_graph.iter_elements():
+                for target in index.targets:
+                    key = (element.index, target)
+                    if key in stale:
+                        index.put(key, priorities.version,
+                                  self._stimulation_vector(element, target, priorities, index.budget))
+
+    def _stimulation_vector(self, source: ASAElement, target: str, priorities: PriorityVersion,
+                            budget: TraversalBudget | None) -> StimulationVector:
+        """
+        Returns the stimulations of the values of the target feature reached from the source element: the highest
+        stimulation of a path to every value, ordered so that the first entry is the value _calculate_prediction
+        would predict from the source alone.
+        """
+        trie = self._path_trie(source, target, budget)
+        stimulation = self._trie_stimulation(trie, priorities)
+
+        # Several ASA graphs may share the name of the target feature, so the elements are merged by their value.
+        # value => (stimulation, position of the first path reaching the value with the stimulation)
+        strongest: Dict[int | float | str, Tuple[float, int]] = {}
+        for position, end in enumerate(trie.ends):
+            element = trie.nodes[end]
+            if not isinstance(element, ASAElement):
+                raise ValueError("Implementation error. The target feature is not an ASA element.")
+
+            entry = strongest.get(element.value)
+            if entry is None or stimulation[end] > entry[0]:
+                strongest[element.value] = (stimulation[end], position)
+
+        values = sorted(strongest, key=lambda value: (-strongest[value][0], strongest[value][1]))
+        return StimulationVector(tuple(values), array('d', (strongest[value][0] for value in values)))
+
+    def reset_priorities(self) -> None:
+        """
+        Reset the priorities of all elements and objects to their initial value. The structure of the graph is left
+        untouched, so the same graph can be trained again from scratch without calling from_database.
+        """
+        self.priorities.reset()
+        self._refresh_materialized(self.priorities.pin())
+
+    def query(self, table: str, conditions: Iterable[Condition], follow_foreign_keys: bool = True
+              ) -> List[MAGNObjectNode]:
+        """
+        Find the objects of the table that satisfy all conditions. Every condition is resolved to ASA elements (a single
+        search for Equals, a walk along the bidirectional linked list for Between) and the objects connected to them
+        are collected as a set of object indexes. The sets are intersected from the smallest one.
+
+        :param table: the table of the returned objects
+        :param conditions: the conditions, all of which have to be satisfied
+        :param follow_foreign_keys: if True, conditions on features of other tables are satisfied by the objects
+        connected with the matching objects of the other table by a path of foreign keys. If False, only the features
+        of the table are matched
+        :return: the matching objects ordered by their index. They are looked up by their indexes, so the objects of
+        the table are not scanned
+        """
+        if table not in self.objects:
+            raise ValueError(f"Table {table} not found in the MAGN graph.")
+
+        matches = [self._query_condition(table, condition, follow_foreign_keys) for condition in conditions]
+        if not matches:
+            return list(self.objects[table])
+
+        matches.sort(key=len)
+        result = matches[0]
+        for match in matches[1:]:
+            if not result:
+                break
+            result = result & match
+
+        return [self._objects_by_index[index] for index in sorted(result)]
+
+    def _query_condition(self, table: str, condition: Condition, follow_foreign_keys: bool) -> Set[int]:
+        """
+        Returns indexes of the objects of the table satisfying the condition.
+        """
+        # (table) => (objects of the table satisfying the condition)
+        matching_objects: Dict[str, Dict[int, MAGNObjectNode]] = {}
+
+        for asa_graph in self.asa_graphs:
+            if asa_graph.name != condition.feature:
+                continue
+
+            if isinstance(condition, Equals):
+                element = asa_graph.search(condition.value)
+                elements = [] if element is None else [element]
+            else:
+                elements = asa_graph.range_elements(condition.lo, condition.hi)
+
+            for element in elements:
+                for object_node in element.magn_objects:
+                    if condition.table is None or object_node.clazz == condition.table:
+                        matching_objects.setdefault(object_node.clazz, {})[object_node.index] = object_node
+
+        indexes = set(matching_objects.pop(table, {}))
+        if not follow_foreign_keys:
+            if condition.feature not in self._table_features(table):
+                raise ValueError(f"Feature {condition.feature} is not a feature of table {table}.")
+            return indexes
+
+        for objects in matching_objects.values():
+            indexes |= self._follow_foreign_keys(objects, table)
+
+        return indexes
+
+    def _table_features(self, table: str) -> Set[str]:
+        """
+        Returns the names of the features of the table, read from the values of one of its objects.
+        """
+        object_node = next(iter(self.objects.get(table, ())), None)
+        if object_node is None:
+            return set()
+
+        return {value.graph.name if isinstance(value, DiskElementReference) else value.feature
+                for value in object_node.stored_values()}
+
+    def _follow_foreign_keys(self, objects: Dict[int, MAGNObjectNode], table: str) -> Set[int]:
+        """
+        Returns indexes of the objects of the table connected with any of the given objects by a path of foreign keys.
+        The connections are followed in both directions, one table at a time, and the tables closest to the given
+        objects are searched first: the objects of the table are collected on the first hop that reaches it.
+        """
+        visited = {object_node.clazz for object_node in objects.values()}
+        frontier = objects
+        while frontier:
+            reached: Dict[int, MAGNObjectNode] = {}
+            for index, object_node in frontier.items():
+                # The objects of a referenced table hold the objects referring to them
+                for child in object_node.objects:
+                    if child.clazz not in visited:
+                        reached[child.index] = child
+
+                # The objects of a referring table are held by the objects of the table they refer to
+                for parent_index in self._parents.get(index, ()):
+                    parent = self._objects_by_index[parent_index]
+                    if parent.clazz not in visited:
+                        reached[parent_index] = parent
+
+            indexes = {index for index, object_node in reached.items() if object_node.clazz == table}
+            if indexes:
+                return indexes
+
+            visited |= {object_node.clazz for object_node in reached.values()}
+            frontier = reached
+
+        return set()
+
+    def similar_objects(self, obj_or_row: MAGNObjectNode | Mapping, k: int, table: str | None = None,
+                        use_bl: bool = False) -> List[Tuple[MAGNObjectNode, float]]:
+        """
+        Find the objects most similar to the given object or row. Activation is spread from the elements of its values
+        to all objects connected with them and the objects are ranked by their accumulated stimulation.
+
+        :param obj_or_row: the query object, or a row of feature values
+        :param k: the number of returned objects
+        :param table: the table of the returned objects. None means the table of the query object, or any table for
+        a row
+        :param use_bl: if True, the activation is also spread to the bl neighbours of the elements of the values
+        :return: at most k (object, stimulation) pairs, the most stimulated first. The query object is never returned.
+        """
+        return self.similar_objects_batch([obj_or_row], k, table, use_bl)[0]
+
+    def similar_objects_batch(self, queries: Sequence[MAGNObjectNode | Mapping], k: int, table: str | None = None,
+                              use_bl: bool = False) -> List[List[Tuple[MAGNObjectNode, float]]]:
+        """
+        Batched similar_objects. All queries are processed in one pass over the compiled adjacency of the graph.
+
+        :param queries: the query objects or rows
+        :param k: the number of returned objects per query
+        :param table: the table of the returned objects (see similar_objects)
+        :param use_bl: if True, the activation is also spread to the bl neighbours of the elements of the values
+        :return: the result of similar_objects for every query
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
+
+        adjacency = self._compiled_adjacency()
+        stimulation = adjacency.spread([self._query_elements(query) for query in queries], use_bl)
+
+        results = []
+        for query, (columns, scores) in zip(queries, stimulation):
+            is_object = isinstance(query, MAGNObjectNode)
+            query_table = query.clazz if table is None and is_object else table
+
+            keep = scores > 0.0
+            if query_table is not None:
+                keep &= adjacency.object_tables[columns] == adjacency.table_codes.get(query_table, -1)
+            if is_object and query.index in adjacency.object_columns:
+                keep &= columns != adjacency.object_columns[query.index]
+
+            columns, scores = columns[keep], scores[keep]
+            if len(columns) > k:
+                best = np.sort(np.argpartition(-scores, k - 1)[:k])
+                columns, scores = columns[best], scores[best]
+            order = np.argsort(-scores, kind='stable')
+
+            results.append([(adjacency.objects[column], float(score))
+                            for column, score in zip(columns[order].tolist(), scores[order].tolist())])
+
+        return results
+
+    def _query_elements(self, obj_or_row: MAGNObjectNode | Mapping) -> List[ASAElement]:
+        """Returns the elements of the values of an object or a row."""
+        if isinstance(obj_or_row, MAGNObjectNode):
+            return list(obj_or_row.values)
+
+        elements = [asa.search(obj_or_row[asa.name]) for asa in self.asa_graphs if asa.name in obj_or_row]
+        return [element for element in elements if element is not None]
+
+    def _compiled_adjacency(self) -> CompiledAdjacency:
+        """Returns the adjacency compiled with the current priority version, compiling it if needed."""
+        from magn.adjacency import CompiledAdjacency  # pylint: disable=import-outside-toplevel
+
+        priorities = self.priorities.pin()
+        adjacency = self._adjacency
+        if adjacency is None or adjacency.version != priorities.version:
+            adjacency = CompiledAdjacency.compile(self.asa_graphs, self.objects, priorities)
+            self._adjacency = adjacency
+
+        return adjacency
 
     def get_asa_by_name(self, name: str) -> ASAGraph:
         """
@@ -114,50 +956,140 @@ class MAGNGraph:
     def _process_table(self, table: pd.DataFrame,
                        primary_keys: List[str],
                        foreign_keys: Dict[str, Tuple[str, str]],
-                       table_name: str) -> Tuple[List[ASAGraph], List[MAGNObjectNode]]:
+                       table_name: str,
+                       column_types: Dict[str, ColumnType] | None = None,
+                       quantization: Dict[str, Quantization] | None = None,
+                       deduplicate: bool = False) -> Tuple[List[ASAGraph], List[MAGNObjectNode]]:
         """
         Create an ASA graph from a table.
 
         :param table: the table
         :param primary_keys: the primary keys of said table
         :param foreign_keys: the foreign keys of said table
+        :param column_types: the declared column types of said table. Primary keys default to identifiers, the types of
+        other columns are inferred from their values.
+        :param quantization: the quantization of numeric columns of said table
+        :param deduplicate: if True, rows with identical values are represented by a single MAGN object
+        """
+        return self._process_table_chunks(lambda: iter((table,)), primary_keys, foreign_keys, table_name, column_types,
+                                          quantization, deduplicate)
+
+    def _process_table_chunks(self, chunks: Callable[[], Iterator[pd.DataFrame]],
+                              primary_keys: List[str],
+                              foreign_keys: Dict[str, Tuple[str, str]],
+                              table_name: str,
+                              column_types: Dict[str, ColumnType] | None = None,
+                              quantization: Dict[str, Quantization] | None = None,
+                              deduplicate: bool = False) -> Tuple[List[ASAGraph], List[MAGNObjectNode]]:
         """
-        # First create the ASA graphs for primary keys
-        data = table.reset_index().dropna()
+        Create the ASA graphs and MAGN objects of a table read in chunks of rows, so only one chunk is in memory at a
+        time. The chunks are read twice: first the columns of every chunk are inserted into the ASA graphs, then, once
+        the elements are registered, the objects of the rows are created. The types of the columns that are not
+        declared are inferred from the first chunk. Quantizers need all values of their column, so quantized columns
+        are collected during the first pass and their ASA graphs are built at its end.
 
-        asa_graphs = []
-        for p_key in primary_keys:
-            asa = self._create_asa_graph(data, p_key)
-            asa_graphs.append(asa)
+        :param chunks: returns a new iterator over the chunks of the table on every call (see Table.iter_chunks)
+        :param primary_keys: the primary keys of said table
+        :param foreign_keys: the foreign keys of said table
+        :param table_name: the name of said table
+        :param column_types: the declared column types of said table (see _process_table)
+        :param quantization: the quantization of numeric columns of said table
+        :param deduplicate: if True, rows with identical values are represented by a single MAGN object
+        """
+        import numpy as np  # pylint: disable=import-outside-toplevel
 
+        column_types = {} if column_types is None else column_types
+        quantization = {} if quantization is None else quantization
         processed_cols = [f_key[0] for f_key in foreign_keys.values()] + primary_keys
-        table_not_processed = data.drop(processed_cols, axis=1)
 
-        for column_name in table_not_processed.columns:
-            asa = self._create_asa_graph(table_not_processed, column_name)
-            asa_graphs.append(asa)
+        # The ASA graphs are created for primary keys first, the graphs of quantized columns once all values are known
+        columns: List[Tuple[str, ColumnType]] | None = None
+        asa_graphs: List[ASAGraph | None] = []
+        quantized_values: Dict[int, List[np.ndarray]] = {}
+        for chunk in chunks():
+            data = chunk.reset_index().dropna()
+            if columns is None:
+                columns = [(p_key, column_types.get(p_key, ColumnType.IDENTIFIER)) for p_key in primary_keys]
+                columns += [(column_name, column_types.get(column_name) or ColumnType.infer(data[column_name]))
+                            for column_name in data.drop(processed_cols, axis=1).columns]
+                for position, (column_name, column_type) in enumerate(columns):
+                    if position >= len(primary_keys) and column_name in quantization:
+                        quantized_values[position] = []
+                        asa_graphs.append(None)
+                    else:
+                        asa_graphs.append(self._create_asa_graph(column_name, column_type))
+
+            for position, (column_name, _) in enumerate(columns):
+                if position in quantized_values:
+                    quantized_values[position].append(data[column_name].to_numpy())
+                else:
+                    asa_graphs[position].bulk_insert(data[column_name].to_numpy(), column_name)
+
+        for position, values in quantized_values.items():
+            column_name, column_type = columns[position]
+            values = np.concatenate(values) if values else np.empty(0)
+            asa_graphs[position] = self._create_asa_graph(column_name, column_type,
+                                                          quantization[column_name].quantizer(values.tolist()))
+            asa_graphs[position].bulk_insert(values, column_name)
 
-        objects = self._create_magn_objects(asa_graphs, data, table_name, foreign_keys)
+        for asa in asa_graphs:
+            if isinstance(asa, CategoricalASAGraph):
+                asa.sort_codes()
+            self.column_types.setdefault(asa.name, asa.column_type)
+
+        for asa in asa_graphs:
+            for element in asa.iter_elements():
+                element.index = self.priorities.register()
+
+        objects = []
+        # (indexes of the elements of the values) => (object with these values), shared by all chunks
+        distinct_objects: Dict[Tuple[int, ...], MAGNObjectNode] = {}
+        # (index of the referred object, index of the referring object) of the connected foreign keys
+        linked_objects: Set[Tuple[int, int]] = set()
+        for chunk in chunks():
+            data = chunk.reset_index().dropna()
+            objects += self._create_magn_objects(asa_graphs, data, table_name, foreign_keys, deduplicate,
+                                                 distinct_objects, linked_objects)
 
         return asa_graphs, objects
 
-    @classmethod
-    def _create_asa_graph(cls, table: pd.DataFrame, column_name: str) -> ASAGraph:
-        column = table[column_name]
-        asa_graph = ASAGraph(column_name)
-        for value in column:
-            asa_graph.insert(value, column_name)
+    def _create_asa_graph(self, column_name: str, column_type: ColumnType, quantizer: Quantizer | None = None
+                          ) -> ASAGraph:
+        """
+        Create an empty ASA graph of a column. Its values are inserted with bulk_insert.
 
-        return asa_graph
+        :param column_name: the name of the column
+        :param column_type: the type of the column
+        :param quantizer: the quantizer of a quantized column
+        :return: the ASA graph
+        """
+        if self.storage is not None and quantizer is None:
+            file_descriptor, file = mkstemp(suffix=".sqlite", prefix=f"{column_name}-", dir=self.storage)
+            close(file_descriptor)
+            return DiskASAGraph(column_name, Path(file), self._objects_by_index, self.storage_cache_size, column_type)
+        if column_type is ColumnType.CATEGORICAL:
+            return CategoricalASAGraph(column_name)
+        if column_type is ColumnType.IDENTIFIER:
+            return IdentifierASAGraph(column_name)
+        if quantizer is not None:
+            return QuantizedASAGraph(column_name, quantizer, self.asa_order)
+        return NumericASAGraph(column_name, self.asa_order)
 
     def _create_magn_objects(self, asa_graphs: List[ASAGraph], table: pd.DataFrame, table_name: str,
-                             foreign_keys: Dict[str, Tuple[str, str]]) -> list[MAGNObjectNode]:
+                             foreign_keys: Dict[str, Tuple[str, str]], deduplicate: bool = False,
+                             distinct_objects: Dict[Tuple[int, ...], MAGNObjectNode] | None = None,
+                             linked_objects: Set[Tuple[int, int]] | None = None) -> list[MAGNObjectNode]:
         objects = []
         fk_cols = [f_key for f_key in foreign_keys.values()]
         fk_names = [f_key[0] for f_key in foreign_keys.values()]
 
+        # (indexes of the elements of the values) => (object with these values)
+        distinct_objects = {} if distinct_objects is None else distinct_objects
+        # Only deduplicated objects can be connected to the same referred object again
+        linked_objects = (set() if linked_objects is None else linked_objects) if deduplicate else None
+
         for idx, row in table.iterrows():
-            object_node = MAGNObjectNode(table_name)
+            elements = []
             for column_name, value in row.items():
                 if column_name in fk_names:
                     continue
@@ -166,27 +1098,61 @@ class MAGNGraph:
                 if element is None:
                     raise ValueError(f"Element {value} not found in the \"{column_name}\" ASA graph.")
 
-                element.magn_objects.append(object_node)
-                object_node.values.append(element)
+                elements.append(element)
+
+            values_key = tuple(element.index for element in elements)
+            object_node = distinct_objects.get(values_key) if deduplicate else None
+
+            if object_node is None:
+                object_node = MAGNObjectNode(table_name)
+                object_node.index = self.priorities.register()
+                self._objects_by_index[object_node.index] = object_node
+                for element in elements:
+                    element.magn_objects.append(object_node)
+                    object_node.add_value(element)
+
+                objects.append(object_node)
+                if deduplicate:
+                    distinct_objects[values_key] = object_node
+            else:
+                object_node.duplicates += 1
 
             for fk_name, fk_foreign_name in fk_cols:
                 fk_value = row[fk_name]
-                self._add_object_foreign_keys(object_node, fk_foreign_name, fk_value)
-            objects.append(object_node)
+                self._add_object_foreign_keys(object_node, fk_foreign_name, fk_value, linked_objects)
 
         return objects
 
-    def _add_object_foreign_keys(self, object_node: MAGNObjectNode, fk_foreign_name: str, fk_value: int | float | str):
+    def _add_object_foreign_keys(self, object_node: MAGNObjectNode, fk_foreign_name: str, fk_value: int | float | str,
+                                 linked_objects: Set[Tuple[int, int]] | None = None):
+        """
+        Connect the object to the objects referred to by its foreign key value.
+
+        :param object_node: the referring object
+        :param fk_foreign_name: the referred column
+        :param fk_value: the foreign key value
+        :param linked_objects: (index of the referred object, index of the referring object) of the connections made
+        so far, None if the objects are not deduplicated
+        """
         asa = self.get_first_asa_by_name(self.asa_graphs, fk_foreign_name)
         element = asa.search(fk_value)
         if element is None:
             raise ValueError(f"Element {fk_value} not found in the \"{fk_foreign_name}\" ASA graph.")
 
         for obj in element.magn_objects:
+            link = (obj.index, object_node.index)
+            # A deduplicated object may already be connected, if several of its rows refer to the same object
+            if object_node.duplicates > 1 and link in linked_objects:
+                continue
+
             obj.objects.append(object_node)
+            self._parents.setdefault(object_node.index, []).append(obj.index)
+            if linked_objects is not None:
+                linked_objects.add(link)
 
     def _update_priorities(self, activated_neurons: List[ASAElement], activated_columns: List[str],
-                           target_value: ASAElement, learning_rate: float) -> None:
+                           target_value: ASAElement, learning_rate: float, priorities: array,
+                           budget: TraversalBudget | None = None) -> None:
         """
         Update the priorities of the neurons in the MAGN graph.
 
@@ -194,25 +1160,45 @@ class MAGNGraph:
         :param activated_columns: columns passed in the data
         :param target_value: the target value as ASAElement in the graph
         :param learning_rate: the learning rate
+        :param priorities: the working priorities that are updated
+        :param budget: the limits of the paths searched from the target value
+        """
+        update = self._priority_update(activated_neurons, target_value, learning_rate, priorities, budget)
+        update.apply(priorities)
+
+    def _priority_update(self, activated_neurons: List[ASAElement], target_value: ASAElement, learning_rate: float,
+                         priorities: array | PriorityVersion, budget: TraversalBudget | None = None
+                         ) -> PriorityUpdate:
+        """
+        Calculate the priority updates for one row without applying them. All paths of the row are evaluated with the
+        same priorities and the factors of every node are accumulated, so each node is updated only once.
+
+        :param activated_neurons: neurons with values passed in the data
+        :param target_value: the target value as ASAElement in the graph
+        :param learning_rate: the learning rate
+        :param priorities: the priorities the activations are calculated with
+        :param budget: the limits of the paths searched from the target value to every activated neuron
+        :return: the accumulated updates
         """
-        if isinstance(target_value.key, str):
-            deltas = self._calc_delta_categorical(activated_neurons, target_value.key)
+        if self.column_types[target_value.feature] is ColumnType.NUMERIC:
+            deltas = self._calc_delta_numerical(activated_neurons, target_value.value)
         else:
-            deltas = self._calc_delta_numerical(activated_neurons, target_value.key)
-
-        for activated_neuron in activated_neurons:
-            paths = self.bfs(target_value, activated_neuron)
-            activations = [self._stimulation(path) for path in paths]
-            activations = self._normalize(activations)
-            for path, activation in zip(paths, activations):
-                neuron_idx = activated_neurons.index(path[-1])
-                delta = deltas[neuron_idx]
-
-                for neuron in path:
-                    if delta == 0.0:
-                        neuron.priority *= (1.0 + learning_rate * activation)
-                    else:
-                        neuron.priority *= (1.0 - learning_rate * delta * activation)
+            deltas = self._calc_delta_categorical(activated_neurons, target_value.value)
+
+        update = PriorityUpdate()
+        for activated_neuron, delta in zip(activated_neurons, deltas):
+            trie = self._path_trie(target_value, activated_neuron, budget)
+            stimulation = self._trie_stimulation(trie, priorities)
+            activations = self._normalize([stimulation[end] for end in trie.ends])
+            for end, activation in zip(trie.ends, activations):
+                if delta == 0.0:
+                    factor = 1.0 + learning_rate * activation
+                else:
+                    factor = 1.0 - learning_rate * delta * activation
+
+                update.multiply((neuron.index for neuron in trie.walk(end)), factor)
+
+        return update
 
     def _calc_delta_categorical(self, neurons: List[ASAElement], target_value: str) -> List[float]:
         """
@@ -225,7 +1211,7 @@ class MAGNGraph:
         deltas = []
 
         for neuron in neurons:
-            delta = 0 if neuron.key == target_value else 1
+            delta = 0 if neuron.value == target_value else 1
             deltas.append(delta)
 
         return self._normalize(deltas)
@@ -240,11 +1226,12 @@ class MAGNGraph:
         """
         deltas = []
 
+        column_types = self.column_types
         for neuron in neurons:
-            if isinstance(neuron.key, str):
-                deltas.append(0.0)
+            if column_types[neuron.feature] is ColumnType.NUMERIC:
+                deltas.append(target_value - neuron.value)
             else:
-                deltas.append(target_value - neuron.key)
+                deltas.append(0.0)
 
         return self._normalize(deltas)
 
@@ -265,30 +1252,38 @@ class MAGNGraph:
             for value in values
         ]
 
-    def _calculate_prediction(self, activated_neurons: List[ASAElement], target: str) -> int | float | str:
+    def _calculate_prediction(self, activated_neurons: List[ASAElement], target: str,
+                              priorities: array | PriorityVersion, budget: TraversalBudget | None = None
+                              ) -> int | float | str:
         """
         Calculate the prediction based on the activated neurons.
 
         :param activated_neurons: the activated neurons
         :param target: the target
+        :param priorities: the pinned priority version (or the working priorities during training)
+        :param budget: the limits of the paths searched from every activated neuron
         :return: the prediction
         """
         # go from activated_neurons to target feature (any value of target feature) with BFS
         # on all found paths, calculate the sum of the (neuron_priority * connection_weight) on the path
         # return the target value with the highest sum
 
-        paths = []
+        max_stimulation, max_element = None, None
         for neuron in activated_neurons:
-            paths += self.bfs(neuron, target)
-
-        stimulation = list(map(lambda path: self._stimulation(path), paths))
-        max_stimuli = stimulation.index(max(stimulation))
-        max_element = paths[max_stimuli][-1]
+            trie = self._path_trie(neuron, target, budget)
+            stimulation = self._trie_stimulation(trie, priorities)
+            for end in trie.ends:
+                # The first of equally stimulated paths wins
+                if max_stimulation is None or stimulation[end] > max_stimulation:
+                    max_stimulation, max_element = stimulation[end], trie.nodes[end]
+
+        if max_stimulation is None:
+            raise ValueError(f"No element of the target feature {target} is reachable from the given values.")
         if not isinstance(max_element, ASAElement):
             raise ValueError("Implementation error. The target feature is not an ASA element.")
-        return max_element.key
+        return max_element.value
 
-    def bfs(self, start_node: ASAElement, target_feature: str | ASAElement):
+    def bfs(self, start_node: ASAElement, target_feature: str | ASAElement, budget: TraversalBudget | None = None):
         """
         Traverse the MAGN graph from the start_node, while looking for target_feature with BFS.
         Returns all found unique paths
@@ -296,69 +1291,164 @@ class MAGNGraph:
         :param start_node: start node of BFS search
         :param target_feature: target feature. It can be an ASAElement (found paths will connect it with start_node) or
         string - target feature (will find all paths to any ASAElement from this target feature)
+        :param budget: the limits of the search. None searches the whole graph.
         :return: all found unique paths
         """
-        queue: deque[(AbstractNode, List[AbstractNode])] = deque(
-            [(start_node, [start_node])])  # queue of (current_node, path)
-        paths = []
+        return self._path_trie(start_node, target_feature, budget).paths()
 
-        while queue:
-            current_node, path = queue.popleft()
+    def _path_trie(self, start_node: ASAElement, target_feature: str | ASAElement,
+                   budget: TraversalBudget | None = None) -> PathTrie:
+        """
+        Enumerate the paths of bfs into a trie. A path is extended to objects not yet on it and ends at an acceptable
+        element. Paths are found in the same order as by a queue of whole paths. The budget is checked while the
+        neighbours are queued, so a node with many neighbours does not queue all of them.
 
+        :return: the trie, whose ends are the found paths
+        """
+        trie = PathTrie([start_node])
+        if self._bfs_chack_acceptable_element(start_node, target_feature):
+            trie.ends.append(0)
+            return trie
+
+        budget = TraversalBudget() if budget is None else budget
+        expanded = 0
+        queued_paths = 0
+        position = 0
+        while position < len(trie.nodes):
+            current_node = trie.nodes[position]
+            if position > 0 and isinstance(current_node, ASAElement):
+                # Only acceptable elements are appended, they end the path
+                trie.ends.append(position)
+                if budget.max_paths is not None and len(trie.ends) >= budget.max_paths:
+                    break
+
+            elif ((budget.max_depth is None or trie.depths[position] < budget.max_depth) and
+                  (budget.max_expanded_nodes is None or expanded < budget.max_expanded_nodes)):
+                expanded += 1
+                if isinstance(current_node, MAGNObjectNode):
+                    objects, values = current_node.objects, current_node.values
+                else:
+                    objects, values = current_node.magn_objects, ()
+
+                fanout = budget.fanout(len(trie.nodes), queued_paths)
+                for neighbor in objects:
+                    if fanout == 0:
+                        break
+                    if not trie.on_path(position, neighbor):
+                        trie.append(neighbor, position)
+                        fanout -= 1
+                for neighbor in values:
+                    if fanout == 0:
+                        break
+                    if self._bfs_chack_acceptable_element(neighbor, target_feature) and neighbor != start_node:
+                        trie.append(neighbor, position)
+                        queued_paths += 1
+                        fanout = min(fanout - 1, budget.fanout(len(trie.nodes), queued_paths))
+
+            position += 1
+
+        return trie
+
+    def _random_walk(self, start_node: ASAElement, start_position: int, target_feature: str,
+                     priorities: PriorityVersion, rng: Random) -> Tuple[ASAElement | None, PathRank | None]:
+        """
+        Walk randomly from the start_node until an element of the target feature is reached. The walk moves only to
+        the nodes bfs would visit, with probability proportional to the stimulation of the connection. The
+        stimulation is summed in the order of the exact search, so both give the same stimulation of a path.
+
+        :param start_node: the start node of the walk
+        :param start_position: the position of the start node among the activated elements
+        :param target_feature: the target feature
+        :param priorities: the pinned priority version
+        :param rng: the random number generator
+        :return: the reached element of the target feature and the rank of the path, or (None, None) if the walk got
+        stuck or exceeded SAMPLED_MAX_WALK_LENGTH
+        """
+        visited = {id(start_node)}
+        current_node: AbstractNode = start_node
+        stimulation = 0.0
+        choices = []
+
+        for _ in range(SAMPLED_MAX_WALK_LENGTH):
+            candidates = [neighbor for neighbor in current_node.neighbors()
+                          if id(neighbor) not in visited and (isinstance(neighbor, MAGNObjectNode) or
+                                                              self._bfs_chack_acceptable_element(neighbor,
+                                                                                                 target_feature))]
+            if not candidates:
+                return None, None
+
+            weights = [self._edge_stimulation(current_node, neighbor, priorities) for neighbor in candidates]
+            total = sum(weights)
+            choice = rng.choices(range(len(candidates)), weights if total > 0.0 else None)[0]
+
+            current_node = candidates[choice]
+            stimulation += weights[choice]
+            choices.append(choice)
             if self._bfs_chack_acceptable_element(current_node, target_feature):
-                paths.append(path)
+                return current_node, (-stimulation, start_position, len(choices), tuple(choices))
 
-            else:
-                for neighbor in current_node.neighbors():
-                    neighbor_is_object = isinstance(neighbor, MAGNObjectNode)
-                    neighbor_is_acceptable_element = (isinstance(neighbor, ASAElement) and
-                                                      self._bfs_chack_acceptable_element(neighbor, target_feature))
-                    if neighbor not in path and (neighbor_is_object or neighbor_is_acceptable_element):
-                        queue.append((neighbor, path + [neighbor]))
-        return paths
+            visited.add(id(current_node))
+
+        return None, None
 
     def _bfs_chack_acceptable_element(self, element1: ASAElement, feature: ASAElement | str) -> bool:
         if not isinstance(element1, ASAElement):
             return False
         if isinstance(feature, ASAElement):
-            return element1.key == feature.key and element1.feature == feature.feature
+            return element1.value == feature.value and element1.feature == feature.feature
         elif isinstance(feature, str):
             return element1.feature == feature
         return False
 
-    def _stimulation(self, path: List[AbstractNode]) -> float:
+    def _trie_stimulation(self, trie: PathTrie, priorities: array | PriorityVersion) -> List[float]:
+        """Returns the stimulation of the path of every entry of the trie. Each edge of the trie is computed once."""
+        stimulation = [0.0] * len(trie.nodes)
+        for position in range(1, len(trie.nodes)):
+            parent = trie.parents[position]
+            stimulation[position] = stimulation[parent] + self._edge_stimulation(trie.nodes[parent],
+                                                                                 trie.nodes[position], priorities)
+        return stimulation
+
+    def _stimulation(self, path: List[AbstractNode], priorities: array | PriorityVersion) -> float:
         stimulation = 0.0
         # Iterate over neighboring pairs
         for current_node, next_node in pairwise(path):
-            current_is_element = isinstance(current_node, ASAElement)
-            current_is_object = isinstance(current_node, MAGNObjectNode)
-            next_is_element = isinstance(next_node, ASAElement)
-            next_is_object = isinstance(next_node, MAGNObjectNode)
-
-            if current_is_element and next_is_element:
-                if current_node.bl_next is next_node:
-                    stimulation += current_node.priority * current_node.bl_next_weight
-                else:
-                    stimulation += current_node.priority * current_node.bl_prev_weight
+            stimulation += self._edge_stimulation(current_node, next_node, priorities)
 
-            if current_is_element and next_is_object:
-                stimulation += current_node.priority * current_node.magn_weight()
+        return stimulation
 
-            if current_is_object and next_is_element:
-                stimulation += current_node.priority * 1.0
+    def _edge_stimulation(self, current_node: AbstractNode, next_node: AbstractNode,
+                          priorities: array | PriorityVersion) -> float:
+        """Returns the stimulation passed from the current_node to the next_node."""
+        current_is_element = isinstance(current_node, ASAElement)
+        current_is_object = isinstance(current_node, MAGNObjectNode)
+        next_is_element = isinstance(next_node, ASAElement)
+        next_is_object = isinstance(next_node, MAGNObjectNode)
 
-            if current_is_object and next_is_object:
-                stimulation += current_node.priority * next_node.magn_weight()
+        if current_is_element and next_is_element:
+            if current_node.bl_next is next_node:
+                return priorities[current_node.index] * current_node.bl_next_weight
+            return priorities[current_node.index] * current_node.bl_prev_weight
 
-        return stimulation
+        if current_is_element and next_is_object:
+            return priorities[current_node.index] * current_node.magn_weight()
 
-    def _evaluate_model(self, train_data: pd.DataFrame, validation_data: pd.DataFrame | None):
+        if current_is_object and next_is_element:
+            return priorities[current_node.index] * 1.0
+
+        if current_is_object and next_is_object:
+            return priorities[current_node.index] * next_node.magn_weight()
+
+        return 0.0
+
+    def _evaluate_model(self, train_data: pd.DataFrame, validation_data: pd.DataFrame | None,
+                        budget: TraversalBudget | None = None):
         train_acc = []
         for _, row in train_data.iterrows():
             target = row["target"]
             x_test_no_target = row.drop("target")
-            prediction = self.predict(x_test_no_target, target)
-            train_acc.append(prediction == row[target])
+            prediction = self.predict(x_test_no_target, target, budget=budget)
+            train_acc.append(self._is_correct(prediction, target, row[target]))
 
         self.accuracy_history['train'].append(sum(train_acc) / len(train_acc))
         if validation_data is None:
@@ -368,10 +1458,22 @@ class MAGNGraph:
         for _, row in validation_data.iterrows():
             target = row["target"]
             x_test_no_target = row.drop("target")
-            prediction = self.predict(x_test_no_target, target)
-            val_acc.append(prediction == row[target])
+            prediction = self.predict(x_test_no_target, target, budget=budget)
+            val_acc.append(self._is_correct(prediction, target, row[target]))
         self.accuracy_history['validate'].append(sum(val_acc) / len(val_acc))
 
+    def _is_correct(self, prediction: int | float | str, target: str, true_value: int | float | str) -> bool:
+        """
+        Returns True if the prediction is the value of the element of the true value. A quantised target is predicted
+        as the mean of a bucket, so the prediction is correct if the true value falls into the bucket of the prediction.
+
+        :param prediction: the predicted value
+        :param target: the target feature
+        :param true_value: the true value of the target feature
+        """
+        element = self.get_first_asa_by_name(self.asa_graphs, target).search(true_value)
+        return element is not None and prediction == element.value
+
 
 
     @classmethod
@@ -1,7 +1,10 @@
-from typing import List
+from typing import Iterable, List, TYPE_CHECKING
 
 from magn.abstract_node import AbstractNode
 
+if TYPE_CHECKING:
+    from magn.asa.disk_asa_graph import DiskElementReference
+
 
 class MAGNObjectNode(AbstractNode):
     """
@@ -9,18 +12,75 @@ class MAGNObjectNode(AbstractNode):
 
     clazz:                  the class of the object. Table name in the database.
     duplicates:             integer that counts the number of duplicate objects. It is initially set to 1.
-    priority:               currently unused. The priority of the object. It is initially set to 1.0.
-    values:                 list that stores the values associated with the object.
+    index:                  index of the object in the priorities of the MAGN graph. It is -1 until the object is
+                            registered in a MAGN graph.
+    values:                 list that stores the values associated with the object. Elements of ASA graphs stored on
+                            the disk are kept as references and loaded on access (see ASAElement.reference).
     objects:                list that stores the objects associated with the object.
     """
 
     def __init__(self, clazz) -> None:
         self.clazz: str = clazz
         self.duplicates: int = 1
-        self.priority: float = 1.0
-        self.values: List[AbstractNode] = []  # ASAElements!
+        self.index: int = -1
+        self._values: List['AbstractNode | DiskElementReference'] = []  # ASAElements or references to them!
+        self._references: bool = False
         self.objects: List[MAGNObjectNode] = []
 
+    def __getstate__(self) -> dict:
+        """The references to other nodes are pickled by the MAGN graph (see MAGNGraph.__getstate__)."""
+        state = self.__dict__.copy()
+        del state['_values']
+        del state['_references']
+        del state['objects']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._values = []
+        self._references = False
+        self.objects = []
+
+    @property
+    def values(self) -> List[AbstractNode]:
+        """The elements of the values of the object. Referenced elements are loaded from the disk."""
+        if self._references:
+            return [value.resolve() for value in self._values]
+        return self._values
+
+    @values.setter
+    def values(self, elements: Iterable[AbstractNode]) -> None:
+        self._values = []
+        self._references = False
+        for element in elements:
+            self.add_value(element)
+
+    def add_value(self, element: AbstractNode) -> None:
+        """
+        Connect the object with the element of one of its values. The object keeps what the element gives as its
+        reference, so the elements of ASA graphs stored on the disk are not kept loaded by the objects.
+
+        :param element: the ASA element
+        """
+        value = element.reference()
+        if value is element:
+            self._values.append(element)
+        else:
+            self.add_reference(value)
+
+    def add_reference(self, reference: 'DiskElementReference') -> None:
+        """
+        Connect the object with an element given by its reference, without loading the element.
+
+        :param reference: the reference to the element
+        """
+        self._values.append(reference)
+        self._references = True
+
+    def stored_values(self) -> List['AbstractNode | DiskElementReference']:
+        """Returns the values as they are stored: the elements or the references to them, without loading any."""
+        return list(self._values)
+
     def neighbors(self) -> List[AbstractNode]:
         return self.objects + self.values
 
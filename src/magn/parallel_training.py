@@ -0,0 +1,121 @@
+"""Data-parallel training: priority updates of batches of rows computed in worker processes."""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing import get_all_start_methods, get_context
+from typing import final, Any, Dict, List, Optional, Self, Tuple
+
+import pandas as pd
+
+from magn.asa.asa_graph import ASAGraph
+from magn.priorities import PriorityUpdate, PriorityVersion
+from magn.traversal import TraversalBudget
+
+# State of a worker process. It is set once by the pool initializer, so the graph and the data are transferred to
+# every worker only once (and not at all when the processes are forked).
+_worker_trainer: Optional['ParallelTrainer'] = None
+
+
+@final
+@dataclass(slots=True)
+class ParallelTrainer:
+    """
+    Splits batches of training rows into contiguous shards and computes the priority updates of every shard in
+    a worker process. All rows of a batch are evaluated with the same priorities (those from the start of the batch),
+    so the workers only need the read-only graph structure and the priorities of the batch. The log-factors of the
+    shards are merged into a single update, which the caller applies to the working priorities.
+
+    magn:           the trained MAGN graph.
+    data:           the training rows without the target column.
+    targets:        the target column of every training row.
+    asa_graphs:     (column name) => (ASA graph of the column)
+    learning_rate:  the learning rate.
+    workers:        the number of worker processes.
+    deterministic:  if True, the updates of the shards are merged in the order of the shards, so the results do not
+                    depend on the scheduling of the workers. Otherwise they are merged as soon as they are computed.
+    budget:         the limits of the paths searched from every target value, None for all paths.
+    """
+    magn: Any  # MAGNGraph, not imported to avoid a circular import
+    data: pd.DataFrame
+    targets: pd.Series
+    asa_graphs: Dict[str, ASAGraph]
+    learning_rate: float
+    workers: int
+    deterministic: bool = True
+    budget: Optional[TraversalBudget] = None
+    _executor: Optional[ProcessPoolExecutor] = field(default=None, repr=False)
+
+    def __enter__(self) -> Self:
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=self._mp_context(),
+                                             initializer=_init_worker,
+                                             initargs=(self.magn, self.data, self.targets, self.asa_graphs,
+                                                       self.learning_rate, self.budget))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def batch_update(self, start: int, stop: int, priorities: PriorityVersion) -> PriorityUpdate:
+        """
+        Compute the priority update of the rows at positions [start, stop).
+
+        :param start: position of the first row of the batch
+        :param stop: position after the last row of the batch
+        :param priorities: the priorities the rows are evaluated with
+        :return: the merged update of all rows of the batch
+        """
+        if self._executor is None:
+            raise RuntimeError("ParallelTrainer must be used as a context manager.")
+
+        futures = [self._executor.submit(_shard_update, shard_start, shard_stop, priorities)
+                   for shard_start, shard_stop in self._shards(start, stop)]
+
+        update = PriorityUpdate()
+        for future in (futures if self.deterministic else as_completed(futures)):
+            update.merge(future.result())
+
+        return update
+
+    def shard_update(self, start: int, stop: int, priorities: PriorityVersion) -> PriorityUpdate:
+        """Compute the priority update of the rows at positions [start, stop). Runs in the worker process."""
+        update = PriorityUpdate()
+        for (_, row), target_col in zip(self.data.iloc[start:stop].iterrows(), self.targets.iloc[start:stop]):
+            activated_neurons, target_element = self.magn._training_elements(row, target_col, self.asa_graphs)
+            update.merge(self.magn._priority_update(activated_neurons, target_element, self.learning_rate,
+                                                    priorities, self.budget))
+
+        return update
+
+    def _shards(self, start: int, stop: int) -> List[Tuple[int, int]]:
+        """Returns [start, stop) positions of the non-empty shards of a batch. Shard sizes differ by at most one row."""
+        shard_size, remainder = divmod(stop - start, self.workers)
+        shards = []
+        for shard in range(self.workers):
+            shard_stop = start + shard_size + (1 if shard < remainder else 0)
+            if shard_stop > start:
+                shards.append((start, shard_stop))
+            start = shard_stop
+
+        return shards
+
+    @staticmethod
+    def _mp_context():
+        """Prefer forking, so the workers share the already built graph instead of unpickling a copy of it."""
+        if 'fork' in get_all_start_methods():
+            return get_context('fork')
+        return get_context()
+
+
+def _init_worker(magn: Any, data: pd.DataFrame, targets: pd.Series, asa_graphs: Dict[str, ASAGraph],
+                 learning_rate: float, budget: Optional[TraversalBudget]) -> None:
+    """Pool initializer. Stores a trainer with the shared graph and data in the worker process."""
+    global _worker_trainer  # pylint: disable=global-statement
+    _worker_trainer = ParallelTrainer(magn, data, targets, asa_graphs, learning_rate, workers=1,
+                                       budget=budget)
+
+
+def _shard_update(start: int, stop: int, priorities: PriorityVersion) -> PriorityUpdate:
+    return _worker_trainer.shard_update(start, stop, priorities)
@@ -0,0 +1,438 @@
+"""
+Table-partitioned MAGN graph. The tables of a database are assigned to worker processes, each of which builds and
+owns the ASA graphs and MAGN objects of its tables only. Foreign-key connections between objects of different
+partitions are kept as remote references, and predictions traverse them by exchanging batches of partial paths (the
+frontier) between the partitions over pipes.
+"""
+
+from dataclasses import dataclass, field
+from multiprocessing import get_all_start_methods, get_context
+from multiprocessing.connection import Connection
+from typing import final, Any, Dict, FrozenSet, List, Mapping, Optional, Self, Sequence, Set, Tuple, TYPE_CHECKING
+
+from magn.asa.asa_element import ASAElement
+from magn.asa.asa_graph import ASAGraph
+from magn.magn import MAGNGraph
+from magn.magn_object_node import MAGNObjectNode
+
+if TYPE_CHECKING:
+    from magn.asa.quantization import Quantization
+    from magn.database.database import Database
+
+# A partial path that reached a remote object:
+# (query, (activated element position, positions of the neighbours on the path), stimulation, visited objects, object)
+FrontierState = Tuple[int, Tuple[int, Tuple[int, ...]], float, FrozenSet[int], int]
+
+# The best path of a query found so far: (stimulation, path key, value of the target element)
+Candidate = Tuple[float, Tuple[int, Tuple[int, ...]], Any]
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class RemoteObjectRef:
+    """
+    A MAGN object owned by another partition, in the objects of a local MAGN object.
+
+    partition:  the partition that owns the object.
+    index:      the index of the object in the priorities of the MAGN graph.
+    duplicates: the duplicates of the object, which give the weight of the connection to it.
+    """
+    partition: int
+    index: int
+    duplicates: int = 1
+
+    def magn_weight(self) -> float:
+        """The weight of the connection to the object (see MAGNObjectNode.magn_weight)."""
+        return 1.0 / self.duplicates
+
+
+@dataclass(slots=True)
+class _PartitionGraph(MAGNGraph):
+    """A MAGN graph of the tables of one partition. Foreign keys are collected and connected once all tables exist."""
+    pending_links: List[Tuple[MAGNObjectNode, str, Any]] = field(default_factory=list)
+
+    def _add_object_foreign_keys(self, object_node: MAGNObjectNode, fk_foreign_name: str, fk_value: Any,
+                                 linked_objects: Set[Tuple[int, int]] | None = None):
+        self.pending_links.append((object_node, fk_foreign_name, fk_value))
+
+
+class _Partition:
+    """The state of a worker process: the graph of its tables and the priorities of their nodes."""
+
+    def __init__(self, partition: int, database: 'Database', tables: Sequence[str],
+                 quantization: Optional[Dict[str, 'Quantization']], deduplicate: bool):
+        self.partition = partition
+        self.graph = _PartitionGraph()
+        self.table_graphs: Dict[str, List[ASAGraph]] = {}
+        # (table name) => (index of its first node in the local priorities, number of its nodes)
+        self.local_ranges: Dict[str, Tuple[int, int]] = {}
+        self.objects_by_index: Dict[int, MAGNObjectNode] = {}
+        self.priorities: Dict[int, float] = {}
+        # (index of the referred object, partition of the referring object, index of the referring object)
+        self.linked_objects: Set[Tuple[int, int, int]] = set()
+
+        for table_name in tables:
+            table, keys = database[table_name]
+            p_keys, f_keys, column_types = keys
+
+            start = len(self.graph.priorities.working)
+            asa_graphs, objects = self.graph._process_table(  # pylint: disable=protected-access
+                table, p_keys, f_keys, table_name, column_types, quantization, deduplicate)
+            self.graph.asa_graphs += asa_graphs
+            self.graph.objects[table_name] = objects
+            self.table_graphs[table_name] = asa_graphs
+            self.local_ranges[table_name] = (start, len(self.graph.priorities.working) - start)
+
+    def describe(self) -> Dict[str, Tuple[int, List[str]]]:
+        """Returns (table name) => (number of nodes, names of the ASA graphs) of the tables of the partition."""
+        return {table: (self.local_ranges[table][1], [asa_graph.name for asa_graph in self.table_graphs[table]])
+                for table in self.table_graphs}
+
+    def assign_indexes(self, offsets: Dict[str, int]) -> List[Tuple[str, str, Any, int, int]]:
+        """
+        Move the nodes of every table to its range of the global priorities.
+
+        :param offsets: (table name) => (global index of the first node of the table)
+        :return: the foreign keys to connect, as (table, referred column, value, object index, object duplicates), in
+        the order of the rows
+        """
+        for table, asa_graphs in self.table_graphs.items():
+            shift = offsets[table] - self.local_ranges[table][0]
+            for asa_graph in asa_graphs:
+                for element in asa_graph.iter_elements():
+                    element.index += shift
+            for object_node in self.graph.objects[table]:
+                object_node.index += shift
+                self.objects_by_index[object_node.index] = object_node
+
+            self.priorities.update((index, 1.0) for index in range(offsets[table],
+                                                                   offsets[table] + self.local_ranges[table][1]))
+
+        links = [(object_node.clazz, fk_foreign_name, fk_value, object_node.index, object_node.duplicates)
+                 for object_node, fk_foreign_name, fk_value in self.graph.pending_links]
+        self.graph.pending_links.clear()
+        return links
+
+    def connect(self, links: List[Tuple[str, str, Any, int, int, int]]) -> None:
+        """
+        Connect the referred objects of the partition to the objects referring to them, in the given order.
+
+        :param links: (referred table, referred column, value, referring partition, referring object index,
+        referring object duplicates)
+        """
+        for table, column, value, partition, index, duplicates in links:
+            asa_graph = MAGNGraph.get_first_asa_by_name(self.table_graphs[table], column)
+            element = asa_graph.search(value)
+            if element is None:
+                raise ValueError(f"Element {value} not found in the \"{column}\" ASA graph.")
+
+            child = (self.objects_by_index[index] if partition == self.partition
+                     else RemoteObjectRef(partition, index, duplicates))
+            for object_node in element.magn_objects:
+                link = (object_node.index, partition, index)
+                if link not in self.linked_objects:
+                    self.linked_objects.add(link)
+                    object_node.objects.append(child)
+
+    def load_priorities(self, ranges: List[Tuple[int, Sequence[float]]]) -> None:
+        """Set the priorities of the nodes, given as (index of the first node, priorities) of every table."""
+        for start, priorities in ranges:
+            self.priorities.update(zip(range(start, start + len(priorities)), priorities))
+
+    def expand(self, targets: Dict[int, str], starts: List[Tuple[int, int, str, int, Any]],
+               frontier: List[FrontierState]) -> Tuple[Dict[int, List[FrontierState]], Dict[int, Candidate]]:
+        """
+        Enumerate the paths of the queries within the partition, from the activated elements and from the partial
+        paths that reached the objects of the partition.
+
+        :param targets: (query) => (target feature)
+        :param starts: the activated elements as (query, position, table, position of the ASA graph in the table,
+        value)
+        :param frontier: the partial paths that reached objects of the partition
+        :return: the partial paths that reached objects of other partitions, by partition, and the best path of every
+        query
+        """
+        outbox: Dict[int, List[FrontierState]] = {}
+        best: Dict[int, Candidate] = {}
+        stack: List[Tuple[int, Any, Tuple[int, Tuple[int, ...]], float, FrozenSet[int]]] = []
+
+        for query, position, table, graph_position, value in starts:
+            element = self.table_graphs[table][graph_position].search(value)
+            if element is not None:
+                stack.append((query, element, (position, ()), 0.0, frozenset()))
+        for query, key, stimulation, visited, index in frontier:
+            stack.append((query, self.objects_by_index[index], key, stimulation, visited))
+
+        while stack:
+            query, node, (position, steps), stimulation, visited = stack.pop()
+            target = targets[query]
+            for step, neighbor in enumerate(node.neighbors()):
+                key = (position, steps + (step,))
+                if isinstance(neighbor, RemoteObjectRef):
+                    if neighbor.index not in visited:
+                        outbox.setdefault(neighbor.partition, []).append(
+                            (query, key, stimulation + self.priorities[node.index] * neighbor.magn_weight(),
+                             visited | {neighbor.index}, neighbor.index))
+
+                elif isinstance(neighbor, MAGNObjectNode):
+                    if neighbor.index not in visited:
+                        stack.append((query, neighbor, key, stimulation + self._edge_stimulation(node, neighbor),
+                                      visited | {neighbor.index}))
+
+                elif isinstance(neighbor, ASAElement) and neighbor.feature == target:
+                    candidate = (stimulation + self._edge_stimulation(node, neighbor), key, neighbor.value)
+                    if query not in best or _better(candidate, best[query]):
+                        best[query] = candidate
+
+        return outbox, best
+
+    def _edge_stimulation(self, current_node: Any, next_node: Any) -> float:
+        # pylint: disable-next=protected-access
+        return self.graph._edge_stimulation(current_node, next_node, self.priorities)
+
+
+def _better(candidate: Candidate, other: Candidate) -> bool:
+    """
+    True if the candidate is a better prediction than the other one: its path has a higher stimulation, or the same
+    stimulation and it is found earlier by MAGNGraph.bfs (from an earlier activated element, shorter, or through
+    earlier neighbours), so ties are broken as in MAGNGraph.predict.
+    """
+    if candidate[0] != other[0]:
+        return candidate[0] > other[0]
+    (position, steps), (other_position, other_steps) = candidate[1], other[1]
+    return (position, len(steps), steps) < (other_position, len(other_steps), other_steps)
+
+
+def _worker_main(connection: Connection, partition: int, database: 'Database', tables: Sequence[str],
+                 quantization: Optional[Dict[str, 'Quantization']], deduplicate: bool) -> None:
+    """Build the partition and answer the commands of the coordinator until it closes the pipe."""
+    try:
+        state = _Partition(partition, database, tables, quantization, deduplicate)
+        connection.send((True, state.describe()))
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        connection.send((False, error))
+        return
+
+    while True:
+        try:
+            command, arguments = connection.recv()
+        except EOFError:
+            return
+        if command == "close":
+            return
+
+        try:
+            connection.send((True, getattr(state, command)(*arguments)))
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            connection.send((False, error))
+
+
+@final
+@dataclass(slots=True)
+class PartitionedMAGN:
+    """
+    A MAGN graph whose tables are partitioned across worker processes. Only the structure of the graph is kept by the
+    coordinator: the order of the tables and of their ASA graphs and the ranges of their nodes in the priorities.
+    The nodes are numbered as by MAGNGraph.from_database, so the priorities of a MAGN graph trained on the same database
+    can be loaded with load_priorities. Training is not partitioned.
+
+    tables:         the tables in the order they were processed (see Database.sort).
+    assignment:     (table name) => (partition owning the table).
+    asa_graphs:     (table name, ASA graph name) of all ASA graphs, in the order of MAGNGraph.asa_graphs.
+    offsets:        (table name) => (index of the first node of the table, number of its nodes).
+    """
+    tables: List[str]
+    assignment: Dict[str, int]
+    asa_graphs: List[Tuple[str, str]]
+    offsets: Dict[str, Tuple[int, int]]
+    _connections: List[Connection] = field(default_factory=list, repr=False)
+    _processes: List[Any] = field(default_factory=list, repr=False)
+
+    @classmethod
+    def from_database(cls, database: 'Database', partitions: int | Mapping[str, int],
+                      quantization: Dict[str, 'Quantization'] | None = None, deduplicate: bool = False) -> Self:
+        """
+        Build the partitions of the database in worker processes.
+
+        :param database: the database. Lazy tables are loaded only by the worker owning them.
+        :param partitions: the number of partitions, filled with the tables in a round-robin fashion, or (table name)
+        => (partition) of every table
+        :param quantization: see MAGNGraph.from_database
+        :param deduplicate: see MAGNGraph.from_database
+        :return: the partitioned graph. Close it (or use it as a context manager) to stop the workers.
+        """
+        tables = list(database.sort())
+        if isinstance(partitions, int):
+            if partitions < 1:
+                raise ValueError(f"Number of partitions must be positive, got {partitions}.")
+            assignment = {table: position % partitions for position, table in enumerate(tables)}
+        else:
+            assignment = {table: partitions[table] for table in tables}
+        n_partitions = max(assignment.values(), default=-1) + 1
+
+        context = get_context('fork') if 'fork' in get_all_start_methods() else get_context()
+        magn = cls(tables, assignment, [], {})
+        try:
+            for partition in range(n_partitions):
+                parent_connection, child_connection = context.Pipe()
+                partition_tables = [table for table in tables if assignment[table] == partition]
+                process = context.Process(target=_worker_main, daemon=True,
+                                          args=(child_connection, partition, database, partition_tables, quantization,
+                                                deduplicate))
+                process.start()
+                child_connection.close()
+                magn._connections.append(parent_connection)
+                magn._processes.append(process)
+
+            descriptions: Dict[str, Tuple[int, List[str]]] = {}
+            for partition in range(n_partitions):
+                descriptions.update(magn._receive(partition))
+
+            offset = 0
+            for table in tables:
+                n_nodes, graph_names = descriptions[table]
+                magn.offsets[table] = (offset, n_nodes)
+                magn.asa_graphs += [(table, name) for name in graph_names]
+                offset += n_nodes
+
+            links = magn._broadcast("assign_indexes", lambda partition: (
+                {table: magn.offsets[table][0] for table in tables if assignment[table] == partition},))
+            magn._connect(links)
+        except BaseException:
+            magn.close()
+            raise
+
+        return magn
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        for connection in self._connections:
+            try:
+                connection.send(("close", ()))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections.clear()
+        self._processes.clear()
+
+    def load_priorities(self, priorities: Sequence[float]) -> None:
+        """
+        Load priorities, e.g. MAGNGraph.priorities.pin() of a MAGN graph built from the same database and trained.
+
+        :param priorities: the priority of every node, indexed like the nodes of MAGNGraph.from_database
+        """
+        n_nodes = sum(n_nodes for _, n_nodes in self.offsets.values())
+        if len(priorities) != n_nodes:
+            raise ValueError(f"Expected {n_nodes} priorities, got {len(priorities)}.")
+
+        self._broadcast("load_priorities", lambda partition: ([
+            (start, list(priorities[start:start + n_nodes])) for table, (start, n_nodes) in self.offsets.items()
+            if self.assignment[table] == partition
+        ],))
+
+    def predict(self, data: Mapping, target: str) -> Any:
+        """
+        Predict the value of the target feature, as MAGNGraph.predict does in the exact mode.
+
+        :param data: the known values of the features
+        :param target: the name of the predicted feature
+        :return: the predicted value
+        """
+        return self.predict_batch([data], [target])[0]
+
+    def predict_batch(self, rows: Sequence[Mapping], targets: str | Sequence[str]) -> List[Any]:
+        """
+        Predict the values of the target features of many rows. The paths of all rows are enumerated together, in
+        rounds: every partition extends the paths within its tables and returns those reaching objects of other
+        partitions, which are sent to them in the next round.
+
+        :param rows: the known values of the features of every row
+        :param targets: the name of the predicted feature of all rows, or of every row
+        :return: the predicted values, in the order of the rows
+        """
+        if isinstance(targets, str):
+            targets = [targets] * len(rows)
+        if len(targets) != len(rows):
+            raise ValueError(f"Number of rows and targets do not match ({len(rows)} vs {len(targets)}).")
+
+        query_targets = dict(enumerate(targets))
+        starts: List[List[Tuple[int, int, str, int, Any]]] = [[] for _ in self._connections]
+        for query, (row, target) in enumerate(zip(rows, targets)):
+            graph_positions: Dict[str, int] = {}
+            for position, (table, name) in enumerate(self.asa_graphs):
+                graph_position = graph_positions[table] = graph_positions.get(table, -1) + 1
+                if name != target and name in row.keys():
+                    starts[self.assignment[table]].append((query, position, table, graph_position, row[name]))
+
+        best: Dict[int, Candidate] = {}
+        frontier: List[List[FrontierState]] = [[] for _ in self._connections]
+        first_round = True
+        while first_round or any(frontier):
+            results = self._broadcast("expand", lambda partition: (
+                query_targets, starts[partition] if first_round else [], frontier[partition]))
+            first_round = False
+
+            frontier = [[] for _ in self._connections]
+            for outbox, partition_best in results:
+                for partition, states in outbox.items():
+                    frontier[partition] += states
+                for query, candidate in partition_best.items():
+                    if query not in best or _better(candidate, best[query]):
+                        best[query] = candidate
+
+        missing = [query for query in query_targets if query not in best]
+        if missing:
+            raise ValueError(f"No element of the target feature {targets[missing[0]]} is reachable from row "
+                             f"{missing[0]}.")
+        return [best[query][2] for query in range(len(rows))]
+
+    def _connect(self, links_by_partition: List[List[Tuple[str, str, Any, int, int]]]) -> None:
+        """
+        Send every foreign key to the partition owning the referred table. Foreign keys are resolved as in
+        MAGNGraph._add_object_foreign_keys: by the first ASA graph of the referred column among the tables processed
+        before the referring table, and in the order the tables were processed.
+        """
+        links_of_table: Dict[str, List[Tuple[str, Any, int, int, int]]] = {}
+        for partition, links in enumerate(links_by_partition):
+            for table, column, value, index, duplicates in links:
+                links_of_table.setdefault(table, []).append((column, value, partition, index, duplicates))
+
+        outgoing: List[List[Tuple[str, str, Any, int, int, int]]] = [[] for _ in self._connections]
+        for position, table in enumerate(self.tables):
+            earlier_graphs = [(graph_table, name) for graph_table, name in self.asa_graphs
+                              if self.tables.index(graph_table) < position]
+            for column, value, partition, index, duplicates in links_of_table.get(table, []):
+                referred_table = next((graph_table for graph_table, name in earlier_graphs if name == column), None)
+                if referred_table is None:
+                    raise ValueError(f"ASA graph with name {column} not found.")
+                outgoing[self.assignment[referred_table]].append(
+                    (referred_table, column, value, partition, index, duplicates))
+
+        self._broadcast("connect", lambda partition: (outgoing[partition],))
+
+    def _broadcast(self, command: str, arguments: Any) -> List[Any]:
+        """Send the command to all partitions, with the arguments given by a function of the partition, and return
+        their results."""
+        for partition, connection in enumerate(self._connections):
+            connection.send((command, arguments(partition)))
+
+        # All replies are read before raising, so no reply is left in a pipe to be taken for the next one
+        replies = [connection.recv() for connection in self._connections]
+        for ok, result in replies:
+            if not ok:
+                raise result
+        return [result for _, result in replies]
+
+    def _receive(self, partition: int) -> Any:
+        ok, result = self._connections[partition].recv()
+        if not ok:
+            raise result
+        return result
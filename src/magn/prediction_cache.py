@@ -0,0 +1,83 @@
+"""Bounded LRU cache of MAGN predictions."""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import final, FrozenSet, Hashable, Optional, Tuple
+
+# (indexes of the activated elements, target feature, priority version, traversal budget)
+CacheKey = Tuple[FrozenSet[int], str, int, Optional[Hashable]]
+
+
+@final
+@dataclass(slots=True)
+class PredictionCache:
+    """
+    Least recently used cache of predictions. A prediction depends only on the set of activated elements, the target
+    feature, the priorities and the traversal budget, so these form the key. Entries of older priority versions can
+    never be hit again, therefore the whole cache is dropped as soon as a newer version is seen.
+
+    maxsize:    the maximal number of cached predictions.
+    hits:       the number of lookups answered from the cache.
+    misses:     the number of lookups not found in the cache.
+    """
+    maxsize: int = 1024
+    hits: int = 0
+    misses: int = 0
+    _entries: OrderedDict = field(default_factory=OrderedDict, repr=False)
+    _version: int = field(default=-1, repr=False)
+    _lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.maxsize < 1:
+            raise ValueError(f"Cache size must be positive, got {self.maxsize}.")
+
+    def __getstate__(self) -> tuple:
+        """The lock cannot be pickled and the entries are cheap to recompute, so only the size is kept."""
+        return (self.maxsize,)
+
+    def __setstate__(self, state: tuple) -> None:
+        (self.maxsize,) = state
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._version = -1
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: CacheKey) -> Optional[Hashable]:
+        """Returns the cached prediction or None if it is not cached."""
+        with self._lock:
+            self._invalidate_older(key[2])
+            prediction = self._entries.get(key)
+            if prediction is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return prediction
+
+    def put(self, key: CacheKey, prediction: Hashable) -> None:
+        """Stores the prediction, evicting the least recently used one when the cache is full."""
+        with self._lock:
+            self._invalidate_older(key[2])
+            if key[2] != self._version:
+                return  # Computed with a version that is already outdated.
+
+            self._entries[key] = prediction
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drops all cached predictions."""
+        with self._lock:
+            self._entries.clear()
+
+    def _invalidate_older(self, version: int) -> None:
+        if version > self._version:
+            self._entries.clear()
+            self._version = version
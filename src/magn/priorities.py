@@ -0,0 +1,135 @@
+"""Versioned priorities of the nodes (ASA elements and MAGN objects) of a MAGN graph."""
+
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from math import exp, log
+from threading import Lock
+from typing import final, Dict, Final, Iterable, Iterator
+
+# Priorities are kept within these bounds, so that long training runs can neither underflow them to zero (which could
+# never be recovered from by multiplicative updates) nor overflow them to infinity.
+MIN_PRIORITY: Final[float] = 1e-300
+MAX_PRIORITY: Final[float] = 1e300
+
+_MIN_LOG_PRIORITY: Final[float] = log(MIN_PRIORITY)
+_MAX_LOG_PRIORITY: Final[float] = log(MAX_PRIORITY)
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class PriorityVersion:
+    """
+    An immutable snapshot of the priorities of all nodes. Node priorities are looked up by the node index.
+    The values are never modified after the version is published, so a reader can pin a version and use it without
+    any synchronisation while a new version is being trained.
+
+    version:    number of the version. It increases with every published version.
+    values:     priorities of the nodes, indexed by the node index.
+    """
+    version: int
+    values: array
+
+    def __getitem__(self, index: int) -> float:
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+@final
+@dataclass(slots=True)
+class PriorityStore:
+    """
+    Holds the priorities of the nodes of a MAGN graph.
+
+    The trainer modifies the private working copy and publishes it as a new immutable version, e.g. after every
+    batch or epoch. Readers pin the current version, so they never see a partially updated set of priorities.
+    Publishing is a single reference assignment, hence it is atomic for the readers.
+
+    working:    the mutable priorities owned by the trainer.
+    current:    the latest published version.
+    """
+    working: array = field(default_factory=lambda: array('d'))
+    current: PriorityVersion = field(default_factory=lambda: PriorityVersion(0, array('d')))
+    _lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+
+    def __getstate__(self) -> tuple:
+        """The lock cannot be pickled, it is recreated in __setstate__."""
+        return self.working, self.current
+
+    def __setstate__(self, state: tuple) -> None:
+        self.working, self.current = state
+        self._lock = Lock()
+
+    def register(self) -> int:
+        """
+        Register a new node with the initial priority. The node is visible to the readers after the next publish.
+
+        :return: the index of the node
+        """
+        self.working.append(1.0)
+        return len(self.working) - 1
+
+    def pin(self) -> PriorityVersion:
+        """Returns the current version. The returned version is never modified."""
+        return self.current
+
+    def publish(self) -> PriorityVersion:
+        """Publish a copy of the working priorities as a new version."""
+        self.current = PriorityVersion(self.current.version + 1, array('d', self.working))
+        return self.current
+
+    def reset(self) -> None:
+        """Reset the working priorities to their initial value and publish them."""
+        with self._lock:
+            self.working = array('d', [1.0]) * len(self.working)
+            self.publish()
+
+    @contextmanager
+    def training(self) -> Iterator[array]:
+        """Gives exclusive write access to the working priorities. Only one trainer can modify them at a time."""
+        with self._lock:
+            yield self.working
+
+
+@final
+@dataclass(slots=True)
+class PriorityUpdate:
+    """
+    Multiplicative priority updates accumulated as sums of log-factors per node. A node on many paths is updated once
+    when the update is applied, instead of once per path.
+
+    log_factors:    (node index) => (sum of the logarithms of the factors the priority is multiplied by)
+    """
+    log_factors: Dict[int, float] = field(default_factory=dict)
+
+    def multiply(self, indexes: Iterable[int], factor: float) -> None:
+        """
+        Multiply the priorities of the given nodes by the factor. Factors that are not positive are clamped to
+        MIN_PRIORITY, as a priority can never become zero or negative.
+
+        :param indexes: the indexes of the nodes
+        :param factor: the factor
+        """
+        log_factor = log(max(factor, MIN_PRIORITY))
+        log_factors = self.log_factors
+        for index in indexes:
+            log_factors[index] = log_factors.get(index, 0.0) + log_factor
+
+    def merge(self, other: 'PriorityUpdate') -> None:
+        """Add the updates of the other PriorityUpdate to this one."""
+        log_factors = self.log_factors
+        for index, log_factor in other.log_factors.items():
+            log_factors[index] = log_factors.get(index, 0.0) + log_factor
+
+    def apply(self, priorities: array) -> None:
+        """
+        Apply the accumulated updates. The new priorities are computed in the log-space and clamped to
+        [MIN_PRIORITY, MAX_PRIORITY].
+
+        :param priorities: the working priorities
+        """
+        for index, log_factor in self.log_factors.items():
+            log_priority = log(priorities[index]) + log_factor
+            priorities[index] = exp(min(max(log_priority, _MIN_LOG_PRIORITY), _MAX_LOG_PRIORITY))
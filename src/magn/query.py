@@ -0,0 +1,39 @@
+"""Conditions of associative queries over the objects of a MAGN graph (see MAGNGraph.query)."""
+
+from dataclasses import dataclass
+from typing import final, Optional
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class Equals:
+    """
+    The feature is equal to the value.
+
+    feature:    the name of the feature (column).
+    value:      the value.
+    table:      the table of the feature. None matches the feature in every table.
+    """
+    feature: str
+    value: int | float | str
+    table: Optional[str] = None
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class Between:
+    """
+    The feature is in the closed range [lo, hi].
+
+    feature:    the name of the feature (column).
+    lo:         the lower bound.
+    hi:         the upper bound.
+    table:      the table of the feature. None matches the feature in every table.
+    """
+    feature: str
+    lo: int | float | str
+    hi: int | float | str
+    table: Optional[str] = None
+
+
+Condition = Equals | Between
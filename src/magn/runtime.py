@@ -0,0 +1,40 @@
+"""
+Inference-only entry point. Loads a saved MAGN graph (see MAGNGraph.save) and predicts values of plain rows.
+Neither pandas nor networkx is imported, so short-lived scoring processes start quickly.
+"""
+
+from pathlib import Path
+from typing import Mapping, Sequence
+
+from magn.magn import MAGNGraph
+
+
+def load(file: Path) -> MAGNGraph:
+    """
+    Load a saved MAGN graph.
+
+    :param file: the file written by MAGNGraph.save
+    :return: the graph
+    """
+    return MAGNGraph.load(file)
+
+
+def predict(magn: MAGNGraph, row: Mapping | Sequence, target: str, columns: Sequence[str] | None = None,
+            **kwargs) -> int | float | str:
+    """
+    Predict the value of the target feature of a row.
+
+    :param magn: the loaded graph
+    :param row: the known values of the features, as a mapping (e.g. a dict) or, if columns are given, as a sequence
+    of values (e.g. a tuple)
+    :param target: the name of the predicted feature
+    :param columns: the names of the values of a row given as a sequence
+    :param kwargs: passed to MAGNGraph.predict, e.g. mode="sampled"
+    :return: the predicted value
+    """
+    if not isinstance(row, Mapping):
+        if columns is None:
+            raise ValueError("Rows given as sequences of values require the column names.")
+        row = dict(zip(columns, row))
+
+    return magn.predict(row, target, **kwargs)
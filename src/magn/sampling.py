@@ -0,0 +1,136 @@
+"""Statistics of the Monte-Carlo (random walk) approximation of MAGN predictions."""
+
+from dataclasses import dataclass, field
+from math import sqrt
+from statistics import NormalDist
+from typing import final, Dict, Hashable, Tuple
+
+# The rank of a path among the paths of the exact search: the stimulation first, then the order in which the exact
+# search finds them (the position of the start element, the length of the path and the positions of the neighbours
+# chosen along it). Smaller is better.
+PathRank = Tuple[float, int, int, Tuple[int, ...]]
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class SampledPrediction:
+    """
+    Result of a sampled prediction.
+
+    value:          the predicted value, i.e. the target value with the strongest path found.
+    estimates:      (target value) => (stimulation of the strongest path to the value found by the walks)
+    reached:        (target value) => (number of walks that ended in the value)
+    intervals:      (target value) => (lower and upper bound of the confidence interval of the probability that a walk
+                    ends in the value)
+    walks:          the number of random walks the estimates are based on.
+    stopped_early:  True if the walks were stopped before the limit, because the leader was already separated.
+    """
+    value: Hashable
+    estimates: Dict[Hashable, float]
+    reached: Dict[Hashable, int]
+    intervals: Dict[Hashable, Tuple[float, float]]
+    walks: int
+    stopped_early: bool
+
+
+@final
+@dataclass(slots=True)
+class WalkStatistics:
+    """
+    Running maxima of the stimulation of every target value. The exact prediction is the value at the end of the
+    strongest path, so every walk is a sampled path and the estimate of a value is the stimulation of the strongest
+    path to it found so far. The estimates only grow towards the exact stimulations, and once the strongest path of
+    all has been walked the leader is the exact prediction, equally strong paths included.
+
+    The walks move along strong connections more often, so a value with strong paths is also reached often. The
+    probability that a walk ends in a value is estimated with a Wilson score interval, and the leader is separated
+    when the lower bound of its interval is above the upper bounds of all other values.
+
+    confidence:     the confidence level of the intervals.
+    walks:          the number of recorded walks.
+    best:           (target value) => (rank of the strongest path to the value found so far)
+    reached:        (target value) => (number of walks that ended in the value)
+    """
+    confidence: float = 0.95
+    walks: int = 0
+    best: Dict[Hashable, PathRank] = field(default_factory=dict)
+    reached: Dict[Hashable, int] = field(default_factory=dict)
+    _leader: Hashable | None = field(default=None, repr=False)
+    _z: float = field(default=0.0, repr=False)
+
+    def __post_init__(self) -> None:
+        if not 0.0 < self.confidence < 1.0:
+            raise ValueError(f"Confidence must be in (0, 1), got {self.confidence}.")
+        self._z = NormalDist().inv_cdf((1.0 + self.confidence) / 2.0)
+
+    def record(self, value: Hashable | None, rank: PathRank | None) -> None:
+        """
+        Record a walk.
+
+        :param value: the target value the walk ended in, None if it did not reach the target feature
+        :param rank: the rank of the path of the walk (see PathRank), None if it did not reach the target feature
+        """
+        self.walks += 1
+        if value is None:
+            return
+
+        self.reached[value] = self.reached.get(value, 0) + 1
+        best = self.best.get(value)
+        if best is not None and best <= rank:
+            return
+
+        self.best[value] = rank
+        if self._leader is None or rank < self.best[self._leader]:
+            self._leader = value
+
+    def estimate(self, value: Hashable) -> float:
+        """Returns the stimulation of the strongest path to the target value found so far, 0.0 if none was found."""
+        best = self.best.get(value)
+        return 0.0 if best is None else -best[0]
+
+    def interval(self, value: Hashable) -> Tuple[float, float]:
+        """
+        Returns the Wilson score interval of the probability that a walk ends in the target value. Values that no walk
+        reached get the interval of zero walks ending in them.
+        """
+        return self._wilson(self.reached.get(value, 0))
+
+    def leader(self) -> Hashable | None:
+        """Returns the target value with the strongest path found, None if no walk reached the target feature."""
+        return self._leader
+
+    def separated(self) -> bool:
+        """
+        Returns True if the leader is reached more often than any other value with high probability: the lower bound of
+        its interval lies above the upper bound of the runner-up. The runner-up is the most reached other value, or a
+        value no walk reached yet if there is none, since the walks may not have found all reachable values.
+        """
+        if self._leader is None:
+            return False
+
+        lower, _ = self.interval(self._leader)
+        runner_up = max((count for value, count in self.reached.items() if value != self._leader), default=0)
+        _, upper = self._wilson(runner_up)
+        return lower > upper
+
+    def _wilson(self, count: int) -> Tuple[float, float]:
+        """Returns the Wilson score interval of the probability of a value reached by count of the recorded walks."""
+        if self.walks == 0:
+            return 0.0, 1.0
+
+        n, z = self.walks, self._z
+        p = count / n
+        center = (p + z * z / (2 * n)) / (1 + z * z / n)
+        half_width = z / (1 + z * z / n) * sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+        return max(center - half_width, 0.0), min(center + half_width, 1.0)
+
+    def result(self, stopped_early: bool) -> SampledPrediction:
+        """Returns the sampled prediction of the recorded walks."""
+        return SampledPrediction(
+            value=self.leader(),
+            estimates={value: self.estimate(value) for value in self.best},
+            reached=dict(self.reached),
+            intervals={value: self.interval(value) for value in self.best},
+            walks=self.walks,
+            stopped_early=stopped_early,
+        )
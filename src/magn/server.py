@@ -0,0 +1,401 @@
+"""
+Prediction server. Serves a saved MAGN graph (see MAGNGraph.save) over HTTP on a TCP port or a Unix socket.
+Concurrent prediction requests are coalesced into micro-batches, which are predicted with MAGNGraph.predict_batch in
+a worker thread or in worker processes, so the event loop keeps accepting requests while a batch is computed.
+
+Endpoints:
+POST /predict   {"row": {feature: value, ...}, "target": feature} => {"prediction": value}
+                {"rows": [{...}, ...], "target": feature or [feature, ...]} => {"predictions": [value, ...]}
+GET /metrics    latency and throughput metrics
+GET /health     {"status": "ok"}
+"""
+
+import asyncio
+import json
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from http import HTTPStatus
+from pathlib import Path
+from time import perf_counter
+from typing import final, Any, Callable, Deque, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from magn.magn import MAGNGraph
+
+# (True, prediction) or (False, error message) of every row of a batch
+BatchResult = List[Tuple[bool, Any]]
+
+# Graph of a worker process. It is loaded once by the pool initializer.
+_worker_magn: Optional[MAGNGraph] = None
+
+
+@final
+@dataclass(slots=True)
+class ServerMetrics:
+    """
+    Latency and throughput metrics of a prediction server.
+
+    requests:       the number of predicted rows.
+    errors:         the number of rows whose prediction failed.
+    batches:        the number of predicted batches.
+    window:         the number of most recent latencies and batch sizes the statistics are computed from.
+    started:        the time the server started at, in seconds of perf_counter.
+    """
+    requests: int = 0
+    errors: int = 0
+    batches: int = 0
+    window: int = 10_000
+    started: float = field(default_factory=perf_counter)
+    _latencies: Deque[float] = field(default_factory=deque, repr=False)
+    _batch_sizes: Deque[int] = field(default_factory=deque, repr=False)
+
+    def __post_init__(self) -> None:
+        self._latencies = deque(maxlen=self.window)
+        self._batch_sizes = deque(maxlen=self.window)
+
+    def record_batch(self, size: int, errors: int) -> None:
+        """Record a predicted batch of the given size."""
+        self.batches += 1
+        self.requests += size
+        self.errors += errors
+        self._batch_sizes.append(size)
+
+    def record_latency(self, seconds: float) -> None:
+        """Record the time from the arrival of a row to its prediction."""
+        self._latencies.append(seconds)
+
+    def snapshot(self, queued: int = 0) -> Dict[str, float | int | None]:
+        """
+        Returns the metrics as a JSON-serialisable dictionary. Latencies are in milliseconds.
+
+        :param queued: the number of rows waiting for a batch
+        """
+        latencies = sorted(self._latencies)
+        uptime = perf_counter() - self.started
+
+        def percentile(q: float) -> float | None:
+            if not latencies:
+                return None
+            return 1000.0 * latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "queued": queued,
+            "uptime_s": uptime,
+            "throughput_rps": self.requests / uptime if uptime > 0 else 0.0,
+            "mean_batch_size": sum(self._batch_sizes) / len(self._batch_sizes) if self._batch_sizes else None,
+            "latency_p50_ms": percentile(0.50),
+            "latency_p95_ms": percentile(0.95),
+            "latency_p99_ms": percentile(0.99),
+            "latency_max_ms": 1000.0 * latencies[-1] if latencies else None,
+        }
+
+
+@final
+@dataclass(slots=True)
+class MicroBatcher:
+    """
+    Collects rows submitted by concurrent requests into batches. A batch is closed when it has max_batch_size rows
+    or when max_delay seconds have passed since its first row arrived, and is then predicted in the executor. Up to
+    max_concurrent_batches batches are predicted at once, later batches wait in the queue and keep growing.
+
+    predict:                    predicts a batch of rows and targets, called in the executor.
+    executor:                   runs the predictions.
+    max_batch_size:             the maximal number of rows of a batch.
+    max_delay:                  the maximal time (in seconds) the first row of a batch waits for more rows.
+    max_concurrent_batches:     the maximal number of batches predicted at once.
+    metrics:                    the metrics of the predictions.
+    """
+    predict: Callable[[List[Mapping], List[str]], BatchResult]
+    executor: Executor
+    max_batch_size: int = 64
+    max_delay: float = 0.005
+    max_concurrent_batches: int = 1
+    metrics: ServerMetrics = field(default_factory=ServerMetrics)
+    _queue: Optional[asyncio.Queue] = field(default=None, repr=False)
+    _slots: Optional[asyncio.Semaphore] = field(default=None, repr=False)
+    _tasks: Set[asyncio.Task] = field(default_factory=set, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.max_batch_size < 1:
+            raise ValueError(f"Batch size must be positive, got {self.max_batch_size}.")
+        if self.max_delay < 0:
+            raise ValueError(f"Delay must not be negative, got {self.max_delay}.")
+
+    @property
+    def queued(self) -> int:
+        """The number of rows waiting for a batch."""
+        return 0 if self._queue is None else self._queue.qsize()
+
+    async def submit(self, row: Mapping, target: str) -> Any:
+        """
+        Predict the value of the target feature of the row as a part of a batch.
+
+        :return: the prediction
+        :raise ValueError: if the prediction failed
+        """
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher is not running.")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, target, future, perf_counter()))
+        return await future
+
+    async def run(self) -> None:
+        """Collect and dispatch batches until cancelled."""
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_delay
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except TimeoutError:
+                        break
+
+                await self._slots.acquire()
+                task = asyncio.create_task(self._predict_batch(batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+
+    async def _predict_batch(self, batch: List[tuple]) -> None:
+        try:
+            rows = [row for row, _, _, _ in batch]
+            targets = [target for _, target, _, _ in batch]
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(self.executor, self.predict, rows, targets)
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                results = [(False, str(error))] * len(batch)
+
+            finished = perf_counter()
+            self.metrics.record_batch(len(batch), sum(1 for ok, _ in results if not ok))
+            for (_, _, future, arrived), (ok, result) in zip(batch, results):
+                self.metrics.record_latency(finished - arrived)
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(ValueError(result))
+        finally:
+            self._slots.release()
+
+
+def predict_rows(magn: MAGNGraph, rows: List[Mapping], targets: List[str]) -> BatchResult:
+    """
+    Predict a batch of rows. If the batch fails as a whole, the rows are predicted one by one, so a single invalid
+    row only fails its own request.
+
+    :return: (True, prediction) or (False, error message) of every row
+    """
+    try:
+        return [(True, prediction) for prediction in magn.predict_batch(rows, targets)]
+    except Exception:  # pylint: disable=broad-exception-caught
+        pass
+
+    results: BatchResult = []
+    for row, target in zip(rows, targets):
+        try:
+            results.append((True, magn.predict(row, target)))
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            results.append((False, f"{type(error).__name__}: {error}"))
+    return results
+
+
+def _init_worker(file: Path) -> None:
+    global _worker_magn  # pylint: disable=global-statement
+    _worker_magn = MAGNGraph.load(file)
+
+
+def _predict_rows_in_worker(rows: List[Mapping], targets: List[str]) -> BatchResult:
+    return predict_rows(_worker_magn, rows, targets)
+
+
+@final
+@dataclass(slots=True)
+class PredictionServer:
+    """
+    HTTP server of the predictions of a saved MAGN graph.
+
+    file:               the file written by MAGNGraph.save.
+    workers:            the number of worker processes. Every worker loads the graph and predicts whole batches, so
+                        several batches are predicted in parallel. 0 predicts in a single thread of the server process.
+    max_batch_size:     the maximal number of rows of a batch.
+    max_delay:          the maximal time (in seconds) a row waits for more rows to join its batch.
+    """
+    file: Path
+    workers: int = 0
+    max_batch_size: int = 64
+    max_delay: float = 0.005
+    batcher: Optional[MicroBatcher] = field(default=None, repr=False)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8000, unix_path: Path | None = None,
+                    ready: Optional[asyncio.Event] = None) -> None:
+        """
+        Serve until cancelled.
+
+        :param host: the host of the TCP server
+        :param port: the port of the TCP server
+        :param unix_path: if given, the server listens on this Unix socket instead of the TCP port
+        :param ready: set once the server accepts connections
+        """
+        with self._executor() as executor:
+            self.batcher = MicroBatcher(self._predict_function(), executor, self.max_batch_size, self.max_delay,
+                                        max(1, self.workers))
+            batcher_task = asyncio.create_task(self.batcher.run())
+            if unix_path is not None:
+                server = await asyncio.start_unix_server(self._handle_connection, unix_path)
+            else:
+                server = await asyncio.start_server(self._handle_connection, host, port)
+
+            try:
+                async with server:
+                    if ready is not None:
+                        ready.set()
+                    await server.serve_forever()
+            finally:
+                batcher_task.cancel()
+
+    def _executor(self) -> Executor:
+        if self.workers > 0:
+            return ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.file,))
+        return ThreadPoolExecutor(max_workers=1)
+
+    def _predict_function(self) -> Callable[[List[Mapping], List[str]], BatchResult]:
+        if self.workers > 0:
+            return _predict_rows_in_worker
+        return partial(predict_rows, MAGNGraph.load(self.file))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer the HTTP/1.1 requests of a connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers: Dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, payload = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(_http_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, Any]:
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, {"status": "ok"}
+        if method == "GET" and path == "/metrics":
+            return HTTPStatus.OK, self.batcher.metrics.snapshot(self.batcher.queued)
+        if path != "/predict":
+            return HTTPStatus.NOT_FOUND, {"error": f"Unknown path {path}."}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Predictions are requested with POST."}
+
+        try:
+            request = json.loads(body)
+            if "rows" in request:
+                rows, targets = request["rows"], request["target"]
+                if isinstance(targets, str):
+                    targets = [targets] * len(rows)
+                if len(rows) != len(targets):
+                    raise ValueError(f"Number of rows and targets do not match ({len(rows)} vs {len(targets)}).")
+                predictions = await asyncio.gather(*(self.batcher.submit(row, target)
+                                                     for row, target in zip(rows, targets)))
+                return HTTPStatus.OK, {"predictions": predictions}
+
+            return HTTPStatus.OK, {"prediction": await self.batcher.submit(request["row"], request["target"])}
+        except (ValueError, KeyError, TypeError) as error:
+            return HTTPStatus.BAD_REQUEST, {"error": str(error)}
+
+
+@final
+@dataclass(slots=True)
+class PredictionClient:
+    """
+    Minimal client of a prediction server, e.g. for local testing. Every call opens a new connection.
+
+    host:       the host of the TCP server.
+    port:       the port of the TCP server.
+    unix_path:  if given, the Unix socket of the server, used instead of the TCP port.
+    """
+    host: str = "127.0.0.1"
+    port: int = 8000
+    unix_path: Path | None = None
+
+    async def predict(self, row: Mapping, target: str) -> Any:
+        """Predict the value of the target feature of the row."""
+        return (await self._request("POST", "/predict", {"row": row, "target": target}))["prediction"]
+
+    async def predict_many(self, rows: Sequence[Mapping], target: str | Sequence[str]) -> List[Any]:
+        """Predict the values of the target features of the rows in a single request."""
+        return (await self._request("POST", "/predict", {"rows": list(rows), "target": target}))["predictions"]
+
+    async def metrics(self) -> Dict[str, Any]:
+        """Returns the metrics of the server."""
+        return await self._request("GET", "/metrics")
+
+    async def _request(self, method: str, path: str, payload: Any = None) -> Any:
+        if self.unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(self.unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+
+        try:
+            body = b"" if payload is None else json.dumps(payload, default=_to_json).encode()
+            writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: close\r\n"
+                         f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            headers: Dict[str, str] = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            response = json.loads(await reader.readexactly(int(headers.get("content-length", 0))))
+        finally:
+            writer.close()
+
+        if status != HTTPStatus.OK:
+            raise ValueError(f"Request failed with status {status}: {response.get('error')}")
+        return response
+
+
+def _http_response(status: HTTPStatus, payload: Any, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, default=_to_json).encode()
+    connection = "keep-alive" if keep_alive else "close"
+    return (f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {connection}\r\n\r\n").encode() + body
+
+
+def _to_json(value: Any) -> Any:
+    """Convert numpy scalars, which may be the values of elements, to Python values."""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,120 @@
+"""Materialised stimulations of the target features by every source element, for prediction by table lookup."""
+
+from array import array
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import final, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+
+from magn.traversal import TraversalBudget
+
+# (index of the source element, target feature)
+VectorKey = Tuple[int, str]
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class StimulationVector:
+    """
+    The stimulations of the values of a target feature reached from a single source element. It is sparse: only the
+    values reachable from the source are stored. The stimulation of a value is the highest stimulation of a path from
+    the source to it, as in the exact prediction.
+
+    The entries are ordered by decreasing stimulation and, among equal stimulations, by the order in which the
+    exact search finds them. The first entry is therefore the value the source alone predicts.
+
+    values:         the reached values of the target feature.
+    stimulations:   the stimulation of every value.
+    """
+    values: Tuple[Hashable, ...]
+    stimulations: array
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def as_dict(self) -> Dict[Hashable, float]:
+        """Returns (value) => (stimulation)."""
+        return dict(zip(self.values, self.stimulations))
+
+
+@final
+@dataclass(slots=True)
+class StimulationIndex:
+    """
+    The stimulation vectors of source elements, valid for a single priority version. A vector depends only on the
+    source, the target feature, the priorities and the traversal budget. When a newer priority version is seen, the
+    vectors of the older version are dropped, but their keys are kept as stale, so the graph recomputes all of them
+    for the new version (see take_stale) and the lookups keep hitting.
+
+    targets:    the target features the index is kept for.
+    budget:     the traversal budget the vectors were computed with, None for all paths.
+    refreshes:  the number of vectors computed since the index was created.
+    """
+    targets: FrozenSet[str]
+    budget: Optional[TraversalBudget] = None
+    refreshes: int = 0
+    _vectors: Dict[VectorKey, StimulationVector] = field(default_factory=dict, repr=False)
+    _stale: Set[VectorKey] = field(default_factory=set, repr=False)
+    _version: int = field(default=-1, repr=False)
+    _lock: Lock = field(default_factory=Lock, repr=False, compare=False)
+
+    def __getstate__(self) -> tuple:
+        """The lock cannot be pickled, it is recreated in __setstate__. The vectors hold plain values, so they are
+        saved with the graph and a loaded graph predicts by lookup right away."""
+        return self.targets, self.budget, self._vectors, self._stale, self._version
+
+    def __setstate__(self, state: tuple) -> None:
+        self.targets, self.budget, self._vectors, self._stale, self._version = state
+        self.refreshes = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        """The number of materialised vectors, stale ones included."""
+        return len(self._vectors) + len(self._stale)
+
+    def covers(self, target: str, budget: Optional[TraversalBudget]) -> bool:
+        """True if the index answers predictions of the target feature made with the budget."""
+        return target in self.targets and budget == self.budget
+
+    def get(self, key: VectorKey, version: int) -> Optional[StimulationVector]:
+        """Returns the vector computed with the priority version, or None if it has to be computed."""
+        with self._lock:
+            self._invalidate_older(version)
+            if version != self._version:
+                return None
+            return self._vectors.get(key)
+
+    def put(self, key: VectorKey, version: int, vector: StimulationVector) -> None:
+        """Stores the vector computed with the priority version."""
+        with self._lock:
+            self.refreshes += 1
+            self._invalidate_older(version)
+            if version != self._version:
+                return  # Computed with a version that is already outdated.
+
+            self._vectors[key] = vector
+            self._stale.discard(key)
+
+    def take_stale(self, version: int) -> List[VectorKey]:
+        """
+        Returns the keys of the vectors that have to be recomputed with the priority version and stops tracking them,
+        so concurrent callers do not recompute the same vectors. The caller stores the recomputed vectors with put.
+        """
+        with self._lock:
+            self._invalidate_older(version)
+            if version != self._version:
+                return []
+
+            stale, self._stale = sorted(self._stale), set()
+            return stale
+
+    def clear(self) -> None:
+        """Drops all vectors."""
+        with self._lock:
+            self._vectors.clear()
+            self._stale.clear()
+
+    def _invalidate_older(self, version: int) -> None:
+        if version > self._version:
+            self._stale.update(self._vectors)
+            self._vectors.clear()
+            self._version = version
@@ -0,0 +1,99 @@
+"""Representation and limits of the path enumeration of MAGNGraph.bfs."""
+
+from array import array
+from dataclasses import dataclass, field
+from sys import maxsize
+from typing import final, Iterator, List, Optional
+
+from magn.abstract_node import AbstractNode
+
+
+@final
+@dataclass(frozen=True, slots=True)
+class TraversalBudget:
+    """
+    Limits of the path enumeration from a single start node. The enumeration is breadth-first, so the paths found
+    within a budget are the shortest ones.
+
+    max_depth:              the maximal number of edges of a path.
+    max_paths:              the maximal number of found paths.
+    max_expanded_nodes:     the maximal number of nodes whose neighbours are visited.
+    max_fanout:             the maximal number of neighbours queued from a single node, e.g. an element connected with
+                            every object of a table. The first ones in the order of the search are queued.
+    max_queued:             the maximal number of path prefixes queued in total, the start node included.
+    """
+    max_depth: Optional[int] = None
+    max_paths: Optional[int] = None
+    max_expanded_nodes: Optional[int] = None
+    max_fanout: Optional[int] = None
+    max_queued: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        for name in ('max_depth', 'max_paths', 'max_expanded_nodes', 'max_fanout', 'max_queued'):
+            limit = getattr(self, name)
+            if limit is not None and limit < (0 if name == 'max_depth' else 1):
+                raise ValueError(f"Budget {name} must be {'non-negative' if name == 'max_depth' else 'positive'}, "
+                                 f"got {limit}.")
+
+    def fanout(self, queued: int, queued_paths: int) -> int:
+        """
+        Returns the number of neighbours of the expanded node that may still be queued. Nothing is queued once
+        max_paths paths are queued, as the enumeration stops before it dequeues anything queued after them.
+
+        :param queued: the number of path prefixes queued so far
+        :param queued_paths: the number of complete paths queued so far
+        """
+        if self.max_paths is not None and queued_paths >= self.max_paths:
+            return 0
+
+        return min(maxsize if self.max_fanout is None else self.max_fanout,
+                   maxsize if self.max_queued is None else max(self.max_queued - queued, 0))
+
+
+@final
+@dataclass(slots=True)
+class PathTrie:
+    """
+    The paths from a start node stored as a trie of parent pointers. Every enumerated path prefix is a single entry
+    that refers to the entry it was extended from, so extending a path does not copy it. Entries are appended in the
+    breadth-first order, so the array of entries is also the queue of the enumeration.
+
+    nodes:      the last node of every entry. The first entry is the start node.
+    parents:    the position of the entry every entry was extended from, -1 for the start node.
+    depths:     the number of edges of the path of every entry.
+    ends:       the positions of the entries that are complete paths, in the order they were found.
+    """
+    nodes: List[AbstractNode]
+    parents: array = field(default_factory=lambda: array('l', [-1]))
+    depths: array = field(default_factory=lambda: array('l', [0]))
+    ends: List[int] = field(default_factory=list)
+
+    def append(self, node: AbstractNode, parent: int) -> None:
+        """Extend the path of the parent entry by the node."""
+        self.nodes.append(node)
+        self.parents.append(parent)
+        self.depths.append(self.depths[parent] + 1)
+
+    def on_path(self, position: int, node: AbstractNode) -> bool:
+        """True if the node is on the path of the entry. Walks the parents, so it takes O(depth) time and no memory."""
+        while position >= 0:
+            if self.nodes[position] is node:
+                return True
+            position = self.parents[position]
+        return False
+
+    def walk(self, position: int) -> Iterator[AbstractNode]:
+        """Iterate over the nodes of the path of the entry, from its last node back to the start node."""
+        while position >= 0:
+            yield self.nodes[position]
+            position = self.parents[position]
+
+    def path(self, position: int) -> List[AbstractNode]:
+        """Returns the path of the entry, from the start node."""
+        path = list(self.walk(position))
+        path.reverse()
+        return path
+
+    def paths(self) -> List[List[AbstractNode]]:
+        """Returns all complete paths, in the order they were found."""
+        return [self.path(position) for position in self.ends]
@@ -0,0 +1,94 @@
+"""Shared fixtures of the tests: the mock database, a larger random database and the MAGN graphs built from them."""
+
+from random import Random
+from sqlite3 import connect
+
+import pandas as pd
+import pytest
+
+from magn.database.database import Database
+from magn.database.keys import Keys
+from magn.database.mock_database import mock_database
+from magn.magn import MAGNGraph
+
+
+def random_database(rows: int = 30, seed: int = 0) -> Database:
+    """A database of reviews and their labels with random values, larger than the mock database."""
+    rng = Random(seed)
+    reviews = pd.DataFrame(
+        data={
+            'title': [f'Album {rng.randrange(rows // 2)}' for _ in range(rows)],
+            'score': [float(rng.randrange(1, 11)) for _ in range(rows)],
+            'author': [rng.choice(['aberfeldy', 'aarktica', 'aberdeen', 'aceyalone']) for _ in range(rows)],
+            'genre': [rng.choice(['rock', 'pop', 'rap', 'jazz']) for _ in range(rows)],
+        },
+        index=pd.Index(range(rows), name='reviewId')
+    )
+    labels = pd.DataFrame(
+        data={
+            'label': [rng.choice(['rough trade', 'silber', 'better looking']) for _ in range(rows)],
+        },
+        index=pd.Index(range(rows), name='reviewId')
+    )
+
+    return Database(
+        tables={'reviews': reviews, 'labels': labels},
+        keys={
+            'reviews': Keys(primary_keys=['reviewId'], foreign_keys={}),
+            'labels': Keys(primary_keys=[], foreign_keys={'reviews': ('reviewId', 'reviewId')}),
+        }
+    )
+
+
+def sqlite_database(file) -> None:
+    """An SQLite file of artists and their albums with declared column types, and an unrelated table of logs."""
+    with connect(file) as connection:
+        connection.executescript("""
+            CREATE TABLE artists (artistId INTEGER PRIMARY KEY, name TEXT, country VARCHAR(2));
+            CREATE TABLE albums (albumId INTEGER PRIMARY KEY, artistId INTEGER REFERENCES artists(artistId),
+                                 title TEXT, year INTEGER, rating REAL, catalog TEXT, extra);
+            CREATE TABLE logs (logId INTEGER PRIMARY KEY, message TEXT);
+            INSERT INTO artists VALUES (1, 'aberfeldy', 'uk'), (2, 'aarktica', 'us'), (3, 'aceyalone', 'us');
+            INSERT INTO albums VALUES
+                (1, 1, 'Young Forever', 2004, 7.5, '001', 1.5),
+                (2, 1, 'Somewhere', 2006, 6.0, '002', 2.5),
+                (3, 2, 'No Solace', 2000, 8.0, '003', 3.5),
+                (4, 3, 'Book Of Human', 2001, 7.0, '004', 4.5),
+                (5, 3, 'Magnificent', 2006, 6.5, '005', 5.5);
+            INSERT INTO logs VALUES (1, 'created'), (2, 'loaded');
+        """)
+
+
+def feature_rows(data: pd.DataFrame) -> list:
+    """The rows of training data without the target column."""
+    return [row.drop(Database.mock_column_name) for _, row in data.iterrows()]
+
+
+@pytest.fixture
+def database() -> Database:
+    return mock_database()
+
+
+@pytest.fixture
+def magn(database: Database) -> MAGNGraph:
+    return MAGNGraph.from_database(database)
+
+
+@pytest.fixture
+def training_data(database: Database) -> pd.DataFrame:
+    return database.create_mock_target('reviews', seed_id=3)
+
+
+@pytest.fixture
+def large_database() -> Database:
+    return random_database()
+
+
+@pytest.fixture
+def large_magn(large_database: Database) -> MAGNGraph:
+    return MAGNGraph.from_database(large_database)
+
+
+@pytest.fixture
+def large_training_data(large_database: Database) -> pd.DataFrame:
+    return large_database.create_mock_target('reviews', seed_id=3)
@@ -27,7 +27,3 @@ print(x_test)
 print(x_test.keys())
 prediction = magn.predict(x_test, 'score')
 print(f"Predicted score: {prediction}, should be {x_test['score']}")
-
-# TODO: wszędzie mamy założenie, że dane kategoryczne są w postaci stringów, ale to nie zawsze jest prawda
-# id tabeli to są przecież categoricale - nie będą interpolowane jak dane regresyjne
-# przykładowy fix to wczytywanie ich jako stringi, ale potrzeba informacji o typach kolumn
@@ -0,0 +1,114 @@
+from math import ceil
+from random import Random
+
+import pytest
+
+from magn.asa.categorical_asa_graph import CategoricalASAGraph
+from magn.asa.code_table import CodeTable
+from magn.asa.disk_asa_graph import DiskASAGraph
+from magn.asa.identifier_asa_graph import IdentifierASAGraph
+from magn.asa.numeric_asa_graph import NumericASAGraph
+from magn.asa.quantization import Quantization
+from magn.asa.quantized_asa_graph import QuantizedASAGraph
+from magn.database.column_type import ColumnType
+
+RNG = Random(1)
+VALUES = [RNG.randrange(50) for _ in range(300)]
+
+
+def filled(order: int = 3, bulk: bool = False) -> NumericASAGraph:
+    asa_graph = NumericASAGraph('x', order)
+    if bulk:
+        asa_graph.bulk_insert(VALUES, 'x')
+    else:
+        for value in VALUES:
+            asa_graph.insert(value, 'x')
+    return asa_graph
+
+
+def check_aggregates(node) -> None:
+    for child in node.children:
+        check_aggregates(child)
+    assert node.total == sum(e.key_duplicates for e in node.elements) + sum(c.total for c in node.children)
+    assert node.size == len(node.elements) + sum(c.size for c in node.children)
+    assert node.key_sum == pytest.approx(sum(e.key_sum() for e in node.elements) +
+                                         sum(c.key_sum for c in node.children))
+
+
+@pytest.mark.parametrize('order, bulk', [(3, False), (3, True), (5, False), (8, True)])
+def test_aggregates_are_consistent(order, bulk):
+    asa_graph = filled(order, bulk)
+
+    check_aggregates(asa_graph.root)
+    assert asa_graph.count() == len(VALUES)
+    assert asa_graph.root.size == len(set(VALUES))
+    assert (asa_graph.root.key_min, asa_graph.root.key_max) == (min(VALUES), max(VALUES))
+
+
+@pytest.mark.parametrize('lo, hi', [(0, 49), (10, 20), (13, 13), (-5, 3), (45, 100), (30, 20)])
+def test_range_statistics_match_a_scan(lo, hi):
+    asa_graph = filled()
+    in_range = [value for value in VALUES if lo <= value <= hi]
+
+    assert asa_graph.count_range(lo, hi) == len(in_range)
+    assert asa_graph.sum_range(lo, hi) == pytest.approx(sum(in_range))
+    assert asa_graph.rank(lo) == sum(value < lo for value in VALUES)
+    assert asa_graph.rank(lo, inclusive=True) == sum(value <= lo for value in VALUES)
+
+
+@pytest.mark.parametrize('q', [0.0, 0.1, 0.5, 0.9, 1.0])
+def test_quantile_matches_sorted_values(q):
+    ordered = sorted(VALUES)
+
+    assert filled().quantile(q).key == ordered[max(1, ceil(q * len(VALUES))) - 1]
+
+
+def test_invalid_quantile_raises():
+    with pytest.raises(ValueError):
+        filled().quantile(1.5)
+
+
+def test_quantized_aggregates_sum_the_values():
+    asa_graph = QuantizedASAGraph('x', Quantization.fixed_width(10).quantizer(VALUES))
+    asa_graph.bulk_insert(VALUES, 'x')
+
+    assert asa_graph.count() == len(VALUES)
+    assert asa_graph.root.key_sum == pytest.approx(sum(VALUES))
+
+
+def unordered_graphs() -> list:
+    genres = ['rock', 'pop', 'rock', 'jazz', 'rock']
+    categorical = CategoricalASAGraph('genre', CodeTable.from_values(genres))
+    identifier = IdentifierASAGraph('reviewId')
+    for genre in genres:
+        categorical.insert(genre, 'genre')
+    for review_id in [3, 1, 2, 1]:
+        identifier.insert(review_id, 'reviewId')
+    return [categorical, identifier]
+
+
+@pytest.mark.parametrize('asa_graph, count', list(zip(unordered_graphs(), [5, 4])), ids=['categorical', 'identifier'])
+def test_unordered_graphs_count_their_values(asa_graph, count):
+    assert asa_graph.count() == count
+
+
+@pytest.mark.parametrize('asa_graph', unordered_graphs(), ids=['categorical', 'identifier'])
+def test_unordered_graphs_have_no_order_statistics(asa_graph):
+    key = next(asa_graph.iter_elements()).value
+
+    for statistic in (lambda: asa_graph.rank(key), lambda: asa_graph.count_range(key, key),
+                      lambda: asa_graph.sum_range(key, key), lambda: asa_graph.quantile(0.5)):
+        with pytest.raises(TypeError):
+            statistic()
+
+
+def test_unordered_disk_graphs_have_no_order_statistics(tmp_path):
+    asa_graph = DiskASAGraph('genre', tmp_path / 'genre.sqlite', {}, column_type=ColumnType.CATEGORICAL)
+    asa_graph.bulk_insert(['rock', 'pop', 'rock'], 'genre')
+
+    assert asa_graph.count() == 3
+    with pytest.raises(TypeError):
+        asa_graph.quantile(0.5)
+    with pytest.raises(TypeError):
+        asa_graph.rank('rock')
+    asa_graph.close()
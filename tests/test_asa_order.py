@@ -0,0 +1,84 @@
+from random import Random
+
+import pytest
+
+from magn.asa.numeric_asa_graph import NumericASAGraph
+from magn.asa.quantization import Quantization
+from magn.magn import MAGNGraph
+
+from conftest import feature_rows
+
+RNG = Random(0)
+KEYS = [RNG.randrange(300) for _ in range(500)]
+ORDERS = [3, 4, 5, 8, 16]
+
+
+def graph(order: int) -> NumericASAGraph:
+    asa_graph = NumericASAGraph('x', order)
+    for key in KEYS:
+        asa_graph.insert(key, 'x')
+    return asa_graph
+
+
+def nodes(node) -> list:
+    return [node] + [descendant for child in node.children for descendant in nodes(child)]
+
+
+def leaf_depths(node, depth: int = 0) -> set:
+    if not node.children:
+        return {depth}
+    return set().union(*(leaf_depths(child, depth + 1) for child in node.children))
+
+
+@pytest.mark.parametrize('order', [-1, 0, 2])
+def test_order_must_be_at_least_three(order):
+    with pytest.raises(ValueError):
+        NumericASAGraph('x', order)
+
+
+@pytest.mark.parametrize('order', ORDERS)
+def test_nodes_respect_the_order(order):
+    asa_graph = graph(order)
+
+    for node in nodes(asa_graph.root):
+        assert 1 <= len(node.elements) <= order - 1
+        assert node.keys() == sorted(node.keys())
+        assert not node.children or len(node.children) == len(node.elements) + 1
+    assert len(leaf_depths(asa_graph.root)) == 1
+
+
+@pytest.mark.parametrize('order', ORDERS)
+def test_bl_list_does_not_depend_on_the_order(order):
+    expected = [(element.key, element.key_duplicates) for element in graph(3).iter_elements()]
+
+    assert [(element.key, element.key_duplicates) for element in graph(order).iter_elements()] == expected
+
+
+@pytest.mark.parametrize('order', ORDERS)
+def test_search_and_ranges_do_not_depend_on_the_order(order):
+    asa_graph = graph(order)
+
+    assert all(asa_graph.search(key).key == key for key in KEYS)
+    assert asa_graph.search(-1) is None and asa_graph.search(300) is None
+    expected = sorted({key for key in KEYS if 100 <= key <= 150})
+
+    assert [element.key for element in asa_graph.range_elements(100, 150)] == expected
+
+
+def test_higher_order_gives_a_shallower_tree():
+    depths = [leaf_depths(graph(order).root).pop() for order in ORDERS]
+
+    assert depths == sorted(depths, reverse=True)
+    assert depths[-1] < depths[0]
+
+
+@pytest.mark.parametrize('quantization', [None, {'score': Quantization.quantile(4)}])
+def test_predictions_do_not_depend_on_the_order(large_database, large_training_data, quantization):
+    rows = feature_rows(large_training_data)
+    expected = MAGNGraph.from_database(large_database, quantization)
+
+    for order in (4, 7):
+        magn = MAGNGraph.from_database(large_database, quantization, asa_order=order)
+
+        assert magn.get_asa_by_name('score').order == order
+        assert [magn.predict(row, 'genre') for row in rows] == [expected.predict(row, 'genre') for row in rows]
@@ -0,0 +1,166 @@
+from random import Random
+
+import numpy as np
+import pytest
+
+from magn.asa.asa_graph import ASAGraph
+from magn.asa.categorical_asa_graph import CategoricalASAGraph
+from magn.asa.code_table import CodeTable
+from magn.asa.disk_asa_graph import DiskASAGraph
+from magn.asa.identifier_asa_graph import IdentifierASAGraph
+from magn.asa.numeric_asa_graph import NumericASAGraph
+from magn.asa.quantization import Quantization
+from magn.asa.quantized_asa_graph import QuantizedASAGraph
+from magn.magn import MAGNGraph
+
+from conftest import feature_rows
+
+RNG = Random(0)
+KEYS = [RNG.randrange(100) for _ in range(200)]
+
+
+def elements(asa_graph: ASAGraph) -> list:
+    return [
+        (type(element.value), element.value, element.key_duplicates, element.bl_prev_weight, element.bl_next_weight)
+        for element in asa_graph.iter_elements()
+    ]
+
+
+def in_order(node) -> list:
+    if not node.children:
+        return [element.key for element in node.elements]
+    keys = []
+    for child, element in zip(node.children, [*node.elements, None]):
+        keys += in_order(child)
+        if element is not None:
+            keys.append(element.key)
+    return keys
+
+
+def leaf_depths(node, depth: int = 0) -> set:
+    if not node.children:
+        return {depth}
+    return set().union(*(leaf_depths(child, depth + 1) for child in node.children))
+
+
+def incremental(asa_graph: ASAGraph, keys: list) -> ASAGraph:
+    for key in keys:
+        asa_graph.insert(key, asa_graph.name)
+    return asa_graph
+
+
+def bulk(asa_graph: ASAGraph, keys: list) -> ASAGraph:
+    asa_graph.bulk_insert(np.asarray(keys), asa_graph.name)
+    return asa_graph
+
+
+@pytest.mark.parametrize('order', [3, 4, 7])
+def test_numeric_bulk_insert_builds_the_same_graph(order):
+    expected = incremental(NumericASAGraph('x', order), KEYS)
+    actual = bulk(NumericASAGraph('x', order), KEYS)
+
+    assert elements(actual) == elements(expected)
+    assert in_order(actual.root) == sorted(set(KEYS))
+    assert len(leaf_depths(actual.root)) == 1
+    assert actual.count() == expected.count() == len(KEYS)
+    for key in set(KEYS):
+        assert actual.search(key).key_duplicates == expected.search(key).key_duplicates
+        assert actual.rank(key) == expected.rank(key)
+    assert actual.sum_range(10, 60) == expected.sum_range(10, 60)
+    assert [e.key for e in actual.range_elements(10, 60)] == [e.key for e in expected.range_elements(10, 60)]
+
+
+def test_quantized_bulk_insert_builds_the_same_graph():
+    quantizer = Quantization.fixed_width(10).quantizer(KEYS)
+    expected = incremental(QuantizedASAGraph('x', quantizer), KEYS)
+    actual = bulk(QuantizedASAGraph('x', quantizer), KEYS)
+
+    assert elements(actual) == elements(expected)
+    assert len(actual.bl()) == 10
+    assert [(e.count, e.sum, e.min, e.max) for e in actual.iter_elements()] == \
+        [(e.count, e.sum, e.min, e.max) for e in expected.iter_elements()]
+
+
+def test_categorical_bulk_insert_builds_the_same_graph():
+    values = [f'value {key % 7}' for key in KEYS]
+    code_table = CodeTable.from_values(values)
+    expected = incremental(CategoricalASAGraph('x', code_table), values)
+    actual = bulk(CategoricalASAGraph('x', code_table), values)
+
+    assert elements(actual) == elements(expected)
+
+
+def test_identifier_bulk_insert_builds_the_same_graph():
+    expected = incremental(IdentifierASAGraph('x'), KEYS)
+    actual = bulk(IdentifierASAGraph('x'), KEYS)
+
+    assert elements(actual) == elements(expected)
+    assert all(type(key) is int for key in actual.elements)
+
+
+def test_disk_bulk_insert_builds_the_same_graph(tmp_path):
+    expected = incremental(DiskASAGraph('x', tmp_path / 'expected.sqlite3', {}), KEYS)
+    actual = bulk(DiskASAGraph('x', tmp_path / 'actual.sqlite3', {}), KEYS)
+
+    assert elements(actual) == elements(expected)
+
+
+def chunked(asa_graph: ASAGraph, keys: list, size: int = 37) -> ASAGraph:
+    for start in range(0, len(keys), size):
+        asa_graph.bulk_insert(np.asarray(keys[start:start + size]), asa_graph.name)
+    return asa_graph
+
+
+def no_insert(*_):
+    raise AssertionError("bulk_insert must not insert the keys one by one")
+
+
+@pytest.mark.parametrize('order', [3, 5])
+def test_bulk_insert_into_a_filled_graph_merges_the_keys(order):
+    expected = incremental(NumericASAGraph('x', order), KEYS)
+    first = bulk(NumericASAGraph('x', order), KEYS[:100])
+    kept = first.search(KEYS[0])
+    actual = chunked(first, KEYS[100:])
+
+    assert elements(actual) == elements(expected)
+    assert in_order(actual.root) == sorted(set(KEYS))
+    assert len(leaf_depths(actual.root)) == 1
+    assert actual.search(KEYS[0]) is kept
+    assert actual.count() == len(KEYS)
+
+
+def test_quantized_chunks_merge_the_buckets():
+    quantizer = Quantization.fixed_width(10).quantizer(KEYS)
+    expected = bulk(QuantizedASAGraph('x', quantizer), KEYS)
+    actual = chunked(QuantizedASAGraph('x', quantizer), KEYS)
+
+    assert [(e.count, e.sum, e.min, e.max, e.value) for e in actual.iter_elements()] == \
+        [(e.count, e.sum, e.min, e.max, e.value) for e in expected.iter_elements()]
+
+
+def test_unordered_chunks_are_counted_without_inserting_one_by_one(monkeypatch, tmp_path):
+    values = [f'value {key % 7}' for key in KEYS]
+    expected = [incremental(CategoricalASAGraph('x', CodeTable.from_values(values)), values),
+                incremental(IdentifierASAGraph('x'), KEYS),
+                incremental(DiskASAGraph('x', tmp_path / 'expected.sqlite3', {}), KEYS)]
+
+    for asa_graph_type in (CategoricalASAGraph, IdentifierASAGraph, DiskASAGraph):
+        monkeypatch.setattr(asa_graph_type, 'insert', no_insert)
+    actual = [chunked(CategoricalASAGraph('x'), values),
+              chunked(IdentifierASAGraph('x'), KEYS),
+              chunked(DiskASAGraph('x', tmp_path / 'actual.sqlite3', {}), KEYS)]
+
+    for actual_graph, expected_graph in zip(actual, expected):
+        assert elements(actual_graph) == elements(expected_graph)
+    assert actual[0].code_table == expected[0].code_table
+    assert list(actual[1].elements) == list(expected[1].elements)
+
+
+def test_magn_graph_is_built_the_same_way(large_database, large_training_data):
+    magn = MAGNGraph.from_database(large_database)
+    rows = feature_rows(large_training_data)
+
+    for asa_graph in magn.asa_graphs:
+        assert all(type(element.value) in (int, float, str) for element in asa_graph.iter_elements())
+    for row in rows:
+        assert magn.predict(row, 'genre') in {'rock', 'pop', 'rap', 'jazz'}
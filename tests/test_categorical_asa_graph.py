@@ -0,0 +1,55 @@
+import sys
+
+from magn.asa.categorical_asa_graph import CategoricalASAGraph
+from magn.asa.code_table import CodeTable
+
+VALUES = ['rock', 'pop', 'rock', 'jazz', 'pop', 'rock']
+
+
+def test_codes_follow_the_order_of_the_values():
+    code_table = CodeTable.from_values(VALUES)
+
+    assert code_table.values == ['jazz', 'pop', 'rock']
+    assert [code_table.encode(value) for value in ('jazz', 'pop', 'rock')] == [0, 1, 2]
+    assert code_table.lookup('rap') is None
+    assert code_table.encode('rap') == 3 and code_table.decode(3) == 'rap'
+
+
+def test_values_of_mixed_types_keep_their_first_order():
+    assert CodeTable.from_values([3, 'a', 1]).values == [3, 'a', 1]
+
+
+def test_string_values_are_interned():
+    value = ''.join(['ro', 'ck'])
+    code_table = CodeTable()
+    code_table.encode(value)
+
+    assert code_table.decode(0) is sys.intern('rock')
+
+
+def test_graph_counts_duplicates_by_code():
+    asa_graph = CategoricalASAGraph('genre', CodeTable.from_values(VALUES))
+    asa_graph.bulk_insert(VALUES, 'genre')
+
+    assert asa_graph.bl() == ['jazz', 'pop', 'rock']
+    assert [(element.key, element.key_duplicates) for element in asa_graph.iter_elements()] == [(0, 1), (1, 2), (2, 3)]
+    assert asa_graph.search('pop').value == 'pop'
+    assert asa_graph.search('rap') is None
+    assert [element.value for element in asa_graph.range_elements('jazz', 'pop')] == ['jazz', 'pop']
+
+
+def test_new_values_get_new_codes():
+    asa_graph = CategoricalASAGraph('genre', CodeTable.from_values(VALUES))
+    asa_graph.bulk_insert(VALUES, 'genre')
+    asa_graph.insert('blues', 'genre')
+
+    assert asa_graph.search('blues').key == 3
+    assert asa_graph.bl() == ['jazz', 'pop', 'rock', 'blues']
+
+
+def test_string_columns_of_a_magn_graph_are_encoded(large_magn):
+    genre = large_magn.get_first_asa_by_name(large_magn.asa_graphs, 'genre')
+
+    assert isinstance(genre, CategoricalASAGraph)
+    assert all(isinstance(element.key, int) for element in genre.iter_elements())
+    assert set(genre.bl()) == {'rock', 'pop', 'rap', 'jazz'}
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from magn.asa.categorical_asa_graph import CategoricalASAGraph
+from magn.asa.identifier_asa_graph import IdentifierASAGraph
+from magn.asa.numeric_asa_graph import NumericASAGraph
+from magn.database.column_type import ColumnType
+from magn.database.database import Database
+from magn.database.keys import Keys
+from magn.magn import MAGNGraph
+
+from conftest import sqlite_database
+
+
+@pytest.mark.parametrize('declared, expected', [
+    ('INTEGER', ColumnType.NUMERIC), ('BIGINT', ColumnType.NUMERIC), ('REAL', ColumnType.NUMERIC),
+    ('DECIMAL(10,5)', ColumnType.NUMERIC), ('TEXT', ColumnType.CATEGORICAL), ('VARCHAR(2)', ColumnType.CATEGORICAL),
+    ('CLOB', ColumnType.CATEGORICAL), ('', None), ('BLOB', None),
+])
+def test_declared_types_follow_sqlite_affinity(declared, expected):
+    assert ColumnType.from_declared_type(declared) is expected
+
+
+def test_types_are_inferred_from_values():
+    assert ColumnType.infer([1, 2.5]) is ColumnType.NUMERIC
+    assert ColumnType.infer([1, 'a']) is ColumnType.CATEGORICAL
+    assert ColumnType.infer([True, False]) is ColumnType.CATEGORICAL
+
+
+def test_sqlite_schema_decides_the_graphs(tmp_path):
+    sqlite_database(tmp_path / 'music.sqlite3')
+    magn = MAGNGraph.from_sqlite3(tmp_path / 'music.sqlite3')
+    graphs = {asa_graph.name: type(asa_graph) for asa_graph in magn.asa_graphs}
+
+    assert graphs['albumId'] is graphs['artistId'] is IdentifierASAGraph
+    assert graphs['year'] is graphs['rating'] is graphs['extra'] is NumericASAGraph
+    assert graphs['title'] is graphs['country'] is graphs['catalog'] is CategoricalASAGraph
+    assert magn.column_types['catalog'] is ColumnType.CATEGORICAL
+    assert magn.column_types['year'] is ColumnType.NUMERIC
+
+
+def test_declared_types_override_inference():
+    reviews = pd.DataFrame({'score': [1.0, 2.0, 1.0], 'year': [2000, 2001, 2002]},
+                           index=pd.Index([0, 1, 2], name='id'))
+    labels = pd.DataFrame({'label': ['a', 'b', 'a']}, index=pd.Index([0, 1, 2], name='reviewId'))
+    keys = {
+        'reviews': Keys(primary_keys=['id'], foreign_keys={}, column_types={'score': ColumnType.CATEGORICAL}),
+        'labels': Keys(primary_keys=[], foreign_keys={'reviews': ('reviewId', 'id')}),
+    }
+    magn = MAGNGraph.from_database(Database({'reviews': reviews, 'labels': labels}, keys))
+    graphs = {asa_graph.name: type(asa_graph) for asa_graph in magn.asa_graphs}
+
+    assert graphs == {'id': IdentifierASAGraph, 'score': CategoricalASAGraph, 'year': NumericASAGraph,
+                      'label': CategoricalASAGraph}
+
+
+def test_identifiers_are_not_ordered(large_magn):
+    review_id = large_magn.get_first_asa_by_name(large_magn.asa_graphs, 'reviewId')
+
+    assert isinstance(review_id, IdentifierASAGraph)
+    assert review_id.search(5).value == 5
+    assert all(element.bl_next is None for element in review_id.iter_elements())
@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from magn.cross_validation import CrossValidationRunner
+from magn.magn import MAGNGraph
+
+from conftest import random_database
+
+
+def runner(workers: int) -> CrossValidationRunner:
+    return CrossValidationRunner(random_database(), 'reviews', folds=3, num_epochs=(1, 2), learning_rates=(0.1, 0.3),
+                                 workers=workers)
+
+
+def test_every_fold_and_configuration_is_evaluated():
+    results = runner(workers=1).run()
+
+    assert sorted((r.fold, r.num_epochs, r.learning_rate) for r in results) == \
+        sorted((fold, epochs, rate) for fold in range(3) for epochs in (1, 2) for rate in (0.1, 0.3))
+    assert all(0.0 <= r.train_accuracy <= 1.0 and 0.0 <= r.validation_accuracy <= 1.0 for r in results)
+
+
+def test_reused_graph_matches_fresh_graphs():
+    cross_validation = runner(workers=1)
+    results = cross_validation.run()
+
+    database = random_database()
+    data = database.create_mock_target('reviews', None, 0).sample(frac=1.0, random_state=0)
+    for result in results:
+        start, stop = cross_validation._fold_bounds(len(data))[result.fold]
+        magn = MAGNGraph.from_database(database)
+        history = magn.fit(pd.concat([data.iloc[:start], data.iloc[stop:]]), result.num_epochs, result.learning_rate,
+                           data.iloc[start:stop])
+
+        assert (result.train_accuracy, result.validation_accuracy) == (history['train'][-1], history['validate'][-1])
+
+
+def test_worker_processes_give_the_same_results():
+    assert runner(workers=2).run() == runner(workers=1).run()
+
+
+def test_fold_sizes_differ_by_at_most_one():
+    bounds = CrossValidationRunner(random_database(), 'reviews', folds=4)._fold_bounds(30)
+
+    assert [stop - start for start, stop in bounds] == [8, 8, 7, 7]
+    assert bounds[0][0] == 0 and bounds[-1][1] == 30
+
+
+def test_too_few_folds_raise():
+    with pytest.raises(ValueError):
+        CrossValidationRunner(random_database(), 'reviews', folds=1).run()
@@ -0,0 +1,73 @@
+from collections import Counter
+
+import pandas as pd
+
+from magn.database.database import Database, Keys
+from magn.magn import MAGNGraph
+from magn.query import Equals
+
+from conftest import feature_rows
+
+
+def test_identical_rows_share_an_object(large_database):
+    magn = MAGNGraph.from_database(large_database, deduplicate=True)
+    labels = large_database['labels'].data['label']
+
+    objects = magn.objects['labels']
+    assert Counter({object_node.values[0].value: object_node.duplicates for object_node in objects}) == \
+        Counter(labels)
+    assert all(object_node.magn_weight() == 1.0 / object_node.duplicates for object_node in objects)
+
+
+def test_rows_with_distinct_values_are_kept(large_database):
+    magn = MAGNGraph.from_database(large_database, deduplicate=True)
+
+    assert len(magn.objects['reviews']) == len(large_database['reviews'].data)
+    assert len(MAGNGraph.from_database(large_database).objects['labels']) == len(large_database['labels'].data)
+
+
+def test_shared_object_is_connected_once_to_every_referred_object(large_database):
+    magn = MAGNGraph.from_database(large_database, deduplicate=True)
+    labels = large_database['labels'].data['label']
+
+    for review in magn.objects['reviews']:
+        review_id = next(element.value for element in review.values if element.feature == 'reviewId')
+        assert [child.values[0].value for child in review.objects] == [labels[review_id]]
+
+
+def test_queries_are_answered_like_without_deduplication(large_database):
+    deduplicated = MAGNGraph.from_database(large_database, deduplicate=True)
+    magn = MAGNGraph.from_database(large_database)
+
+    for label in ('silber', 'rough trade', 'better looking'):
+        assert [o.index for o in deduplicated.query('reviews', [Equals('label', label)])] == \
+            [o.index for o in magn.query('reviews', [Equals('label', label)])]
+
+
+def test_deduplicated_graph_predicts(large_database, large_training_data):
+    magn = MAGNGraph.from_database(large_database, deduplicate=True)
+
+    for row in feature_rows(large_training_data):
+        assert magn.predict(row, 'label') in {'silber', 'rough trade', 'better looking'}
+
+
+def test_objects_are_connected_once_under_high_fan_in():
+    # Every score repeats in 20 rows, half of them referring to each artist
+    artists = pd.DataFrame({'country': ['uk', 'us']}, index=pd.Index([1, 2], name='artistId'))
+    scores = pd.DataFrame({'score': [score // 20 for score in range(4000)]},
+                          index=pd.Index([1, 2] * 2000, name='artistId'))
+    database = Database(
+        tables={'artists': artists, 'scores': scores},
+        keys={
+            'artists': Keys(primary_keys=['artistId'], foreign_keys={}),
+            'scores': Keys(primary_keys=[], foreign_keys={'artists': ('artistId', 'artistId')}),
+        }
+    )
+
+    magn = MAGNGraph.from_database(database, deduplicate=True)
+
+    assert len(magn.objects['scores']) == 200
+    assert all(object_node.duplicates == 20 for object_node in magn.objects['scores'])
+    for artist in magn.objects['artists']:
+        assert sorted(child.index for child in artist.objects) == \
+            sorted(object_node.index for object_node in magn.objects['scores'])
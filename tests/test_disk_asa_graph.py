@@ -0,0 +1,113 @@
+import gc
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from magn.asa.disk_asa_graph import DiskASAGraph
+from magn.database.column_type import ColumnType
+from magn.magn import MAGNGraph
+
+from conftest import feature_rows, sqlite_database
+
+
+@pytest.fixture
+def sqlite_file(tmp_path):
+    file = tmp_path / 'music.sqlite'
+    sqlite_database(file)
+    return file
+
+
+def disk_graphs(magn: MAGNGraph) -> list:
+    return [asa_graph for asa_graph in magn.asa_graphs if isinstance(asa_graph, DiskASAGraph)]
+
+
+def test_loaded_elements_are_bounded_by_cache_size(large_database, tmp_path):
+    magn = MAGNGraph.from_database(large_database, storage=tmp_path, storage_cache_size=1)
+    gc.collect()
+
+    assert disk_graphs(magn)
+    for asa_graph in disk_graphs(magn):
+        assert len(asa_graph.bl()) > 1
+        assert asa_graph.loaded_count() <= 1
+
+
+def test_loaded_elements_stay_bounded_after_predictions(large_database, large_training_data, tmp_path):
+    magn = MAGNGraph.from_database(large_database, storage=tmp_path, storage_cache_size=2)
+    for row in feature_rows(large_training_data):
+        magn.predict(row, 'genre')
+    gc.collect()
+
+    for asa_graph in disk_graphs(magn):
+        assert asa_graph.loaded_count() <= 2
+
+
+def test_objects_keep_references_to_disk_elements(database, tmp_path):
+    magn = MAGNGraph.from_database(database, storage=tmp_path, storage_cache_size=1)
+    object_node = magn.objects['reviews'][0]
+
+    assert all(not hasattr(value, 'magn_objects') for value in object_node.stored_values())
+    assert all(object_node in element.magn_objects for element in object_node.values)
+
+
+def test_disk_graph_predicts_like_memory_graph(large_database, large_training_data, tmp_path):
+    memory = MAGNGraph.from_database(large_database)
+    disk = MAGNGraph.from_database(large_database, storage=tmp_path, storage_cache_size=1)
+    rows = feature_rows(large_training_data)
+
+    for target in ('genre', 'score', 'title'):
+        assert [disk.predict(row, target) for row in rows] == [memory.predict(row, target) for row in rows]
+
+
+def test_disk_graph_trains_and_reloads_like_memory_graph(database, training_data, tmp_path):
+    memory = MAGNGraph.from_database(database)
+    disk = MAGNGraph.from_database(database, storage=tmp_path, storage_cache_size=1)
+    memory.fit(training_data, 3, 0.1)
+    disk.fit(training_data, 3, 0.1)
+
+    disk.save(tmp_path / 'magn.pkl')
+    loaded = MAGNGraph.load(tmp_path / 'magn.pkl')
+
+    rows = feature_rows(training_data)
+    assert [loaded.predict(row, 'genre') for row in rows] == [memory.predict(row, 'genre') for row in rows]
+    assert list(loaded.priorities.current.values) == list(memory.priorities.current.values)
+
+
+def test_search_insert_and_ranges(tmp_path):
+    asa_graph = DiskASAGraph('score', tmp_path / 'score.sqlite', {}, cache_size=1)
+    asa_graph.bulk_insert([3, 1, 2, 3, 5], 'score')
+    asa_graph.insert(4, 'score')
+
+    assert asa_graph.bl() == [1, 2, 3, 4, 5]
+    assert asa_graph.search(3).key_duplicates == 2
+    assert asa_graph.search(7) is None
+    assert [element.key for element in asa_graph.range_elements(2, 4)] == [2, 3, 4]
+    assert asa_graph.search(2).bl_next.key == 3
+    assert asa_graph.count() == 6
+
+
+def test_disk_graph_predicts_from_other_threads(large_database, large_training_data, tmp_path):
+    memory = MAGNGraph.from_database(large_database)
+    disk = MAGNGraph.from_database(large_database, storage=tmp_path, storage_cache_size=2)
+    rows = feature_rows(large_training_data)
+    expected = [memory.predict(row, 'genre') for row in rows]
+
+    with ThreadPoolExecutor(4) as executor:
+        results = [executor.submit(lambda: [disk.predict(row, 'genre') for row in rows]) for _ in range(4)]
+
+        assert [result.result() for result in results] == [expected] * 4
+
+
+def test_typed_disk_graphs_have_no_linked_list(sqlite_file, tmp_path):
+    memory = MAGNGraph.from_sqlite3(sqlite_file)
+    disk = MAGNGraph.from_sqlite3(sqlite_file, storage=tmp_path)
+
+    for name, column_type in (('title', ColumnType.CATEGORICAL), ('albumId', ColumnType.IDENTIFIER)):
+        asa_graph = disk.get_asa_by_name(name)
+        assert asa_graph.column_type is column_type
+        for element in asa_graph.iter_elements():
+            assert element.bl_prev is None and element.bl_next is None
+            assert element.bl_prev_weight == element.bl_next_weight == 0.0
+
+    numeric = disk.get_asa_by_name('year')
+    assert [element.bl_next_weight for element in numeric.iter_elements()] == \
+        [element.bl_next_weight for element in memory.get_asa_by_name('year').iter_elements()]
@@ -0,0 +1,62 @@
+from collections import Counter
+from io import StringIO
+from xml.etree import ElementTree
+
+import pytest
+
+from magn.export import _Writer, export_dot, export_graphml
+
+NS = {'g': 'http://graphml.graphdrawing.org/xmlns'}
+
+
+def graphml(magn, **options):
+    stream = StringIO()
+    export_graphml(magn, stream, **options)
+    root = ElementTree.fromstring(stream.getvalue())
+    return root.findall('.//g:node', NS), root.findall('.//g:edge', NS)
+
+
+def kinds(items, key: str) -> Counter:
+    return Counter(item.find(f"g:data[@key='{key}']", NS).text for item in items)
+
+
+def test_writer_is_abstract():
+    with pytest.raises(TypeError):
+        _Writer(StringIO())
+
+    class PartialWriter(_Writer):
+        def begin(self) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        PartialWriter(StringIO())
+
+
+def test_graphml_has_all_elements_and_objects(magn):
+    nodes, edges = graphml(magn)
+
+    node_kinds = kinds(nodes, 'kind')
+    assert node_kinds['element'] == sum(len(asa_graph.bl()) for asa_graph in magn.asa_graphs)
+    assert node_kinds['object'] == sum(len(objects) for objects in magn.objects.values())
+    assert kinds(edges, 'edge_kind')['value'] == sum(len(object_node.values) for objects in magn.objects.values()
+                                                      for object_node in objects)
+    assert len({node.get('id') for node in nodes}) == len(nodes)
+
+
+def test_graphml_filters(magn):
+    nodes, edges = graphml(magn, features=['score'], objects=False, max_depth=0)
+
+    assert set(kinds(nodes, 'kind')) <= {'tree', 'element'}
+    assert kinds(nodes, 'kind')['tree'] == 1
+    assert set(kinds(nodes, 'feature')) == {'score'}
+    assert set(kinds(edges, 'edge_kind')) <= {'bl'}
+
+
+def test_dot_is_written_to_a_file(magn, tmp_path):
+    export_dot(magn, tmp_path / 'magn.dot')
+    text = (tmp_path / 'magn.dot').read_text(encoding='utf-8')
+
+    assert text.startswith('digraph MAGN {')
+    assert text.endswith('}\n')
+    assert text.count('subgraph cluster') == len(magn.asa_graphs)
+    assert text.count('shape=ellipse') == sum(len(objects) for objects in magn.objects.values())
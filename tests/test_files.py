@@ -0,0 +1,110 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from magn.asa.quantization import Quantization
+from magn.database.database import Database
+from magn.database.files import FileDataReader
+from magn.database.keys import Keys
+from magn.magn import MAGNGraph
+
+from conftest import feature_rows
+
+DATA = Path(__file__).parent.parent / 'docs' / 'examples' / 'data'
+
+FILES = {'food': DATA / 'food.csv', 'animals': DATA / 'animals.csv'}
+KEYS = {
+    'food': Keys(primary_keys=['id'], foreign_keys={}),
+    'animals': Keys(primary_keys=['id'], foreign_keys={'food': ('food_type_id', 'id')}),
+}
+
+
+def test_name_column_is_kept():
+    food = FileDataReader(FILES, KEYS).read_table('food')
+
+    assert list(food['name']) == ['wiskas', 'apple', 'pedigree', 'pedigree', 'sunflower', 'water']
+    assert food.attrs['name'] == 'food'
+
+
+def test_columns_are_projected():
+    food = FileDataReader(FILES, KEYS).read_table('food', columns=['calories'])
+
+    assert list(food.columns) == ['calories']
+    assert food.index.name == 'id'
+
+
+def test_unsupported_suffix_raises(tmp_path):
+    file = tmp_path / 'food.txt'
+    file.write_text('id,name\n0,apple\n')
+
+    with pytest.raises(ValueError):
+        FileDataReader({'food': file}, {'food': KEYS['food']}).read_table('food')
+
+
+def test_parquet_matches_csv(tmp_path):
+    pytest.importorskip('pyarrow')
+    food = pd.read_csv(FILES['food'])
+    food.to_parquet(tmp_path / 'food.parquet', index=False)
+
+    from_parquet = FileDataReader({'food': tmp_path / 'food.parquet'}, {'food': KEYS['food']}).read_table('food')
+
+    pd.testing.assert_frame_equal(from_parquet, FileDataReader(FILES, KEYS).read_table('food'))
+
+
+def test_database_from_files_is_lazy_and_builds_magn():
+    database = Database.from_files(FILES, KEYS, columns={'animals': ['species']})
+
+    assert not database['food'].loaded
+    magn = MAGNGraph.from_database(database)
+    assert {asa_graph.name for asa_graph in magn.asa_graphs} >= {'name', 'calories', 'species'}
+    assert magn.predict(pd.Series({'name': 'wiskas'}), 'species') == 'cat'
+
+
+def test_predicted_keys_are_python_values(database, training_data):
+    magn = MAGNGraph.from_database(database)
+
+    for row in feature_rows(training_data):
+        prediction = magn.predict(row, 'reviewId')
+        assert type(prediction) is int
+
+
+def graph_contents(magn: MAGNGraph) -> list:
+    return [(asa_graph.name, [(element.value, element.key_duplicates, element.index)
+                              for element in asa_graph.iter_elements()])
+            for asa_graph in magn.asa_graphs]
+
+
+def test_csv_is_read_in_chunks():
+    chunks = list(FileDataReader(FILES, KEYS, chunk_size=4).iter_table('food', columns=['calories']))
+
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+    assert all(list(chunk.columns) == ['calories'] and chunk.attrs['name'] == 'food' for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), FileDataReader(FILES, KEYS).read_table('food', ['calories']))
+
+
+@pytest.mark.parametrize('quantization', [None, {'calories': Quantization.quantile(2)}])
+def test_streamed_tables_build_the_same_graph(quantization):
+    streamed = Database.from_files(FILES, KEYS, chunk_size=2)
+    loaded = Database(FileDataReader(FILES, KEYS).read(), KEYS)
+
+    magn = MAGNGraph.from_database(streamed, quantization)
+    expected = MAGNGraph.from_database(loaded, quantization)
+
+    assert not streamed['food'].loaded and not streamed['animals'].loaded
+    assert graph_contents(magn) == graph_contents(expected)
+    assert {table: len(objects) for table, objects in magn.objects.items()} == \
+        {table: len(objects) for table, objects in expected.objects.items()}
+    for name in ('wiskas', 'pedigree'):
+        assert magn.predict({'name': name}, 'species') == expected.predict({'name': name}, 'species')
+
+
+def test_streamed_tables_are_deduplicated_across_chunks(tmp_path):
+    file = tmp_path / 'animals.csv'
+    file.write_text('species,food_type_id\ncat,0\ncat,0\ndog,2\ndog,2\ncat,0\nhorse,3\n')
+    files = {'food': FILES['food'], 'animals': file}
+    keys = {'food': KEYS['food'], 'animals': Keys(primary_keys=[], foreign_keys={'food': ('food_type_id', 'id')})}
+
+    magn = MAGNGraph.from_database(Database.from_files(files, keys, chunk_size=1), deduplicate=True)
+
+    assert sorted(object_node.duplicates for object_node in magn.objects['animals']) == [1, 2, 3]
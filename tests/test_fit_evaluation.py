@@ -0,0 +1,57 @@
+from collections import Counter
+
+import pytest
+
+from magn.magn import MAGNGraph
+
+from conftest import random_database
+
+
+@pytest.mark.parametrize('size', [1, 7, 10, 29])
+def test_stratified_sample_has_the_requested_size(large_training_data, size):
+    sample = MAGNGraph._stratified_sample(large_training_data, size, seed=0)
+
+    assert len(sample) == size
+    assert sample.index.is_unique
+    assert list(sample.index) == sorted(sample.index)
+
+
+def test_stratified_sample_of_unique_targets_is_sampled(large_database):
+    data = large_database.create_mock_target('reviews', choices_iterable=['title'], seed_id=0)
+    data['title'] = [f'Album {i}' for i in range(len(data))]
+
+    assert len(MAGNGraph._stratified_sample(data, 10, seed=0)) == 10
+
+
+def test_stratified_sample_keeps_proportions_of_strata():
+    data = random_database(rows=200).create_mock_target('reviews', choices_iterable=['genre'], seed_id=0)
+    sample = MAGNGraph._stratified_sample(data, 50, seed=1)
+
+    expected = Counter(data['genre'])
+    for genre, count in Counter(sample['genre']).items():
+        assert abs(count - expected[genre] * 50 / 200) < 1
+
+
+def test_stratified_sample_without_size_keeps_all_rows(training_data):
+    assert MAGNGraph._stratified_sample(training_data, None, seed=0) is training_data
+    with pytest.raises(ValueError):
+        MAGNGraph._stratified_sample(training_data, 0, seed=0)
+
+
+def test_fit_evaluates_every_eval_every_epochs_and_the_last(magn, training_data):
+    history = magn.fit(training_data, 7, 0.1, eval_every=3)
+
+    assert history['epoch'] == [2, 5, 6]
+    assert len(history['train']) == 3
+
+
+def test_fit_stops_early_without_improvement(magn, training_data):
+    history = magn.fit(training_data, 50, 0.1, patience=2, validation_data=training_data)
+
+    assert len(history['epoch']) < 50
+    assert len(history['validate']) == len(history['epoch'])
+
+
+def test_fit_rejects_invalid_eval_interval(magn, training_data):
+    with pytest.raises(ValueError):
+        magn.fit(training_data, 1, 0.1, eval_every=0)
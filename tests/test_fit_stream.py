@@ -0,0 +1,62 @@
+from math import ceil
+
+import pytest
+
+from magn.database.database import Database
+from magn.magn import MAGNGraph
+
+
+def trained(database: Database, rows, **options) -> MAGNGraph:
+    magn = MAGNGraph.from_database(database)
+    magn.fit_stream(rows, learning_rate=0.3, **options)
+    return magn
+
+
+def test_row_formats_train_the_same_priorities(database, training_data):
+    columns = list(training_data.columns)
+    formats = [
+        [row for _, row in training_data.iterrows()],
+        [dict(row) for _, row in training_data.iterrows()],
+        [training_data.iloc[:2], training_data.iloc[2:]],
+    ]
+    expected = trained(database, (tuple(row) for row in training_data.itertuples(index=False)), eval_window=2,
+                       columns=columns)
+
+    assert list(expected.priorities.pin().values) != [1.0] * len(expected.priorities.pin())
+    for rows in formats:
+        magn = trained(database, iter(rows), eval_window=2)
+        assert list(magn.priorities.pin().values) == list(expected.priorities.pin().values)
+        assert magn.accuracy_history['stream'] == expected.accuracy_history['stream']
+
+
+def test_windowed_accuracy_is_recorded_after_every_window(database, training_data):
+    magn = MAGNGraph.from_database(database)
+    version = magn.priorities.pin().version
+    magn.fit_stream((row for _, row in training_data.iterrows()), learning_rate=0.3, eval_window=2, batch_size=1)
+
+    assert len(magn.accuracy_history['stream']) == ceil(len(training_data) / 2)
+    assert all(0.0 <= accuracy <= 1.0 for accuracy in magn.accuracy_history['stream'])
+    # One version per row and the final one
+    assert magn.priorities.pin().version == version + len(training_data) + 1
+
+
+def test_first_prediction_is_made_before_training(database, training_data):
+    magn = MAGNGraph.from_database(database)
+    row = training_data.iloc[0]
+    target = row[Database.mock_column_name]
+    correct = magn.predict(row.drop(Database.mock_column_name), target) == row[target]
+
+    magn.fit_stream([row], learning_rate=0.3, eval_window=1)
+
+    assert magn.accuracy_history['stream'] == [float(correct)]
+
+
+def test_invalid_streams_raise(database, training_data):
+    magn = MAGNGraph.from_database(database)
+
+    with pytest.raises(ValueError):
+        magn.fit_stream([], learning_rate=0.3, eval_window=0)
+    with pytest.raises(ValueError):
+        magn.fit_stream([tuple(training_data.iloc[0])], learning_rate=0.3)
+    with pytest.raises(NameError):
+        magn.fit_stream([training_data.iloc[0].drop(Database.mock_column_name)], learning_rate=0.3)
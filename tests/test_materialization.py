@@ -0,0 +1,146 @@
+from array import array
+
+import pytest
+
+from magn.database.database import Database
+from magn.magn import MAGNGraph
+from magn.stimulation_index import StimulationIndex, StimulationVector
+from magn.traversal import TraversalBudget
+
+from conftest import feature_rows
+
+
+def queries(data) -> tuple:
+    """The rows without the values of their targets, and the targets."""
+    rows = feature_rows(data)
+    targets = list(data[Database.mock_column_name])
+    return [row.drop(target).to_dict() for row, target in zip(rows, targets)], targets
+
+
+def predictions(magn: MAGNGraph, rows: list, targets: list, budget: TraversalBudget | None = None) -> list:
+    return [magn.predict(row, target, budget=budget) for row, target in zip(rows, targets)]
+
+
+@pytest.fixture
+def trained(magn, training_data) -> MAGNGraph:
+    magn.fit(training_data, num_epochs=2, learning_rate=0.3)
+    return magn
+
+
+def test_materialized_predictions_equal_computed_ones(trained, training_data):
+    rows, targets = queries(training_data)
+    expected = predictions(trained, rows, targets)
+
+    index = trained.materialize(set(targets))
+    refreshes = index.refreshes
+
+    assert len(index) > 0
+    assert predictions(trained, rows, targets) == expected
+    assert index.refreshes == refreshes
+
+
+def test_vectors_of_other_features_are_computed_on_demand(trained, training_data):
+    rows, targets = queries(training_data)
+    expected = predictions(trained, rows, targets)
+
+    index = trained.materialize(set(targets), features=['title'])
+    materialized = len(index)
+
+    assert predictions(trained, rows, targets) == expected
+    assert len(index) > materialized
+
+
+def test_vectors_are_refreshed_after_training(magn, training_data):
+    rows, targets = queries(training_data)
+    index = magn.materialize(set(targets))
+    refreshes = index.refreshes
+
+    magn.fit(training_data, num_epochs=2, learning_rate=0.3)
+    materialized = predictions(magn, rows, targets)
+    magn.dematerialize()
+
+    assert magn.stimulation_index is None
+    assert index.refreshes > refreshes
+    assert materialized == predictions(magn, rows, targets)
+
+
+def test_only_predictions_with_the_same_budget_use_the_index(trained, training_data):
+    rows, targets = queries(training_data)
+    budget = TraversalBudget(max_depth=3)
+    expected = predictions(trained, rows, targets, budget)
+
+    index = trained.materialize(set(targets), budget=budget)
+
+    assert index.covers(targets[0], budget) and not index.covers(targets[0], None)
+    assert predictions(trained, rows, targets, budget) == expected
+
+
+def test_saved_graph_keeps_the_vectors(tmp_path, trained, training_data):
+    rows, targets = queries(training_data)
+    expected = predictions(trained, rows, targets)
+    trained.materialize(set(targets))
+    trained.save(tmp_path / 'magn.pkl')
+
+    loaded = MAGNGraph.load(tmp_path / 'magn.pkl')
+
+    assert len(loaded.stimulation_index) == len(trained.stimulation_index)
+    assert predictions(loaded, rows, targets) == expected
+    assert loaded.stimulation_index.refreshes == 0
+
+
+def test_vector_entries_are_ordered_by_stimulation():
+    vector = StimulationVector(('rock', 'pop'), array('d', [0.5, 0.25]))
+
+    assert len(vector) == 2
+    assert vector.as_dict() == {'rock': 0.5, 'pop': 0.25}
+
+
+def test_newer_version_marks_older_vectors_stale():
+    index = StimulationIndex(frozenset({'genre'}))
+    vector = StimulationVector(('rock',), array('d', [1.0]))
+    index.put((0, 'genre'), 0, vector)
+
+    assert index.get((0, 'genre'), 0) is vector
+    assert index.get((0, 'genre'), 1) is None
+    index.put((0, 'genre'), 0, vector)
+    assert len(index) == 1
+    assert index.get((0, 'genre'), 0) is None
+
+    assert index.take_stale(1) == [(0, 'genre')]
+    assert index.take_stale(1) == []
+    index.put((0, 'genre'), 1, vector)
+    assert index.get((0, 'genre'), 1) is vector
+
+
+def test_lookups_hit_after_training(magn, training_data):
+    rows, targets = queries(training_data)
+    index = magn.materialize(set(targets))
+    materialized = len(index)
+
+    magn.fit(training_data, num_epochs=2, learning_rate=0.3, batch_size=2)
+    refreshes = index.refreshes
+    expected = predictions(magn, rows, targets)
+
+    assert len(index) == materialized
+    assert index.refreshes == refreshes
+    magn.dematerialize()
+    assert expected == predictions(magn, rows, targets)
+
+
+def test_vectors_are_recomputed_together_after_a_publish(trained, training_data):
+    rows, targets = queries(training_data)
+    index = trained.materialize(set(targets))
+    materialized = len(index)
+
+    with trained.priorities.training() as priorities:
+        priorities[0] *= 2.0
+        trained.priorities.publish()
+
+    refreshes = index.refreshes
+    predictions(trained, rows[:1], targets[:1])
+    assert index.refreshes == refreshes + materialized
+
+    expected = predictions(trained, rows, targets)
+    assert index.refreshes == refreshes + materialized
+    trained.dematerialize()
+    assert expected == predictions(trained, rows, targets)
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from magn.database.database import Database
+from magn.magn import MAGNGraph
+from magn.parallel_training import ParallelTrainer
+from magn.priorities import PriorityUpdate
+
+
+def trained(database: Database, data: pd.DataFrame, **options) -> list:
+    magn = MAGNGraph.from_database(database)
+    magn.fit(data, num_epochs=2, learning_rate=0.3, **options)
+    return list(magn.priorities.pin().values)
+
+
+@pytest.fixture
+def training_rows(training_data: pd.DataFrame) -> pd.DataFrame:
+    return pd.concat([training_data] * 3)
+
+
+def test_parallel_training_is_deterministic(database, training_rows):
+    first = trained(database, training_rows, workers=2, batch_size=4)
+
+    assert first != [1.0] * len(first)
+    assert trained(database, training_rows, workers=2, batch_size=4) == first
+
+
+def test_parallel_training_does_not_depend_on_the_number_of_workers(database, training_rows):
+    expected = trained(database, training_rows, workers=2, batch_size=4)
+
+    assert trained(database, training_rows, workers=3, batch_size=4) == pytest.approx(expected)
+    assert trained(database, training_rows, workers=3, batch_size=4, deterministic=False) == pytest.approx(expected)
+
+
+def test_batches_are_evaluated_with_the_priorities_from_their_start(database, training_rows):
+    magn = MAGNGraph.from_database(database)
+    data = training_rows.drop(Database.mock_column_name, axis=1)
+    targets = training_rows[Database.mock_column_name]
+    asa_graphs = {name: magn.get_asa_by_name(name) for name in data.columns}
+
+    with magn.priorities.training() as priorities:
+        for _ in range(2):
+            for start in range(0, len(data), 4):
+                batch = magn.priorities.pin().__class__(0, type(priorities)('d', priorities))
+                update = PriorityUpdate()
+                for (_, row), target in zip(data.iloc[start:start + 4].iterrows(), targets.iloc[start:start + 4]):
+                    activated, target_element = magn._training_elements(row, target, asa_graphs)
+                    update.merge(magn._priority_update(activated, target_element, 0.3, batch))
+                update.apply(priorities)
+
+    assert trained(database, training_rows, workers=2, batch_size=4) == pytest.approx(list(priorities))
+
+
+def test_trainer_requires_a_context(magn, training_data):
+    trainer = ParallelTrainer(magn, training_data, training_data[Database.mock_column_name], {}, 0.3, workers=2)
+
+    with pytest.raises(RuntimeError):
+        trainer.batch_update(0, 2, magn.priorities.pin())
+
+
+def test_shards_cover_the_batch(magn, training_data):
+    trainer = ParallelTrainer(magn, training_data, training_data[Database.mock_column_name], {}, 0.3, workers=3)
+
+    assert trainer._shards(2, 9) == [(2, 5), (5, 7), (7, 9)]
+    assert trainer._shards(0, 2) == [(0, 1), (1, 2)]
@@ -0,0 +1,69 @@
+import pytest
+
+from magn.database.database import Database
+from magn.magn import MAGNGraph
+from magn.partitioned import PartitionedMAGN, RemoteObjectRef
+
+from conftest import feature_rows
+
+
+def queries(data) -> tuple:
+    """The rows without the values of their targets, and the targets."""
+    rows = feature_rows(data)
+    targets = list(data[Database.mock_column_name])
+    return [row.drop(target).to_dict() for row, target in zip(rows, targets)], targets
+
+
+@pytest.mark.parametrize('partitions', [1, 2, 3])
+def test_partitioned_predictions_equal_the_graph(database, training_data, partitions):
+    magn = MAGNGraph.from_database(database)
+    magn.fit(training_data, num_epochs=2, learning_rate=0.3)
+    rows, targets = queries(training_data)
+    expected = [magn.predict(row, target) for row, target in zip(rows, targets)]
+
+    with PartitionedMAGN.from_database(database, partitions) as partitioned:
+        partitioned.load_priorities(magn.priorities.pin().values)
+
+        assert partitioned.predict_batch(rows, targets) == expected
+        assert [partitioned.predict(row, target) for row, target in zip(rows, targets)] == expected
+
+
+def test_explicit_assignment(large_database, large_training_data):
+    magn = MAGNGraph.from_database(large_database)
+    rows = [row.drop('genre').to_dict() for row in feature_rows(large_training_data)]
+
+    with PartitionedMAGN.from_database(large_database, {'reviews': 1, 'labels': 0}) as partitioned:
+        assert partitioned.assignment == {'reviews': 1, 'labels': 0}
+        assert partitioned.predict_batch(rows, 'genre') == [magn.predict(row, 'genre') for row in rows]
+        assert partitioned.predict_batch(rows, 'label') == [magn.predict(row, 'label') for row in rows]
+
+
+@pytest.mark.parametrize('assignment', [{'reviews': 0, 'labels': 0}, {'reviews': 1, 'labels': 0}])
+def test_deduplicated_partitions_predict_like_the_graph(large_database, large_training_data, assignment):
+    magn = MAGNGraph.from_database(large_database, deduplicate=True)
+    rows = [row.drop('genre').to_dict() for row in feature_rows(large_training_data)]
+
+    with PartitionedMAGN.from_database(large_database, assignment, deduplicate=True) as partitioned:
+        assert partitioned.predict_batch(rows, 'label') == [magn.predict(row, 'label') for row in rows]
+
+
+def test_nodes_are_numbered_like_the_graph(database):
+    magn = MAGNGraph.from_database(database)
+
+    with PartitionedMAGN.from_database(database, 2) as partitioned:
+        assert [name for _, name in partitioned.asa_graphs] == [asa_graph.name for asa_graph in magn.asa_graphs]
+        assert sum(n_nodes for _, n_nodes in partitioned.offsets.values()) == len(magn.priorities.pin().values)
+
+        with pytest.raises(ValueError):
+            partitioned.load_priorities([1.0])
+        with pytest.raises(ValueError):
+            partitioned.predict_batch([{}], ['genre', 'genre'])
+
+
+def test_invalid_number_of_partitions(database):
+    with pytest.raises(ValueError):
+        PartitionedMAGN.from_database(database, 0)
+
+
+def test_remote_reference_weight():
+    assert RemoteObjectRef(1, 5, duplicates=4).magn_weight() == 0.25
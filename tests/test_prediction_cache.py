@@ -0,0 +1,65 @@
+import pytest
+
+from magn.magn import MAGNGraph
+from magn.prediction_cache import PredictionCache
+from magn.traversal import TraversalBudget
+
+from conftest import feature_rows
+
+
+def test_cached_predictions_equal_computed_ones(large_database, large_training_data):
+    magn = MAGNGraph.from_database(large_database)
+    rows = feature_rows(large_training_data)
+    expected = [magn.predict(row, 'genre') for row in rows]
+
+    magn.enable_prediction_cache()
+    assert [magn.predict(row, 'genre') for row in rows] == expected
+    assert [magn.predict(row, 'genre') for row in rows] == expected
+    assert magn.prediction_cache.hits >= len(rows)
+
+
+def test_training_invalidates_the_cache(large_database, large_training_data):
+    magn = MAGNGraph.from_database(large_database)
+    magn.enable_prediction_cache()
+    row = feature_rows(large_training_data)[0]
+    magn.predict(row, 'genre')
+
+    magn.fit(large_training_data, num_epochs=1, learning_rate=0.5)
+    cached = magn.predict(row, 'genre')
+    magn.disable_prediction_cache()
+
+    assert cached == magn.predict(row, 'genre')
+
+
+def test_budget_is_part_of_the_key():
+    cache = PredictionCache()
+    cache.put((frozenset({1}), 'genre', 0, None), 'rock')
+
+    assert cache.get((frozenset({1}), 'genre', 0, TraversalBudget(max_paths=1))) is None
+    assert cache.get((frozenset({1}), 'genre', 0, None)) == 'rock'
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(maxsize=2)
+    cache.put((frozenset({1}), 'genre', 0, None), 'rock')
+    cache.put((frozenset({2}), 'genre', 0, None), 'pop')
+    cache.get((frozenset({1}), 'genre', 0, None))
+    cache.put((frozenset({3}), 'genre', 0, None), 'rap')
+
+    assert len(cache) == 2
+    assert cache.get((frozenset({2}), 'genre', 0, None)) is None
+    assert cache.get((frozenset({1}), 'genre', 0, None)) == 'rock'
+
+
+def test_newer_version_drops_older_entries():
+    cache = PredictionCache()
+    cache.put((frozenset({1}), 'genre', 0, None), 'rock')
+    cache.get((frozenset({1}), 'genre', 1, None))
+    cache.put((frozenset({2}), 'genre', 0, None), 'pop')
+
+    assert len(cache) == 0
+
+
+def test_cache_size_must_be_positive():
+    with pytest.raises(ValueError):
+        PredictionCache(maxsize=0)
@@ -0,0 +1,125 @@
+from array import array
+from random import Random
+from threading import Thread
+
+import pytest
+
+from magn.database.database import Database
+from magn.magn import MAGNGraph
+from magn.priorities import MAX_PRIORITY, MIN_PRIORITY, PriorityStore, PriorityUpdate
+
+from conftest import feature_rows
+
+
+def test_published_versions_are_snapshots():
+    store = PriorityStore()
+    index = store.register()
+    first = store.publish()
+
+    with store.training() as working:
+        working[index] = 2.0
+    assert store.pin() is first and first[index] == 1.0
+
+    second = store.publish()
+    assert second.version == first.version + 1 and second[index] == 2.0
+    assert first[index] == 1.0
+
+
+def test_reset_publishes_initial_priorities():
+    store = PriorityStore()
+    store.register()
+    with store.training() as working:
+        working[0] = 3.0
+    store.publish()
+
+    store.reset()
+
+    assert list(store.pin().values) == [1.0]
+
+
+@pytest.mark.parametrize('on_disk', [False, True])
+def test_predictions_during_training_use_published_versions(database, training_data, tmp_path, on_disk):
+    magn = MAGNGraph.from_database(database, storage=tmp_path if on_disk else None, storage_cache_size=2)
+    reference = MAGNGraph.from_database(database)
+    rows = feature_rows(training_data)
+    genres = {value for asa_graph in magn.asa_graphs if asa_graph.name == 'genre' for value in asa_graph.bl()}
+    errors = []
+
+    def train() -> None:
+        try:
+            magn.fit(training_data, num_epochs=3, learning_rate=0.1, batch_size=5)
+        except Exception as error:  # pylint: disable=broad-except
+            errors.append(error)
+
+    thread = Thread(target=train)
+    thread.start()
+    versions = []
+    while thread.is_alive():
+        versions.append(magn.priorities.pin().version)
+        for row in rows[:3]:
+            assert magn.predict(row, 'genre') in genres
+    thread.join()
+
+    assert not errors
+    assert versions == sorted(versions)
+    reference.fit(training_data, num_epochs=3, learning_rate=0.1, batch_size=5)
+    assert list(magn.priorities.pin().values) == list(reference.priorities.pin().values)
+    assert list(magn.priorities.pin().values) != [1.0] * len(magn.priorities.pin())
+
+
+def test_update_multiplies_every_node_once():
+    priorities = array('d', [1.0, 2.0, 4.0])
+    update = PriorityUpdate()
+    update.multiply([0, 1], 1.5)
+    update.multiply([1, 2], 0.5)
+    other = PriorityUpdate()
+    other.multiply([2], 3.0)
+    update.merge(other)
+
+    update.apply(priorities)
+
+    assert list(priorities) == pytest.approx([1.5, 1.5, 6.0])
+
+
+def test_update_clamps_priorities():
+    priorities = array('d', [1.0, 1.0, 1.0])
+    update = PriorityUpdate()
+    update.multiply([0], 0.0)
+    update.multiply([1], -2.0)
+    for _ in range(20):
+        update.multiply([2], 1e100)
+
+    update.apply(priorities)
+
+    assert priorities[0] == priorities[1] == pytest.approx(MIN_PRIORITY)
+    assert priorities[2] == pytest.approx(MAX_PRIORITY)
+
+
+def test_row_update_equals_multiplying_every_path(large_magn, large_training_data):
+    asa_graphs = {asa_graph.name: asa_graph for asa_graph in reversed(large_magn.asa_graphs)}
+    # With equal priorities all paths to a neuron are equally stimulated and nothing changes
+    rng = Random(0)
+    start = array('d', (rng.uniform(0.5, 1.5) for _ in large_magn.priorities.working))
+    changed = 0
+    for _, row in large_training_data.iterrows():
+        target = row[Database.mock_column_name]
+        activated, target_element = large_magn._training_elements(row.drop(Database.mock_column_name), target,
+                                                                  asa_graphs)
+        updated = array('d', start)
+        large_magn._priority_update(activated, target_element, 0.3, start).apply(updated)
+
+        expected = array('d', start)
+        deltas = (large_magn._calc_delta_numerical(activated, target_element.value) if target == 'score'
+                  else large_magn._calc_delta_categorical(activated, target_element.value))
+        for neuron, delta in zip(activated, deltas):
+            trie = large_magn._path_trie(target_element, neuron)
+            stimulation = large_magn._trie_stimulation(trie, start)
+            for end, activation in zip(trie.ends, large_magn._normalize([stimulation[end] for end in trie.ends])):
+                factor = 1.0 + 0.3 * activation if delta == 0.0 else 1.0 - 0.3 * delta * activation
+                for node in trie.walk(end):
+                    expected[node.index] = max(expected[node.index] * factor, MIN_PRIORITY)
+
+        assert list(updated) == pytest.approx(list(expected))
+        changed += updated != start
+
+    assert changed
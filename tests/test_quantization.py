@@ -0,0 +1,68 @@
+import pytest
+
+from magn.asa.quantization import Quantization
+from magn.asa.quantized_asa_graph import QuantizedASAGraph
+from magn.magn import MAGNGraph
+
+from conftest import feature_rows
+
+VALUES = [1.0, 2.0, 2.5, 4.0, 7.0, 7.5, 8.0, 10.0]
+
+
+@pytest.mark.parametrize('bins', [0, -1, 0.5, 2.5, '3', True])
+def test_quantile_rejects_invalid_bins(bins):
+    with pytest.raises(ValueError):
+        Quantization.quantile(bins)
+
+
+@pytest.mark.parametrize('make', [Quantization.fixed_width, Quantization.tolerance])
+def test_width_and_tolerance_must_be_positive(make):
+    with pytest.raises(ValueError):
+        make(0)
+    assert make(0.5).parameter == 0.5
+
+
+@pytest.mark.parametrize('bins', [1, 2, 3, 4])
+def test_quantile_creates_at_most_bins_buckets(bins):
+    quantizer = Quantization.quantile(bins).quantizer(VALUES)
+
+    assert 1 <= len(quantizer.edges) <= bins
+    assert len({quantizer.bucket_key(value) for value in VALUES}) == len(quantizer.edges)
+
+
+def test_fixed_width_buckets():
+    quantizer = Quantization.fixed_width(3).quantizer(VALUES)
+
+    assert [quantizer.bucket_key(value) for value in VALUES] == [1, 1, 1, 4, 7, 7, 7, 10]
+
+
+def test_tolerance_buckets():
+    quantizer = Quantization.tolerance(1.5).quantizer(VALUES)
+
+    assert quantizer.edges == [1.0, 4.0, 7.0, 10.0]
+
+
+def test_quantized_graph_aggregates_its_buckets():
+    asa_graph = QuantizedASAGraph('x', Quantization.fixed_width(3).quantizer(VALUES))
+    asa_graph.bulk_insert(VALUES, 'x')
+
+    assert [(element.key, element.count, element.value) for element in asa_graph.iter_elements()] == \
+        [(1.0, 3, 5.5 / 3), (4.0, 1, 4.0), (7.0, 3, 7.5), (10.0, 1, 10.0)]
+    assert asa_graph.search(2.0) is asa_graph.search(1.0)
+
+
+def test_evaluation_compares_buckets_of_quantized_targets(large_database):
+    magn = MAGNGraph.from_database(large_database, quantization={'score': Quantization.fixed_width(3)})
+    data = large_database.create_mock_target('reviews', ['score'])
+    asa_graph = magn.get_first_asa_by_name(magn.asa_graphs, 'score')
+
+    history = magn.fit(data, num_epochs=1, learning_rate=0.1)
+
+    predictions = [magn.predict(row, 'score') for row in feature_rows(data)]
+    buckets = [asa_graph.quantizer.bucket_key(prediction) for prediction in predictions]
+    true_buckets = [asa_graph.quantizer.bucket_key(value) for value in data['score']]
+    expected = sum(map(lambda pair: pair[0] == pair[1], zip(buckets, true_buckets))) / len(data)
+    exact = sum(map(lambda pair: pair[0] == pair[1], zip(predictions, data['score']))) / len(data)
+
+    assert history['train'][-1] == expected
+    assert expected > exact
@@ -0,0 +1,116 @@
+import pandas as pd
+import pytest
+
+from magn.database.database import Database
+from magn.database.keys import Keys
+from magn.magn import MAGNGraph
+from magn.query import Between, Equals
+
+
+def review_ids(objects: list) -> list:
+    """The reviewId of every review object."""
+    return [next(element.value for element in object_node.values if element.feature == 'reviewId')
+            for object_node in objects]
+
+
+def test_equals_and_between_match_a_filter(large_database):
+    magn = MAGNGraph.from_database(large_database)
+    reviews = large_database['reviews'].data
+
+    result = magn.query('reviews', [Equals('genre', 'rock'), Between('score', 3.0, 7.0)])
+
+    expected = reviews[(reviews['genre'] == 'rock') & reviews['score'].between(3.0, 7.0)]
+    assert review_ids(result) == list(expected.index)
+    assert [object_node.index for object_node in result] == sorted(object_node.index for object_node in result)
+
+
+def test_conditions_on_referring_table_follow_foreign_keys(large_database):
+    magn = MAGNGraph.from_database(large_database)
+    labels = large_database['labels'].data
+
+    result = magn.query('reviews', [Equals('label', 'silber')])
+
+    assert review_ids(result) == sorted(labels[labels['label'] == 'silber'].index)
+
+
+def test_conditions_on_referred_table_follow_foreign_keys(large_database):
+    magn = MAGNGraph.from_database(large_database)
+    labels = large_database['labels'].data
+    reviews = large_database['reviews'].data
+
+    result = magn.query('labels', [Equals('genre', 'jazz')])
+
+    expected = labels[labels.index.isin(reviews[reviews['genre'] == 'jazz'].index)]
+    assert sorted(object_node.values[0].value for object_node in result) == sorted(expected['label'])
+    assert all(object_node.clazz == 'labels' for object_node in result)
+
+
+def test_query_without_following_foreign_keys_rejects_other_tables(large_database):
+    magn = MAGNGraph.from_database(large_database)
+
+    with pytest.raises(ValueError):
+        magn.query('reviews', [Equals('label', 'silber')], follow_foreign_keys=False)
+
+
+def test_query_does_not_scan_the_objects_of_the_table(large_database):
+    magn = MAGNGraph.from_database(large_database)
+    expected = magn.query('reviews', [Equals('label', 'silber'), Equals('genre', 'rock')])
+
+    magn.objects['reviews'] = []
+    magn.objects['labels'] = []
+
+    assert magn.query('reviews', [Equals('label', 'silber'), Equals('genre', 'rock')]) == expected
+
+
+def test_query_after_reload(large_database, tmp_path):
+    magn = MAGNGraph.from_database(large_database)
+    magn.save(tmp_path / 'magn.pkl')
+    loaded = MAGNGraph.load(tmp_path / 'magn.pkl')
+
+    assert review_ids(loaded.query('reviews', [Equals('label', 'silber')])) == \
+        review_ids(magn.query('reviews', [Equals('label', 'silber')]))
+
+
+def test_unknown_table_raises(magn):
+    with pytest.raises(ValueError):
+        magn.query('unknown', [])
+
+
+def test_query_without_following_foreign_keys_ignores_other_tables(database):
+    magn = MAGNGraph.from_database(database)
+    reviews = database['reviews'].data
+
+    result = magn.query('reviews', [Equals('genre', 'rock')], follow_foreign_keys=False)
+
+    assert review_ids(result) == list(reviews[reviews['genre'] == 'rock'].index)
+    assert all(object_node.clazz == 'reviews' for object_node in result)
+
+
+def chain_database() -> Database:
+    """Artists, their albums and the tracks of the albums: the tracks are two foreign keys away from the artists."""
+    artists = pd.DataFrame({'country': ['uk', 'us', 'us']}, index=pd.Index([1, 2, 3], name='artistId'))
+    albums = pd.DataFrame({'artistId': [1, 1, 2, 3], 'year': [2004, 2006, 2000, 2001]},
+                          index=pd.Index([10, 11, 12, 13], name='albumId'))
+    tracks = pd.DataFrame({'albumId': [10, 10, 11, 12, 13], 'length': [180, 200, 240, 300, 210]},
+                          index=pd.Index([100, 101, 102, 103, 104], name='trackId'))
+    return Database(
+        tables={'artists': artists, 'albums': albums, 'tracks': tracks},
+        keys={
+            'artists': Keys(primary_keys=['artistId'], foreign_keys={}),
+            'albums': Keys(primary_keys=['albumId'], foreign_keys={'artists': ('artistId', 'artistId')}),
+            'tracks': Keys(primary_keys=['trackId'], foreign_keys={'albums': ('albumId', 'albumId')}),
+        }
+    )
+
+
+def values_of(objects: list, feature: str) -> list:
+    return sorted(next(element.value for element in object_node.values if element.feature == feature)
+                  for object_node in objects)
+
+
+def test_foreign_keys_are_followed_across_tables():
+    magn = MAGNGraph.from_database(chain_database())
+
+    assert values_of(magn.query('tracks', [Equals('country', 'us')]), 'trackId') == [103, 104]
+    assert values_of(magn.query('artists', [Between('length', 230, 400)]), 'artistId') == [1, 2]
+    assert values_of(magn.query('tracks', [Equals('country', 'uk'), Equals('year', 2004)]), 'trackId') == [100, 101]
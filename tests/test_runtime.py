@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import magn as package
+from magn import runtime
+from magn.magn import MAGNGraph
+
+from conftest import feature_rows
+
+SCRIPT = """
+import json, sys
+from magn import runtime
+
+rows = json.loads(sys.argv[2])
+magn = runtime.load(sys.argv[1])
+predictions = [runtime.predict(magn, row, 'genre') for row in rows]
+predictions.append(runtime.predict(magn, tuple(rows[0].values()), 'genre', columns=list(rows[0])))
+imported = sorted(module for module in ('numpy', 'pandas', 'networkx') if module in sys.modules)
+print(json.dumps({'predictions': predictions, 'imported': imported}))
+"""
+
+
+@pytest.fixture
+def saved(tmp_path, large_database, large_training_data):
+    magn = MAGNGraph.from_database(large_database)
+    magn.fit(large_training_data, num_epochs=1, learning_rate=0.5)
+    file = tmp_path / 'magn.pkl'
+    magn.save(file)
+    rows = [row.drop('genre').to_dict() for row in feature_rows(large_training_data)]
+    rows = json.loads(json.dumps(rows, default=float))
+    return magn, file, rows
+
+
+def test_runtime_predicts_without_the_heavy_dependencies(saved):
+    magn, file, rows = saved
+
+    environment = dict(os.environ, PYTHONPATH=str(Path(package.__file__).parents[1]))
+    output = subprocess.run([sys.executable, '-c', SCRIPT, str(file), json.dumps(rows)],
+                            env=environment, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output)
+
+    assert result['imported'] == []
+    assert result['predictions'] == [magn.predict(row, 'genre') for row in rows] + [magn.predict(rows[0], 'genre')]
+
+
+def test_loaded_graph_predicts_like_the_saved_one(saved):
+    magn, file, rows = saved
+    loaded = runtime.load(file)
+
+    assert [runtime.predict(loaded, row, 'genre') for row in rows] == [magn.predict(row, 'genre') for row in rows]
+    assert list(loaded.priorities.pin().values) == list(magn.priorities.pin().values)
+
+
+def test_sequence_rows_require_columns(saved):
+    magn, _, rows = saved
+
+    with pytest.raises(ValueError):
+        runtime.predict(magn, tuple(rows[0].values()), 'genre')
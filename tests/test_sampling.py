@@ -0,0 +1,126 @@
+import pytest
+
+from magn.sampling import WalkStatistics
+
+from conftest import feature_rows
+
+
+def test_estimates_are_running_maxima():
+    statistics = WalkStatistics()
+    statistics.record('rock', (-1.0, 0, 2, (0, 0)))
+    statistics.record('rock', (-3.0, 0, 2, (0, 1)))
+    statistics.record('pop', (-2.0, 0, 2, (1, 0)))
+    statistics.record(None, None)
+
+    result = statistics.result(stopped_early=False)
+    assert result.value == 'rock'
+    assert result.estimates == {'rock': 3.0, 'pop': 2.0}
+    assert result.reached == {'rock': 2, 'pop': 1}
+    assert result.walks == 4
+
+
+def test_equally_strong_paths_are_ordered_like_the_exact_search():
+    statistics = WalkStatistics()
+    statistics.record('pop', (-2.0, 1, 2, (0, 0)))
+    statistics.record('rock', (-2.0, 0, 4, (0, 0, 0, 0)))
+    assert statistics.leader() == 'rock'
+
+    statistics.record('jazz', (-2.0, 0, 2, (1, 0)))
+    assert statistics.leader() == 'jazz'
+
+
+def test_intervals_bound_the_reach_frequencies():
+    statistics = WalkStatistics(confidence=0.95)
+    for _ in range(30):
+        statistics.record('rock', (-1.0, 0, 2, (0, 0)))
+    for _ in range(10):
+        statistics.record('pop', (-2.0, 0, 2, (0, 1)))
+
+    result = statistics.result(stopped_early=False)
+    assert set(result.intervals) == {'rock', 'pop'}
+    for value, (lower, upper) in result.intervals.items():
+        assert 0.0 <= lower < result.reached[value] / result.walks < upper <= 1.0
+
+    narrow = WalkStatistics(confidence=0.5)
+    for _ in range(30):
+        narrow.record('rock', (-1.0, 0, 2, (0, 0)))
+    for _ in range(10):
+        narrow.record('pop', (-2.0, 0, 2, (0, 1)))
+    assert narrow.interval('rock')[0] > statistics.interval('rock')[0]
+    assert narrow.interval('jazz')[1] < statistics.interval('jazz')[1]
+
+
+def test_leader_is_separated_when_reached_clearly_more_often():
+    statistics = WalkStatistics(confidence=0.95)
+    statistics.record('rock', (-3.0, 0, 2, (0, 0)))
+    for _ in range(9):
+        statistics.record('rock', (-2.0, 0, 2, (0, 0)))
+    for _ in range(10):
+        statistics.record('pop', (-2.0, 0, 2, (0, 1)))
+    assert not statistics.separated()
+
+    for _ in range(80):
+        statistics.record('rock', (-2.0, 0, 2, (0, 0)))
+    assert statistics.separated()
+    assert statistics.interval('rock')[0] > statistics.interval('pop')[1]
+
+
+def test_leader_reached_less_often_is_not_separated():
+    statistics = WalkStatistics()
+    statistics.record('rock', (-3.0, 0, 2, (0, 0)))
+    for _ in range(99):
+        statistics.record('pop', (-2.0, 0, 2, (0, 1)))
+
+    assert statistics.leader() == 'rock'
+    assert not statistics.separated()
+
+
+def test_nothing_is_separated_without_walks_reaching_the_target():
+    statistics = WalkStatistics()
+    for _ in range(100):
+        statistics.record(None, None)
+
+    assert not statistics.separated()
+
+
+def test_invalid_confidence_is_rejected():
+    with pytest.raises(ValueError):
+        WalkStatistics(confidence=1.0)
+
+
+@pytest.mark.parametrize('target', ['genre', 'score', 'title'])
+def test_sampled_prediction_agrees_with_exact_prediction(large_magn, large_training_data, target):
+    large_magn.fit(large_training_data, 3, 0.1)
+
+    for row in feature_rows(large_training_data):
+        sampled = large_magn.predict_sampled(row, target, walks=1000, seed=1)
+        assert sampled.value == large_magn.predict(row, target)
+        assert sampled.estimates[sampled.value] == max(sampled.estimates.values())
+
+
+def test_sampled_prediction_stops_early_when_the_leader_is_separated(magn, training_data):
+    row = feature_rows(training_data)[0]
+
+    sampled = magn.predict_sampled(row, 'genre', walks=1000, seed=1)
+    assert sampled.stopped_early
+    assert sampled.walks < 1000
+    assert sampled.value == magn.predict(row, 'genre')
+    runner_up = max(upper for value, (_, upper) in sampled.intervals.items() if value != sampled.value)
+    assert sampled.intervals[sampled.value][0] > runner_up
+
+
+def test_sampled_mode_is_reproducible_with_a_seed(magn, training_data):
+    row = feature_rows(training_data)[0]
+
+    assert (magn.predict(row, 'genre', mode='sampled', seed=3) ==
+            magn.predict(row, 'genre', mode='sampled', seed=3) ==
+            magn.predict(row, 'genre'))
+
+
+def test_sampled_prediction_rejects_invalid_arguments(magn, training_data):
+    row = feature_rows(training_data)[0]
+
+    with pytest.raises(ValueError):
+        magn.predict_sampled(row, 'genre', walks=0)
+    with pytest.raises(ValueError):
+        magn.predict(row, 'genre', mode='guess')
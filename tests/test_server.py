@@ -0,0 +1,112 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from magn.magn import MAGNGraph
+from magn.server import MicroBatcher, PredictionClient, PredictionServer, predict_rows
+
+from conftest import feature_rows
+
+
+@pytest.fixture
+def saved(tmp_path, large_database, large_training_data):
+    magn = MAGNGraph.from_database(large_database)
+    magn.fit(large_training_data, num_epochs=1, learning_rate=0.5)
+    file = tmp_path / 'magn.pkl'
+    magn.save(file)
+    rows = [row.drop('genre').to_dict() for row in feature_rows(large_training_data)]
+    return magn, file, json.loads(json.dumps(rows, default=float))
+
+
+async def serving(server: PredictionServer, requests) -> tuple:
+    # A short directory, Unix socket paths are limited to about 100 characters
+    with TemporaryDirectory() as directory:
+        socket = Path(directory) / 'magn.sock'
+        ready = asyncio.Event()
+        task = asyncio.create_task(server.serve(unix_path=socket, ready=ready))
+        await ready.wait()
+        try:
+            client = PredictionClient(unix_path=socket)
+            return await requests(client), await client.metrics()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_server_predicts_like_the_graph(saved, workers):
+    magn, file, rows = saved
+    server = PredictionServer(file, workers=workers, max_batch_size=8, max_delay=0.05)
+
+    async def requests(client):
+        single = await asyncio.gather(*(client.predict(row, 'genre') for row in rows))
+        return single, await client.predict_many(rows, 'genre')
+
+    (single, many), metrics = asyncio.run(serving(server, requests))
+
+    expected = [magn.predict(row, 'genre') for row in rows]
+    assert single == expected
+    assert many == expected
+    assert metrics['requests'] == 2 * len(rows)
+    assert metrics['errors'] == 0
+    assert metrics['batches'] < metrics['requests']
+
+
+def test_invalid_requests_fail_alone(saved):
+    magn, file, rows = saved
+    server = PredictionServer(file, max_delay=0.05)
+
+    async def requests(client):
+        return await asyncio.gather(client.predict(rows[0], 'genre'), client.predict(rows[1], 'unknown'),
+                                    client.predict_many(rows[:2], ['genre']), return_exceptions=True)
+
+    (valid, invalid, mismatched), metrics = asyncio.run(serving(server, requests))
+
+    assert valid == magn.predict(rows[0], 'genre')
+    assert isinstance(invalid, ValueError)
+    assert isinstance(mismatched, ValueError)
+    assert metrics['errors'] == 1
+
+
+def test_predict_rows_isolates_failing_rows(saved):
+    magn, _, rows = saved
+
+    results = predict_rows(magn, rows[:3], ['genre', 'unknown', 'genre'])
+
+    assert results[0] == (True, magn.predict(rows[0], 'genre'))
+    assert not results[1][0]
+    assert results[2] == (True, magn.predict(rows[2], 'genre'))
+
+
+def test_batches_are_closed_at_the_maximal_size():
+    sizes = []
+
+    def predict(rows, targets):
+        sizes.append(len(rows))
+        return [(True, (row, target)) for row, target in zip(rows, targets)]
+
+    async def submit_all():
+        with ThreadPoolExecutor(1) as executor:
+            batcher = MicroBatcher(predict, executor, max_batch_size=4, max_delay=0.05)
+            task = asyncio.create_task(batcher.run())
+            await asyncio.sleep(0)
+            try:
+                return await asyncio.gather(*(batcher.submit(i, 'x') for i in range(10)))
+            finally:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+
+    assert asyncio.run(submit_all()) == [(i, 'x') for i in range(10)]
+    assert sizes == [4, 4, 2]
+
+
+def test_invalid_batcher_settings():
+    with ThreadPoolExecutor(1) as executor:
+        with pytest.raises(ValueError):
+            MicroBatcher(predict_rows, executor, max_batch_size=0)
+        with pytest.raises(ValueError):
+            MicroBatcher(predict_rows, executor, max_delay=-1.0)
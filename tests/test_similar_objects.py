@@ -0,0 +1,87 @@
+from collections import defaultdict
+
+import pytest
+
+from magn.adjacency import CompiledAdjacency
+from magn.asa.asa_graph import ASAGraph
+from magn.magn import MAGNGraph
+
+
+def brute_force(magn: MAGNGraph, object_node, use_bl: bool) -> dict:
+    """(object) => (stimulation) of spreading activation from the values of the object, without the adjacency."""
+    priorities = magn.priorities.pin()
+    activations = [(element, 1.0) for element in object_node.values]
+    if use_bl:
+        activations += [(neighbour, weight) for element in object_node.values
+                        for neighbour, weight in ((element.bl_prev, element.bl_prev_weight),
+                                                  (element.bl_next, element.bl_next_weight))
+                        if neighbour is not None]
+
+    stimulation = defaultdict(float)
+    for element, activation in activations:
+        for other in element.magn_objects:
+            stimulation[other] += activation * priorities[element.index] * element.magn_weight()
+    return {other: value for other, value in stimulation.items()
+            if other is not object_node and other.clazz == object_node.clazz and value > 0.0}
+
+
+@pytest.mark.parametrize('use_bl', [False, True])
+def test_similar_objects_match_brute_force(large_magn, use_bl):
+    queries = large_magn.objects['reviews']
+    results = large_magn.similar_objects_batch(queries, k=len(queries), use_bl=use_bl)
+
+    for query, result in zip(queries, results):
+        expected = brute_force(large_magn, query, use_bl)
+        assert {other: pytest.approx(value) for other, value in result} == expected
+        assert [value for _, value in result] == sorted((value for _, value in result), reverse=True)
+
+
+def test_top_k_keeps_the_most_stimulated_objects(large_magn):
+    query = large_magn.objects['reviews'][0]
+    everything = large_magn.similar_objects(query, k=1000)
+    top = large_magn.similar_objects(query, k=3)
+
+    assert [value for _, value in top] == [value for _, value in everything[:3]]
+
+
+def test_spread_is_sparse(large_magn):
+    adjacency = large_magn._compiled_adjacency()
+    queries = [list(object_node.values) for object_node in large_magn.objects['labels']]
+
+    stimulation = adjacency.spread(queries)
+
+    assert len(stimulation) == len(queries)
+    for query, (columns, values) in zip(queries, stimulation):
+        connections = sum(len(element.magn_objects) for element in query)
+        assert len(columns) == len(values) <= connections < len(adjacency.objects)
+        assert list(columns) == sorted(set(columns))
+
+
+def test_spread_of_no_queries(large_magn):
+    assert large_magn._compiled_adjacency().spread([]) == []
+
+
+def test_compile_streams_the_elements(large_magn, monkeypatch):
+    expected = CompiledAdjacency.compile(large_magn.asa_graphs, large_magn.objects, large_magn.priorities.pin())
+
+    def collect(_):
+        raise AssertionError("compile must not collect the elements of an ASA graph")
+    monkeypatch.setattr(ASAGraph, 'get_elements', collect)
+    actual = CompiledAdjacency.compile(large_magn.asa_graphs, large_magn.objects, large_magn.priorities.pin())
+
+    assert actual.element_rows == expected.element_rows
+    assert (actual.bl_rows == expected.bl_rows).all()
+    assert (actual.bl_weights == expected.bl_weights).all()
+    assert (actual.columns == expected.columns).all()
+
+
+@pytest.mark.parametrize('use_bl', [False, True])
+def test_disk_graph_finds_the_same_similar_objects(large_database, tmp_path, use_bl):
+    memory = MAGNGraph.from_database(large_database)
+    disk = MAGNGraph.from_database(large_database, storage=tmp_path, storage_cache_size=1)
+
+    expected = memory.similar_objects_batch(memory.objects['reviews'], k=5, use_bl=use_bl)
+    actual = disk.similar_objects_batch(disk.objects['reviews'], k=5, use_bl=use_bl)
+
+    assert [[(other.index, value) for other, value in result] for result in actual] == \
+        [[(other.index, value) for other, value in result] for result in expected]
@@ -0,0 +1,60 @@
+import pytest
+
+from magn.database.database import Database
+from magn.magn import MAGNGraph
+
+from conftest import sqlite_database
+
+
+@pytest.fixture
+def sqlite_file(tmp_path):
+    file = tmp_path / 'music.sqlite3'
+    sqlite_database(file)
+    return file
+
+
+def test_tables_are_read_on_first_access(sqlite_file):
+    database = Database.from_sqlite3(sqlite_file)
+
+    assert not any(table.loaded for table in database.all_data.values())
+    artists = database['artists'].data
+    assert database['artists'].loaded and not database['albums'].loaded
+    assert list(artists['name']) == ['aberfeldy', 'aarktica', 'aceyalone']
+    assert artists.attrs['name'] == 'artists'
+
+
+def test_target_table_loads_only_connected_tables(sqlite_file):
+    database = Database.from_sqlite3(sqlite_file, target_table='artists')
+
+    assert set(database.all_data) == {'artists', 'albums'}
+
+
+def test_foreign_keys_to_tables_not_loaded_are_dropped(sqlite_file):
+    database = Database.from_sqlite3(sqlite_file, tables=['albums'])
+
+    assert set(database.all_data) == {'albums'}
+    assert database['albums'].keys.foreign_keys == {}
+
+
+def test_columns_are_projected(sqlite_file):
+    database = Database.from_sqlite3(sqlite_file, columns={'albums': ['title']})
+
+    albums = database['albums'].data
+    assert list(albums.columns) == ['title']
+    assert set(albums.index.names) == {'albumId', 'artistId'}
+    assert list(database['artists'].data.columns) == ['name', 'country']
+
+
+def test_unknown_tables_raise(sqlite_file):
+    with pytest.raises(ValueError):
+        Database.from_sqlite3(sqlite_file, tables=['albums', 'unknown'])
+    with pytest.raises(ValueError):
+        Database.from_sqlite3(sqlite_file, target_table='unknown')
+
+
+def test_magn_graph_is_built_from_the_selection(sqlite_file):
+    magn = MAGNGraph.from_sqlite3(sqlite_file, columns={'albums': ['year']}, target_table='albums')
+
+    assert set(magn.objects) == {'artists', 'albums'}
+    assert {asa_graph.name for asa_graph in magn.asa_graphs} == {'artistId', 'name', 'country', 'albumId', 'year'}
+    assert magn.predict({'name': 'aarktica'}, 'year') == 2000
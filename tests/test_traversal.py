@@ -0,0 +1,89 @@
+from collections import deque
+
+import pytest
+
+from magn.asa.asa_element import ASAElement
+from magn.magn import MAGNGraph
+from magn.magn_object_node import MAGNObjectNode
+from magn.traversal import TraversalBudget
+
+from conftest import feature_rows
+
+
+def queue_of_paths(magn: MAGNGraph, start_node: ASAElement, target: str) -> list:
+    """The enumeration of bfs with a queue of whole paths, the way it was before the trie."""
+    queue = deque([(start_node, [start_node])])
+    paths = []
+    while queue:
+        current_node, path = queue.popleft()
+        if magn._bfs_chack_acceptable_element(current_node, target):
+            paths.append(path)
+            continue
+
+        for neighbor in current_node.neighbors():
+            acceptable = isinstance(neighbor, ASAElement) and magn._bfs_chack_acceptable_element(neighbor, target)
+            if neighbor not in path and (isinstance(neighbor, MAGNObjectNode) or acceptable):
+                queue.append((neighbor, path + [neighbor]))
+    return paths
+
+
+def start_elements(magn: MAGNGraph, data, target: str) -> list:
+    return [element for row in feature_rows(data) for element in magn._activated_neurons(row, target)][:20]
+
+
+def fanouts(trie) -> list:
+    counts = [0] * len(trie.nodes)
+    for parent in trie.parents[1:]:
+        counts[parent] += 1
+    return counts
+
+
+def test_trie_finds_the_paths_of_a_queue_of_paths(magn, training_data):
+    for start_node in start_elements(magn, training_data, 'genre'):
+        assert magn.bfs(start_node, 'genre') == queue_of_paths(magn, start_node, 'genre')
+
+
+@pytest.mark.parametrize('max_paths', [1, 2, 5])
+def test_max_paths_keeps_the_first_paths(magn, training_data, max_paths):
+    for start_node in start_elements(magn, training_data, 'genre'):
+        paths = magn.bfs(start_node, 'genre')
+        trie = magn._path_trie(start_node, 'genre', TraversalBudget(max_paths=max_paths))
+
+        assert trie.paths() == paths[:max_paths]
+        if len(paths) > max_paths:
+            assert len(trie.nodes) < len(magn._path_trie(start_node, 'genre').nodes)
+
+
+def test_max_depth_keeps_the_short_paths(magn, training_data):
+    for start_node in start_elements(magn, training_data, 'genre'):
+        paths = magn.bfs(start_node, 'genre', TraversalBudget(max_depth=2))
+        assert paths == [path for path in magn.bfs(start_node, 'genre') if len(path) <= 3]
+
+
+def test_max_fanout_limits_the_neighbours_of_every_node(large_magn):
+    hub = large_magn.get_first_asa_by_name(large_magn.asa_graphs, 'genre').search('rock')
+    unbounded = large_magn._path_trie(hub, 'label', TraversalBudget(max_depth=3))
+    trie = large_magn._path_trie(hub, 'label', TraversalBudget(max_depth=3, max_fanout=2))
+
+    assert fanouts(unbounded)[0] == len(hub.magn_objects) > 2
+    assert max(fanouts(trie)) <= 2
+    assert trie.paths() and all(path in unbounded.paths() for path in trie.paths())
+
+
+def test_max_queued_limits_the_trie(large_magn, large_training_data):
+    for start_node in start_elements(large_magn, large_training_data, 'genre'):
+        trie = large_magn._path_trie(start_node, 'genre', TraversalBudget(max_queued=10))
+        assert len(trie.nodes) <= 10
+
+
+def test_budgeted_prediction_uses_the_budgeted_paths(large_magn, large_training_data):
+    budget = TraversalBudget(max_paths=3, max_fanout=4)
+    for row in feature_rows(large_training_data):
+        assert large_magn.predict(row, 'genre', budget=budget) in {'rock', 'pop', 'rap', 'jazz'}
+
+
+@pytest.mark.parametrize('limits', [{'max_depth': -1}, {'max_paths': 0}, {'max_expanded_nodes': 0},
+                                    {'max_fanout': 0}, {'max_queued': 0}])
+def test_invalid_budget_raises(limits):
+    with pytest.raises(ValueError):
+        TraversalBudget(**limits)